@@ -0,0 +1,20 @@
+# gunicorn configuration for Malcolm's API (loaded automatically from the working directory)
+#
+# By default the API is served by a single synchronous worker, in which each request occupies the worker
+#   while it waits on OpenSearch, Dashboards, NetBox, etc. Setting API_WORKER_CLASS to "gevent" serves the
+#   same application with gevent's cooperative worker instead: the standard library (and therefore requests
+#   and the OpenSearch/Elasticsearch clients built on it) is monkey-patched so that those waits yield to other
+#   requests, allowing up to API_WORKER_CONNECTIONS requests per worker to be in flight at once.
+
+import multiprocessing
+import os
+
+from malcolm_utils import str2bool
+
+worker_class = os.getenv('API_WORKER_CLASS', 'sync').lower()
+workers = int(os.getenv('API_WORKERS', '1')) or max(multiprocessing.cpu_count() // 2, 1)
+worker_connections = int(os.getenv('API_WORKER_CONNECTIONS', '1000'))
+threads = int(os.getenv('API_THREADS', '1'))
+timeout = int(os.getenv('API_WORKER_TIMEOUT_SEC', '30'))
+keepalive = int(os.getenv('API_KEEPALIVE_SEC', '2'))
+accesslog = '-' if str2bool(os.getenv('API_ACCESS_LOG', 'false')) else None
@@ -1,23 +1,36 @@
+import atexit
+import bisect
 import dateparser
+import functools
+import hashlib
 import json
 import malcolm_utils
 import os
 import platform
 import psutil
+import queue
 import random
 import re
 import requests
 import string
+import threading
+import time
 import traceback
 import urllib3
 import warnings
+import zipfile
+import zlib
 
 from collections import defaultdict, OrderedDict
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timezone
-from flask import Flask, jsonify, request
+from dateutil.relativedelta import relativedelta
+from flask import Flask, Response, g, has_request_context, jsonify, request
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from urllib.parse import urlparse, urljoin
+from urllib3.util.retry import Retry
 
 # map categories of field names to OpenSearch dashboards
 fields_to_urls = []
@@ -145,6 +158,13 @@ fields_to_urls.append(
     ]
 )
 
+# fields_to_urls with the regular expressions compiled once, see field_url_templates
+fields_to_urls_compiled = [
+    (re.compile(url_regex_pair[0], flags=re.IGNORECASE), tuple(url_regex_pair[1]))
+    for url_regex_pair in fields_to_urls
+    if len(url_regex_pair) == 2
+]
+
 # field type maps from our various field sources
 field_type_map = defaultdict(lambda: 'string')
 field_type_map['date'] = 'date'
@@ -230,14 +250,24 @@ else:
 
 if databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote:
     import elasticsearch as DatabaseImport
-    from elasticsearch_dsl import Search as SearchClass, A as AggregationClass, Q as QueryClass
+    from elasticsearch_dsl import (
+        Search as SearchClass,
+        MultiSearch as MultiSearchClass,
+        A as AggregationClass,
+        Q as QueryClass,
+    )
 
     DatabaseClass = DatabaseImport.Elasticsearch
     if opensearchHttpAuth:
         DatabaseInitArgs['basic_auth'] = opensearchHttpAuth
 else:
     import opensearchpy as DatabaseImport
-    from opensearchpy import Search as SearchClass, A as AggregationClass, Q as QueryClass
+    from opensearchpy import (
+        Search as SearchClass,
+        MultiSearch as MultiSearchClass,
+        A as AggregationClass,
+        Q as QueryClass,
+    )
 
     DatabaseClass = DatabaseImport.OpenSearch
     if opensearchHttpAuth:
@@ -248,6 +278,240 @@ databaseClient = DatabaseClass(
     **DatabaseInitArgs,
 )
 
+# process-wide cache of field mapping types keyed by (index pattern, field name), see field_mapping_types
+fieldMappingCache = malcolm_utils.ExpiringLRUCache(
+    maxsize=app.config["FIELD_MAPPING_CACHE_SIZE"],
+    ttl=app.config["FIELD_MAPPING_CACHE_TTL_SEC"],
+)
+FIELD_MAPPING_CACHE_MISS = object()
+
+# tiebreakers for sorting exported documents over a point in time, in order of preference: _shard_doc is
+#   cheap, but clusters that don't support it fall back to _id (which loads _id fielddata), see export_hits
+EXPORT_SORT_TIEBREAKERS = ('_shard_doc', '_id')
+
+# optional cache of /agg and /document results keyed by their normalized arguments, see response_cache_key
+responseCache = (
+    malcolm_utils.ExpiringLRUCache(
+        maxsize=app.config["RESPONSE_CACHE_SIZE"],
+        ttl=app.config["RESPONSE_CACHE_TTL_SEC"],
+    )
+    if malcolm_utils.str2bool(app.config["RESPONSE_CACHE_ENABLED"])
+    else None
+)
+
+# thread pool for the concurrent /ready probes, and the most recent result of running them
+readyProbeExecutor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='ready')
+readySnapshotLock = threading.Lock()
+readySnapshot = {'time': 0.0, 'result': None}
+
+
+class PooledSession(requests.Session):
+    """A requests.Session which applies a default timeout to requests that don't specify one"""
+
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if not apiMetrics:
+            return super().request(method, url, **kwargs)
+        startTime = time.perf_counter()
+        status = 'error'
+        try:
+            response = super().request(method, url, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            host = urlparse(url).hostname or 'unknown'
+            apiMetrics.observe(
+                'malcolm_api_outbound_request_duration_seconds',
+                (('host', host),),
+                time.perf_counter() - startTime,
+                description='Duration of outbound HTTP requests (to Dashboards, NetBox, Logstash, etc.)',
+            )
+            apiMetrics.inc(
+                'malcolm_api_outbound_requests_total',
+                (('host', host), ('status', str(status))),
+                description='Outbound HTTP requests',
+            )
+
+
+# connection pools (one per host) shared by every thread's PooledSession, with and without retries
+httpAdapters = {
+    retry: HTTPAdapter(
+        pool_connections=app.config["HTTP_POOL_CONNECTIONS"],
+        pool_maxsize=app.config["HTTP_POOL_MAXSIZE"],
+        max_retries=(
+            Retry(
+                total=app.config["HTTP_RETRIES"],
+                backoff_factor=app.config["HTTP_RETRY_BACKOFF"],
+                status_forcelist=(502, 503, 504),
+                allowed_methods=('GET', 'HEAD'),
+                raise_on_status=False,
+            )
+            if retry
+            else 0
+        ),
+    )
+    for retry in (True, False)
+}
+httpSessionLocal = threading.local()
+
+
+def http_session(retry=True):
+    """Returns the calling thread's session for outbound HTTP calls (to Dashboards, NetBox, Logstash, etc.).
+    Sessions are per-thread, but they share keep-alive connection pools (HTTP_POOL_CONNECTIONS hosts,
+    HTTP_POOL_MAXSIZE connections per host), and requests time out after HTTP_TIMEOUT_SEC unless a timeout
+    is specified.
+
+    Parameters
+    ----------
+    retry : bool
+        if True, idempotent requests failing with a connection error or a 502/503/504 response are retried
+        up to HTTP_RETRIES times with exponential backoff (HTTP_RETRY_BACKOFF)
+
+    Returns
+    -------
+    session
+        a PooledSession
+    """
+    if (sessions := getattr(httpSessionLocal, 'sessions', None)) is None:
+        sessions = httpSessionLocal.sessions = {}
+    if (session := sessions.get(retry)) is None:
+        session = sessions[retry] = PooledSession(timeout=app.config["HTTP_TIMEOUT_SEC"])
+        session.mount('http://', httpAdapters[retry])
+        session.mount('https://', httpAdapters[retry])
+    return session
+
+
+class ApiMetrics:
+    """A minimal registry of counters and histograms rendered in the Prometheus text exposition format.
+    Metrics are kept per process, so each gunicorn worker reports its own.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.descriptions = {}
+
+    @staticmethod
+    def labelstr(labels):
+        escaped = ((k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in labels)
+        return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}' if labels else ''
+
+    def inc(self, name, labels=(), value=1, description=None):
+        with self.lock:
+            self.counters[(name, labels)] += value
+            if description:
+                self.descriptions.setdefault(name, ('counter', description))
+
+    def observe(self, name, labels, seconds, description=None):
+        with self.lock:
+            if (hist := self.histograms.get((name, labels))) is None:
+                hist = self.histograms[(name, labels)] = [[0] * len(self.BUCKETS), 0.0, 0]
+                if description:
+                    self.descriptions.setdefault(name, ('histogram', description))
+            if (idx := bisect.bisect_left(self.BUCKETS, seconds)) < len(self.BUCKETS):
+                hist[0][idx] += 1
+            hist[1] += seconds
+            hist[2] += 1
+
+    def render(self, extra=()):
+        """Returns the metrics (followed by any extra (name, type, help, labels, value) samples) as text"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self.histograms.items())
+        described = set()
+
+        def describe(name, mtype, mhelp):
+            if name not in described:
+                described.add(name)
+                lines.append(f'# HELP {name} {mhelp}')
+                lines.append(f'# TYPE {name} {mtype}')
+
+        for (name, labels), value in counters:
+            describe(name, *self.descriptions.get(name, ('counter', name)))
+            lines.append(f'{name}{self.labelstr(labels)} {value:g}')
+        for (name, labels), (buckets, total, count) in histograms:
+            describe(name, *self.descriptions.get(name, ('histogram', name)))
+            cumulative = 0
+            for le, bucketCount in zip(self.BUCKETS, buckets):
+                cumulative += bucketCount
+                lines.append(f'{name}_bucket{self.labelstr(labels + (("le", f"{le:g}"),))} {cumulative}')
+            lines.append(f'{name}_bucket{self.labelstr(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{self.labelstr(labels)} {total:g}')
+            lines.append(f'{name}_count{self.labelstr(labels)} {count}')
+        for name, mtype, mhelp, labels, value in extra:
+            describe(name, mtype, mhelp)
+            lines.append(f'{name}{self.labelstr(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+# request, database and outbound HTTP instrumentation (None unless API_METRICS_ENABLED), see metrics
+apiMetrics = ApiMetrics() if malcolm_utils.str2bool(app.config["API_METRICS_ENABLED"]) else None
+
+
+def instrument_database_client(client):
+    """Wraps the database client's transport so the time spent in each database request is recorded, both
+    overall and (in g.database_seconds) for the API request being handled
+    """
+    performRequest = client.transport.perform_request
+
+    def timed_perform_request(*args, **kwargs):
+        startTime = time.perf_counter()
+        try:
+            return performRequest(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - startTime
+            apiMetrics.observe(
+                'malcolm_api_database_request_duration_seconds',
+                (),
+                elapsed,
+                description='Duration of individual database requests',
+            )
+            if has_request_context():
+                g.database_seconds = g.get('database_seconds', 0.0) + elapsed
+
+    client.transport.perform_request = timed_perform_request
+
+
+def metrics_request_started():
+    g.request_start_time = time.perf_counter()
+
+
+def metrics_request_finished(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    apiMetrics.inc(
+        'malcolm_api_requests_total',
+        (('route', route), ('method', request.method), ('status', str(response.status_code))),
+        description='API requests handled',
+    )
+    if (startTime := g.get('request_start_time')) is not None:
+        apiMetrics.observe(
+            'malcolm_api_request_duration_seconds',
+            (('route', route),),
+            time.perf_counter() - startTime,
+            description='Total time spent handling API requests',
+        )
+        apiMetrics.observe(
+            'malcolm_api_request_database_duration_seconds',
+            (('route', route),),
+            g.get('database_seconds', 0.0),
+            description='Time spent waiting on the database while handling API requests',
+        )
+    return response
+
+
+if apiMetrics:
+    instrument_database_client(databaseClient)
+    app.before_request(metrics_request_started)
+    app.after_request(metrics_request_finished)
+
 
 def doctype_is_host_logs(d):
     return any([str(d).lower().startswith(x) for x in ['host', 'beat', 'miscbeat']])
@@ -269,6 +533,148 @@ def get_request_arguments(req):
     return arguments
 
 
+relativeTimeUnits = {
+    'y': 'years',
+    'M': 'months',
+    'w': 'weeks',
+    'd': 'days',
+    'h': 'hours',
+    'H': 'hours',
+    'm': 'minutes',
+    's': 'seconds',
+}
+relativeTimeUnitAbbrevs = {
+    'year': 'y',
+    'month': 'M',
+    'week': 'w',
+    'day': 'd',
+    'hour': 'h',
+    'minute': 'm',
+    'second': 's',
+}
+dateMathTokenPattern = re.compile(r'([+-]\d+|/)([yMwdhHms])')
+relativeTimeAgoPattern = re.compile(
+    r'^(\d+|an?)\s+(year|month|week|day|hour|minute|second)s?\s+ago$',
+    re.IGNORECASE,
+)
+
+
+@functools.lru_cache(maxsize=256)
+def relative_time_template(timeStr):
+    """Parses relative time expressions that can be evaluated without dateparser into a tuple of
+    operations to apply to the current time (see apply_relative_time). The result depends only on
+    the string, so it is memoized.
+
+    Supported expressions are "now", OpenSearch date math relative to now (e.g., "now-1d", "now-1d/d",
+    "now-2h+15m") and "<n> <unit>(s) ago" (e.g., "1 day ago", "30 minutes ago").
+
+    Parameters
+    ----------
+    timeStr : string
+        The time expression
+
+    Returns
+    -------
+    operations
+        a tuple of ('+', count, unit) and ('/', None, unit) operations, or None if the expression
+        isn't one of the supported relative formats
+    """
+    expr = timeStr.strip()
+    if match := relativeTimeAgoPattern.match(expr):
+        count = 1 if match.group(1).lower() in ('a', 'an') else int(match.group(1))
+        return (('+', -count, relativeTimeUnitAbbrevs[match.group(2).lower()]),)
+    elif expr.startswith('now'):
+        operations = []
+        pos = 3
+        for match in dateMathTokenPattern.finditer(expr, pos):
+            if match.start() != pos:
+                return None
+            if match.group(1) == '/':
+                operations.append(('/', None, match.group(2)))
+            else:
+                operations.append(('+', int(match.group(1)), match.group(2)))
+            pos = match.end()
+        return tuple(operations) if pos == len(expr) else None
+    else:
+        return None
+
+
+def apply_relative_time(operations, base):
+    """Applies the operations from relative_time_template to a datetime
+
+    Parameters
+    ----------
+    operations : tuple
+        The operations returned by relative_time_template
+    base : datetime
+        The time to which the operations are relative (generally the current time)
+
+    Returns
+    -------
+    result
+        the resulting datetime
+    """
+    result = base
+    for op, count, unit in operations:
+        if op == '/':
+            # round down to the beginning of the unit
+            if unit == 'w':
+                result = (result - relativedelta(days=result.weekday())).replace(hour=0, minute=0, second=0)
+            elif unit == 'y':
+                result = result.replace(month=1, day=1, hour=0, minute=0, second=0)
+            elif unit == 'M':
+                result = result.replace(day=1, hour=0, minute=0, second=0)
+            elif unit == 'd':
+                result = result.replace(hour=0, minute=0, second=0)
+            elif unit in ('h', 'H'):
+                result = result.replace(minute=0, second=0)
+            elif unit == 'm':
+                result = result.replace(second=0)
+            result = result.replace(microsecond=0)
+        else:
+            result = result + relativedelta(**{relativeTimeUnits[unit]: count})
+    return result
+
+
+def parse_time(timeStr):
+    """Converts a time string to a datetime, trying (in order) UNIX time, ISO-8601, OpenSearch date math
+    and simple relative expressions (see relative_time_template) before falling back to dateparser for
+    anything else. If no time zone information is provided, UTC is assumed.
+
+    Parameters
+    ----------
+    timeStr : string
+        The time string (e.g., "1674581357", "2023-01-24T17:29:17Z", "now-1d/d", "1 day ago",
+        "last tuesday")
+
+    Returns
+    -------
+    time
+        a datetime (None if it could not be parsed)
+    """
+    timeStr = str(timeStr).strip()
+    if timeStr.isdigit():
+        return datetime.fromtimestamp(int(timeStr), timezone.utc)
+
+    if (anchorStr := timeStr.partition('||'))[1]:
+        # date math anchored to an absolute time (e.g., "2023-01-24||+1d/d")
+        if (anchor := parse_time(anchorStr[0])) and (
+            (operations := relative_time_template(f'now{anchorStr[2]}')) is not None
+        ):
+            return apply_relative_time(operations, anchor)
+    elif timeStr[:1].isdigit() and ('-' in timeStr):
+        try:
+            result = datetime.fromisoformat(timeStr)
+            return result if result.tzinfo else result.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+
+    if (operations := relative_time_template(timeStr)) is not None:
+        return apply_relative_time(operations, datetime.now(timezone.utc))
+
+    return dateparser.parse(timeStr)
+
+
 def gettimes(args):
     """Parses 'from' and 'to' times out of the provided dictionary, returning
     two datetime objects
@@ -279,7 +685,8 @@ def gettimes(args):
         The dictionary which should contain 'from' and 'to' times. Missing
         times are returned as None.
         Time can be UNIX time integers represented as strings or strings
-        of various formats, in which case a "best guess" conversion is done.
+        of various formats, in which case a "best guess" conversion is done
+        (see parse_time).
         If no time zone information is provided, UTC is assumed.
 
     Returns
@@ -287,20 +694,8 @@ def gettimes(args):
     return start_time, end_time
         datetime objects representing the start and end time for a query
     """
-    if start_time_str := args.get("from"):
-        start_time = (
-            datetime.utcfromtimestamp(int(start_time_str))
-            if start_time_str.isdigit()
-            else dateparser.parse(start_time_str)
-        )
-    else:
-        start_time = None
-    if end_time_str := args.get("to"):
-        end_time = (
-            datetime.utcfromtimestamp(int(end_time_str)) if end_time_str.isdigit() else dateparser.parse(end_time_str)
-        )
-    else:
-        end_time = None
+    start_time = parse_time(start_time_str) if (start_time_str := args.get("from")) else None
+    end_time = parse_time(end_time_str) if (end_time_str := args.get("to")) else None
 
     return start_time, end_time
 
@@ -339,6 +734,24 @@ def getfilters(args):
         return None
 
 
+@functools.lru_cache(maxsize=4096)
+def field_url_templates(field):
+    """Returns the URLs (or "DASH:" dashboard IDs) from fields_to_urls whose regular expressions match a field
+    name. As the result depends only on the field name, it is memoized.
+
+    Parameters
+    ----------
+    field : string
+        the name of the field
+
+    Returns
+    -------
+    urls
+        a tuple of the matching URLs and dashboard IDs (without duplicates)
+    """
+    return tuple(dict.fromkeys(url for regex, urls in fields_to_urls_compiled if regex.search(field) for url in urls))
+
+
 def urls_for_field(fieldname, start_time=None, end_time=None):
     """looks up a list of URLs relevant to a particular database field
 
@@ -364,21 +777,19 @@ def urls_for_field(fieldname, start_time=None, end_time=None):
     end_time_str = (
         f"'{end_time.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')}'" if end_time is not None else 'now'
     )
-    translated = []
+    translated = {}
 
     if databaseMode != malcolm_utils.DatabaseMode.ElasticsearchRemote:
         for field in malcolm_utils.get_iterable(fieldname):
-            for url_regex_pair in fields_to_urls:
-                if (len(url_regex_pair) == 2) and re.search(url_regex_pair[0], field, flags=re.IGNORECASE):
-                    for url in url_regex_pair[1]:
-                        if url.startswith('DASH:'):
-                            translated.append(
-                                f"/dashboards/app/dashboards#/view/{url[5:]}?_g=(filters:!(),refreshInterval:(pause:!t,value:0),time:(from:{start_time_str},to:{end_time_str}))"
-                            )
-                        else:
-                            translated.append(url)
+            for url in field_url_templates(field):
+                if url.startswith('DASH:'):
+                    translated[
+                        f"/dashboards/app/dashboards#/view/{url[5:]}?_g=(filters:!(),refreshInterval:(pause:!t,value:0),time:(from:{start_time_str},to:{end_time_str}))"
+                    ] = None
+                else:
+                    translated[url] = None
 
-    return list(set(translated))
+    return list(translated)
 
 
 def doctype_from_args(args):
@@ -454,7 +865,7 @@ def timefield_from_args(args):
     return timefield
 
 
-def filtertime(search, args, default_from="1 day ago", default_to="now"):
+def filtertime(search, args, default_from="1 day ago", default_to="now", bucket_ms=0):
     """Applies a time filter (inclusive; extracted from request arguments) to an OpenSearch query and
     returns the range as a tuple of integers representing the milliseconds since EPOCH. If
     either end of the range is unspecified, the start and end times default to "1 day ago" and "now",
@@ -466,6 +877,9 @@ def filtertime(search, args, default_from="1 day ago", default_to="now"):
         The object representing the OpenSearch Search query
     args : dict
         The dictionary which should contain 'from' and 'to' times (see gettimes) and 'doctype'
+    bucket_ms : int
+        If nonzero, the start time is rounded down and the end time rounded up to a multiple of this
+        many milliseconds (see response_cache_bucket_ms)
 
     Returns
     -------
@@ -477,11 +891,14 @@ def filtertime(search, args, default_from="1 day ago", default_to="now"):
     """
     start_time, end_time = gettimes(args)
     start_time_ms = int(
-        start_time.timestamp() * 1000 if start_time is not None else dateparser.parse(default_from).timestamp() * 1000
+        start_time.timestamp() * 1000 if start_time is not None else parse_time(default_from).timestamp() * 1000
     )
     end_time_ms = int(
-        end_time.timestamp() * 1000 if end_time is not None else dateparser.parse(default_to).timestamp() * 1000
+        end_time.timestamp() * 1000 if end_time is not None else parse_time(default_to).timestamp() * 1000
     )
+    if bucket_ms > 0:
+        start_time_ms -= start_time_ms % bucket_ms
+        end_time_ms += -end_time_ms % bucket_ms
     return (
         start_time_ms,
         end_time_ms,
@@ -551,83 +968,275 @@ def filtervalues(search, args):
     return (filters, s)
 
 
-def aggfields(fieldnames, current_request, urls=None):
-    """Returns a bucket aggregation for a particular field over a given time range
+def field_mapping_types(index, fieldnames):
+    """Returns the mapping type for each of the requested fields in an index pattern. Types are
+    served from fieldMappingCache when possible, and any fields not found there are looked up
+    together with a single get_field_mapping call and added to the cache.
 
     Parameters
     ----------
-    fieldname : string or Array of string
+    index : string
+        The index pattern containing the fields
+    fieldnames : string or Array of string
+        The name of the field(s) to look up
+
+    Returns
+    -------
+    types
+        dict where the key is the field name and the value is its mapping type (e.g., "keyword",
+        "long", "ip") in the most recent index matching the pattern, or None if it isn't mapped
+    """
+    types = {}
+    uncached = []
+    for fname in malcolm_utils.get_iterable(fieldnames):
+        if (ftype := fieldMappingCache.get((index, fname), FIELD_MAPPING_CACHE_MISS)) is FIELD_MAPPING_CACHE_MISS:
+            uncached.append(fname)
+        else:
+            types[fname] = ftype
+
+    if uncached:
+        mapping = databaseClient.indices.get_field_mapping(
+            fields=','.join(uncached),
+            index=index,
+        )
+        # as index names end in a date, the last one sorted by name is the most recent
+        latestMapping = mapping[max(mapping.keys())] if (mapping and isinstance(mapping, dict)) else {}
+        for fname in uncached:
+            types[fname] = next(
+                iter(
+                    malcolm_utils.dictsearch(
+                        malcolm_utils.deep_get(latestMapping, ['mappings', fname], {}),
+                        'type',
+                    )
+                ),
+                None,
+            )
+            fieldMappingCache.set((index, fname), types[fname])
+
+    return types
+
+
+def invalidate_field_mapping_cache(index=None):
+    """Discards cached field mapping types (see field_mapping_types) so they will be looked up again
+    the next time they're needed, e.g., after an index template has changed
+
+    Parameters
+    ----------
+    index : string
+        Discard only fields cached for this index pattern, or everything if None
+
+    Returns
+    -------
+    removed
+        the number of cache entries discarded
+    """
+    return fieldMappingCache.invalidate(None if index is None else (lambda key: key[0] == index))
+
+
+def response_cache_bucket_ms(args):
+    """Returns the size of the time buckets (in milliseconds) to which query time ranges are rounded
+    so that they can be served from responseCache, or 0 if the response cache doesn't apply to this
+    request. The cache is bypassed when it is disabled (RESPONSE_CACHE_ENABLED), when the 'nocache'
+    argument is true, or when the request's Cache-Control header contains "no-cache".
+
+    Parameters
+    ----------
+    args : dict
+        The dictionary which may contain 'nocache'
+
+    Returns
+    -------
+    bucket_ms
+        milliseconds to round time ranges to, or 0 to not use the cache
+    """
+    if (
+        (responseCache is None)
+        or malcolm_utils.str2bool(str(args.get('nocache', 'false')))
+        or ('no-cache' in request.headers.get('Cache-Control', '').lower())
+    ):
+        return 0
+    return max(app.config["RESPONSE_CACHE_TIME_BUCKET_SEC"], 1) * 1000
+
+
+def response_cache_key(route, **kwargs):
+    """Builds a key for responseCache out of a route name and its normalized query arguments
+
+    Parameters
+    ----------
+    route : string
+        The name of the API route (e.g., "agg")
+    kwargs : dict
+        The arguments determining the query result (index, filters, time range, limit, etc.)
+
+    Returns
+    -------
+    key
+        a string uniquely identifying the query
+    """
+    return hashlib.sha256(json.dumps([route, kwargs], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def response_etag(result):
+    """Returns an entity tag (a hash of its JSON representation) for a result dict stored in responseCache"""
+    return hashlib.sha256(json.dumps(result, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cacheable_response(result, cache_key=None):
+    """Returns a JSON response for a result dict. If cache_key is set, the result is stored in responseCache
+    (unless result is None, in which case the result previously cached for cache_key is used) and the response
+    includes ETag and Cache-Control headers. A request with a matching If-None-Match header gets a 304.
+
+    Parameters
+    ----------
+    result : dict
+        The result to return, or None to return the result cached for cache_key
+    cache_key : string
+        The key (see response_cache_key) for the result in responseCache, or None if it's not cacheable
+
+    Returns
+    -------
+    response
+        The Flask response object, or None if result is None and cache_key is not cached
+    """
+    if not cache_key:
+        return jsonify(result) if result is not None else None
+
+    if result is None:
+        if (cached := responseCache.get(cache_key)) is None:
+            return None
+        result, etag = cached
+        cacheStatus = 'HIT'
+    else:
+        etag = response_etag(result)
+        responseCache.set(cache_key, (result, etag))
+        cacheStatus = 'MISS'
+
+    response = jsonify(result)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = int(responseCache.expires_in(cache_key) or 0)
+    response.headers['X-Malcolm-Cache'] = cacheStatus
+    return response.make_conditional(request)
+
+
+def build_aggfields(fieldnames, args, bucket_ms=0):
+    """Builds the search for a bucket aggregation for a particular field over a given time range
+
+    Parameters
+    ----------
+    fieldnames : string or Array of string
         The name of the field(s) on which to perform the aggregation
-    current_request : Request
-        The flask Request object being processed (see gettimes/filtertime and getfilters/filtervalues)
-        Uses 'from', 'to', 'limit', 'filter', and 'doctype' from current_request arguments
+    args : dict
+        The query arguments (see gettimes/filtertime and getfilters/filtervalues)
+        Uses 'from', 'to', 'limit', 'filter', and 'doctype'
+    bucket_ms : int
+        see filtertime
 
     Returns
     -------
-    values
-        list of dicts containing key and doc_count for each bucket
-    range
-        start_time (seconds since EPOCH) and end_time (seconds since EPOCH) of query
-    filter
-        dict containing the filters, e.g., { "fieldname1": "value", "fieldname2": 1234, "fieldname3": ["abc", "123"] }
-    fields
-        the name of the field(s) on which the aggregation was performed
+    search
+        the Search object for the aggregation
+    query
+        dict containing the normalized 'index', 'doctype', 'fields', 'filters', 'limit' and 'range' of the
+        aggregation (also used as the arguments for its response_cache_key)
     """
-    args = get_request_arguments(current_request)
     idx = index_from_args(args)
     s = SearchClass(
         using=databaseClient,
         index=idx,
     ).extra(size=0)
-    start_time_ms, end_time_ms, s = filtertime(s, args)
+    start_time_ms, end_time_ms, s = filtertime(s, args, bucket_ms=bucket_ms)
     filters, s = filtervalues(s, args)
     bucket_limit = int(malcolm_utils.deep_get(args, ["limit"], app.config["RESULT_SET_LIMIT"]))
+
     last_bucket = s.aggs
 
-    for fname in malcolm_utils.get_iterable(fieldnames):
-        # Get the field mapping type for this field, and map it to a good default "missing"
-        #   (empty bucket) label for the bucket missing= parameter below
-        mapping = databaseClient.indices.get_field_mapping(
-            fields=fname,
-            index=idx,
-        )
-        missing_val = (
-            missing_field_map[
-                next(
-                    iter(
-                        malcolm_utils.dictsearch(
-                            mapping[next(iter(OrderedDict(sorted(mapping.items(), reverse=True))))], 'type'
-                        )
-                    ),
-                    None,
-                )
-            ]
-            if (mapping and isinstance(mapping, dict))
-            else missing_field_map[None]
-        )
+    # Get the field mapping types for these fields (cached), to map them to a good default "missing"
+    #   (empty bucket) label for the bucket missing= parameter below
+    field_types = field_mapping_types(idx, fieldnames)
 
+    for fname in malcolm_utils.get_iterable(fieldnames):
         # chain on the aggregation for the next field
         last_bucket = last_bucket.bucket(
             fname,
             "terms",
             field=fname,
             size=bucket_limit,
-            missing=missing_val,
+            missing=missing_field_map[field_types.get(fname)],
         )
 
-    response = s.execute()
+    return s, {
+        'index': idx,
+        'doctype': doctype_from_args(args),
+        'fields': malcolm_utils.get_iterable(fieldnames),
+        'filters': filters,
+        'limit': bucket_limit,
+        'range': (start_time_ms, end_time_ms),
+    }
+
+
+def format_aggfields(query, aggregations, urls=None):
+    """Formats the result of an aggregation built by build_aggfields
 
-    top_bucket_name = next(iter(malcolm_utils.get_iterable(fieldnames)))
+    Parameters
+    ----------
+    query : dict
+        The query returned by build_aggfields
+    aggregations : dict
+        The 'aggregations' from the search response
+    urls : Array of string
+        Dashboards URLs for the fields (see urls_for_field)
+
+    Returns
+    -------
+    result
+        dict containing the top-level bucket, 'range', 'filter', 'fields' and (optionally) 'urls' (see aggfields)
+    """
+    top_bucket_name = next(iter(query['fields']))
     result_dict = {
-        top_bucket_name: response.aggregations.to_dict().get(top_bucket_name, {}),
-        'range': (start_time_ms // 1000, end_time_ms // 1000),
-        'filter': filters,
-        'fields': malcolm_utils.get_iterable(fieldnames),
+        top_bucket_name: aggregations.get(top_bucket_name, {}),
+        'range': (query['range'][0] // 1000, query['range'][1] // 1000),
+        'filter': query['filters'],
+        'fields': query['fields'],
     }
     if (urls is not None) and (len(urls) > 0):
         result_dict['urls'] = urls
+    return result_dict
+
+
+def aggfields(fieldnames, current_request, urls=None):
+    """Returns a bucket aggregation for a particular field over a given time range
+
+    Parameters
+    ----------
+    fieldname : string or Array of string
+        The name of the field(s) on which to perform the aggregation
+    current_request : Request
+        The flask Request object being processed (see gettimes/filtertime and getfilters/filtervalues)
+        Uses 'from', 'to', 'limit', 'filter', and 'doctype' from current_request arguments
+
+    Returns
+    -------
+    values
+        list of dicts containing key and doc_count for each bucket
+    range
+        start_time (seconds since EPOCH) and end_time (seconds since EPOCH) of query
+    filter
+        dict containing the filters, e.g., { "fieldname1": "value", "fieldname2": 1234, "fieldname3": ["abc", "123"] }
+    fields
+        the name of the field(s) on which the aggregation was performed
+    """
+    args = get_request_arguments(current_request)
+    bucket_ms = response_cache_bucket_ms(args)
+    s, query = build_aggfields(fieldnames, args, bucket_ms=bucket_ms)
 
-    return jsonify(result_dict)
+    cache_key = response_cache_key('agg', **query) if bucket_ms else None
+    if cache_key and (cached := cacheable_response(None, cache_key)):
+        return cached
+
+    response = s.execute()
+
+    return cacheable_response(format_aggfields(query, response.aggregations.to_dict(), urls=urls), cache_key)
 
 
 @app.route(
@@ -665,6 +1274,92 @@ def aggregate(fieldname):
     )
 
 
+@app.route(
+    f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/agg-batch",
+    methods=['POST'],
+)
+def aggregate_batch():
+    """Performs several field aggregations (see aggfields) with a single multi-search request
+
+    Parameters
+    ----------
+    request : Request
+        'aggregations' - either a dict of aggregation specs keyed by name, or a list of them (keyed by
+        their 'name', if specified, otherwise by their comma-separated 'fields'; these keys must be unique).
+        Each spec contains 'fields' (a field name or list of field names) and may contain 'from', 'to',
+        'limit', 'filter', 'doctype' and 'nocache', defaulting to the values of those top-level request
+        arguments.
+
+    Returns
+    -------
+    results
+        dict keyed by spec name, where each value is the aggfields result for the spec (or an 'error')
+        along with its 'timing': 'build_ms' (time spent building the query), 'took_ms' (time reported by
+        the database for the search) and 'cache' (HIT or MISS, if the response cache applies)
+    took_ms
+        the total time spent handling the request
+    """
+    requestStartTime = time.perf_counter()
+    args = get_request_arguments(request)
+    specs = args.get('aggregations', {})
+    if isinstance(specs, list):
+        specList, specs = specs, {}
+        for spec in [x for x in specList if isinstance(x, dict)]:
+            name = str(spec.get('name', ','.join(malcolm_utils.get_iterable(spec.get('fields', [])))))
+            if name in specs:
+                raise ValueError(
+                    f"'aggregations' contains more than one spec named '{name}' (give each a unique 'name')"
+                )
+            specs[name] = spec
+    if (not isinstance(specs, dict)) or (len(specs) == 0):
+        raise ValueError("'aggregations' must contain one or more aggregation specs")
+    if len(specs) > app.config["AGG_BATCH_MAX_SPECS"]:
+        raise ValueError(f"'aggregations' may contain at most {app.config['AGG_BATCH_MAX_SPECS']} specs")
+    defaults = {k: v for k, v in args.items() if k in ('from', 'to', 'limit', 'filter', 'doctype', 'nocache')}
+
+    results = {}
+    pending = []
+    msearch = None
+    for name, spec in specs.items():
+        specStartTime = time.perf_counter()
+        try:
+            fields = spec.get('fields', spec.get('fieldname', 'event.provider'))
+            fields = fields.split(',') if isinstance(fields, str) else list(fields)
+            specArgs = {**defaults, **{k: v for k, v in spec.items() if k not in ('name', 'fields', 'fieldname')}}
+            bucket_ms = response_cache_bucket_ms(specArgs)
+            s, query = build_aggfields(fields, specArgs, bucket_ms=bucket_ms)
+            cache_key = response_cache_key('agg', **query) if bucket_ms else None
+            if cache_key and ((cached := responseCache.get(cache_key)) is not None):
+                results[name] = dict(cached[0])
+                results[name]['timing'] = {'cache': 'HIT'}
+            else:
+                start_time, end_time = gettimes(specArgs)
+                urls = urls_for_field(fields, start_time=start_time, end_time=end_time)
+                msearch = (msearch or MultiSearchClass(using=databaseClient)).add(s)
+                pending.append((name, query, urls, cache_key))
+                results[name] = {'timing': {'cache': 'MISS'} if cache_key else {}}
+        except Exception as e:
+            results[name] = {'error': f"{type(e).__name__}: {str(e)}", 'timing': {}}
+        results[name]['timing']['build_ms'] = round((time.perf_counter() - specStartTime) * 1000, 2)
+
+    if msearch is not None:
+        for (name, query, urls, cache_key), response in zip(pending, msearch.execute(raise_on_error=False)):
+            timing = results[name]['timing']
+            if response is None:
+                results[name] = {'error': 'search failed', 'timing': timing}
+            else:
+                timing['took_ms'] = response.took
+                result = format_aggfields(query, response.aggregations.to_dict(), urls=urls)
+                if cache_key:
+                    responseCache.set(cache_key, (result, response_etag(result)))
+                results[name] = dict(result, timing=timing)
+
+    return jsonify(
+        results=results,
+        took_ms=round((time.perf_counter() - requestStartTime) * 1000, 2),
+    )
+
+
 @app.route(
     f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/document",
     methods=['GET', 'POST'],
@@ -685,16 +1380,217 @@ def document():
         array of the documents retrieved (up to 'limit')
     """
     args = get_request_arguments(request)
+    idx = index_from_args(args)
+    limit = int(malcolm_utils.deep_get(args, ["limit"], app.config["RESULT_SET_LIMIT"]))
     s = SearchClass(
         using=databaseClient,
-        index=index_from_args(args),
-    ).extra(size=int(malcolm_utils.deep_get(args, ["limit"], app.config["RESULT_SET_LIMIT"])))
-    start_time_ms, end_time_ms, s = filtertime(s, args, default_from="1970-1-1", default_to="now")
+        index=idx,
+    ).extra(size=limit)
+    bucket_ms = response_cache_bucket_ms(args)
+    start_time_ms, end_time_ms, s = filtertime(
+        s, args, default_from="1970-01-01", default_to="now", bucket_ms=bucket_ms
+    )
     filters, s = filtervalues(s, args)
-    return jsonify(
-        results=s.execute().to_dict().get('hits', {}).get('hits', []),
-        range=(start_time_ms // 1000, end_time_ms // 1000),
-        filter=filters,
+
+    cache_key = (
+        response_cache_key(
+            'document',
+            index=idx,
+            doctype=doctype_from_args(args),
+            filters=filters,
+            limit=limit,
+            range=(start_time_ms, end_time_ms),
+        )
+        if bucket_ms
+        else None
+    )
+    if cache_key and (cached := cacheable_response(None, cache_key)):
+        return cached
+
+    return cacheable_response(
+        {
+            'results': s.execute().to_dict().get('hits', {}).get('hits', []),
+            'range': (start_time_ms // 1000, end_time_ms // 1000),
+            'filter': filters,
+        },
+        cache_key,
+    )
+
+
+def open_point_in_time(index):
+    """Opens a point in time (PIT) for paginating through an index with search_after
+
+    Parameters
+    ----------
+    index : string
+        The index pattern to search
+
+    Returns
+    -------
+    pit_id
+        the ID of the point in time
+    """
+    if databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote:
+        return databaseClient.open_point_in_time(index=index, keep_alive=app.config["EXPORT_PIT_KEEP_ALIVE"])['id']
+    else:
+        return databaseClient.create_pit(index=index, keep_alive=app.config["EXPORT_PIT_KEEP_ALIVE"])['pit_id']
+
+
+def close_point_in_time(pitId):
+    """Closes a point in time opened with open_point_in_time, ignoring any errors"""
+    try:
+        if databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote:
+            databaseClient.close_point_in_time(body={'id': pitId})
+        else:
+            databaseClient.delete_pit(body={'pit_id': [pitId]})
+    except Exception as e:
+        if debugApi:
+            print(f"{type(e).__name__}: {str(e)} closing point in time")
+
+
+def export_hits(index, timefield, query, limit=0):
+    """Generates every document matching a query, one page at a time, so that memory use doesn't depend
+    on the size of the result set. Pages are retrieved with search_after over a point in time sorted by
+    the time field (and _shard_doc, or _id if the cluster doesn't support it); if a point in time can't
+    be used the documents are scrolled instead (unsorted).
+
+    Parameters
+    ----------
+    index : string
+        The index pattern to search
+    timefield : string
+        The field by which to sort the documents
+    query : dict
+        The query (e.g., from the filtertime/filtervalues search's to_dict())
+    limit : int
+        The maximum number of documents to generate (0 for no limit)
+
+    Returns
+    -------
+    hits
+        an iterator of search hits (dicts containing _index, _id, _source, etc.)
+    """
+    pageSize = app.config["EXPORT_PAGE_SIZE"]
+    if limit > 0:
+        pageSize = min(pageSize, limit)
+    count = 0
+    pitId = None
+    tiebreakers = list(EXPORT_SORT_TIEBREAKERS)
+    try:
+        pitId = open_point_in_time(index)
+        searchAfter = None
+        while True:
+            body = {
+                'size': pageSize if (limit <= 0) else min(pageSize, limit - count),
+                'query': query,
+                'pit': {'id': pitId, 'keep_alive': app.config["EXPORT_PIT_KEEP_ALIVE"]},
+                'sort': [
+                    {timefield: {'order': 'asc', 'unmapped_type': 'date'}},
+                    {tiebreakers[0]: 'asc'},
+                ],
+                'track_total_hits': False,
+            }
+            if searchAfter is not None:
+                body['search_after'] = searchAfter
+            try:
+                response = databaseClient.search(body=body)
+            except Exception as e:
+                if count > 0:
+                    raise
+                if len(tiebreakers) > 1:
+                    # no documents have gone out yet, so try the next tiebreaker
+                    if debugApi:
+                        print(f"{type(e).__name__}: {str(e)} exporting sorted by {tiebreakers[0]}")
+                    tiebreakers.pop(0)
+                    continue
+                # or fall back to scrolling
+                break
+            pitId = response.get('pit_id', pitId)
+            hits = malcolm_utils.deep_get(response, ['hits', 'hits'], [])
+            for hit in hits:
+                searchAfter = hit.pop('sort', None)
+                yield hit
+            count += len(hits)
+            if (len(hits) < body['size']) or ((limit > 0) and (count >= limit)):
+                return
+    except Exception as e:
+        if count > 0:
+            raise
+        if debugApi:
+            print(f"{type(e).__name__}: {str(e)} exporting with point in time")
+    finally:
+        if pitId:
+            close_point_in_time(pitId)
+
+    for hit in DatabaseImport.helpers.scan(
+        databaseClient,
+        index=index,
+        query={'query': query},
+        size=pageSize,
+    ):
+        yield hit
+        count += 1
+        if (limit > 0) and (count >= limit):
+            return
+
+
+@app.route(
+    f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/export",
+    methods=['GET', 'POST'],
+)
+def export():
+    """Streams all of the matching documents from the specified index as newline-delimited JSON (NDJSON),
+    optionally gzip-compressed. Unlike document, the number of documents returned is not capped at
+    RESULT_SET_LIMIT and the results are never held in memory all at once (see export_hits).
+
+    Parameters
+    ----------
+    request : Request
+        Uses 'from', 'to', 'filter', and 'doctype' from request arguments (see document), as well as
+        'limit' (maximum number of documents; default is all of them) and 'gzip' (true or false)
+
+    Returns
+    -------
+    documents
+        one JSON object per line, each containing a document's _index, _id and _source
+    """
+    args = get_request_arguments(request)
+    idx = index_from_args(args)
+    limit = int(malcolm_utils.deep_get(args, ["limit"], 0))
+    compress = malcolm_utils.str2bool(str(args.get('gzip', 'false')))
+    s = SearchClass(
+        using=databaseClient,
+        index=idx,
+    )
+    start_time_ms, end_time_ms, s = filtertime(s, args, default_from="1970-01-01", default_to="now")
+    filters, s = filtervalues(s, args)
+    query = s.to_dict().get('query', {'match_all': {}})
+    hits = export_hits(idx, timefield_from_args(args), query, limit=limit)
+
+    def generate():
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        chunk = []
+        for hit in hits:
+            chunk.append(json.dumps(hit))
+            if len(chunk) >= app.config["EXPORT_PAGE_SIZE"]:
+                data = ('\n'.join(chunk) + '\n').encode()
+                chunk = []
+                if compressor:
+                    if data := compressor.compress(data):
+                        yield data
+                else:
+                    yield data
+        data = ('\n'.join(chunk) + '\n').encode() if chunk else b''
+        yield (compressor.compress(data) + compressor.flush()) if compressor else data
+
+    exportFileName = f"malcolm_export_{start_time_ms // 1000}_{end_time_ms // 1000}.ndjson{'.gz' if compress else ''}"
+    return Response(
+        generate(),
+        mimetype='application/gzip' if compress else 'application/x-ndjson',
+        headers={
+            'Content-Disposition': f'attachment; filename="{exportFileName}"',
+            'X-Accel-Buffering': 'no',
+        },
     )
 
 
@@ -721,11 +1617,15 @@ def indices():
         their respective index pattern names
     """
     result = {}
-    result["indices"] = requests.get(
-        f'{opensearchUrl}/_cat/indices?format=json',
-        auth=opensearchReqHttpAuth,
-        verify=opensearchSslVerify,
-    ).json()
+    result["indices"] = (
+        http_session()
+        .get(
+            f'{opensearchUrl}/_cat/indices?format=json',
+            auth=opensearchReqHttpAuth,
+            verify=opensearchSslVerify,
+        )
+        .json()
+    )
     result["malcolm_network_index_pattern"] = app.config["MALCOLM_NETWORK_INDEX_PATTERN"]
     result["malcolm_other_index_pattern"] = app.config["MALCOLM_OTHER_INDEX_PATTERN"]
     result["arkime_network_index_pattern"] = app.config["ARKIME_NETWORK_INDEX_PATTERN"]
@@ -733,37 +1633,87 @@ def indices():
     return jsonify(result)
 
 
-@app.route(
-    f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/fields",
-    methods=['GET', 'POST'],
-)
-def fields():
-    """Provide a list of fields Malcolm "knows about" merged from Arkime's field table, Malcolm's
-    OpenSearch template for the sessions indices, and Kibana's field list
+def get_index_template(templateName):
+    """Retrieves an OpenSearch index template and each of the component templates it is composed of
 
     Parameters
     ----------
-    request : Request
-        template - template name (default is app.config["MALCOLM_TEMPLATE"])
-        doctype - network|host
+    templateName : string
+        the name of the index template
+
     Returns
     -------
-    fields
-        A dict of dicts where key is the field name and value may contain 'description' and 'type'
+    template
+        the JSON response for the index template
+    components
+        a dict where the key is the component template name and the value is its JSON response
     """
-    args = get_request_arguments(request)
+    template = (
+        http_session()
+        .get(
+            f'{opensearchUrl}/_index_template/{templateName}',
+            auth=opensearchReqHttpAuth,
+            verify=opensearchSslVerify,
+        )
+        .json()
+    )
+    components = {}
+    for indexTemplate in malcolm_utils.get_iterable(malcolm_utils.deep_get(template, ["index_templates"], [])):
+        for componentName in malcolm_utils.get_iterable(
+            malcolm_utils.deep_get(indexTemplate, ["index_template", "composed_of"])
+        ):
+            if componentName not in components:
+                components[componentName] = (
+                    http_session()
+                    .get(
+                        f'{opensearchUrl}/_component_template/{componentName}',
+                        auth=opensearchReqHttpAuth,
+                        verify=opensearchSslVerify,
+                    )
+                    .json()
+                )
+    return template, components
 
-    templateName = malcolm_utils.deep_get(args, ["template"], app.config["MALCOLM_TEMPLATE"])
-    arkimeFields = (templateName == app.config["MALCOLM_TEMPLATE"]) and (doctype_from_args(args) == 'network')
 
+def index_template_fingerprint(template, components):
+    """Returns a hash of an index template and its component templates (see get_index_template) which
+    changes whenever any of them (or their versions) change
+    """
+    return hashlib.sha256(json.dumps([template, components], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def build_field_catalog(templateName, index, arkimeFields):
+    """Builds the list of fields Malcolm "knows about" merged from Arkime's field table, Malcolm's
+    OpenSearch template for the sessions indices, and Kibana's field list (see fields)
+
+    Parameters
+    ----------
+    templateName : string
+        the name of the OpenSearch index template
+    index : string
+        the index pattern the fields belong to
+    arkimeFields : bool
+        whether or not to include fields from Arkime's field table
+
+    Returns
+    -------
+    fields
+        A dict of dicts where key is the field name and value may contain 'description' and 'type'
+    fingerprint
+        the index_template_fingerprint of the template the fields came from (None if it couldn't be retrieved)
+    complete
+        False if any of the field sources couldn't be queried
+    """
     fields = defaultdict(dict)
+    fingerprint = None
+    complete = True
 
     if arkimeFields:
         try:
             # get fields from Arkime's fields table
             s = SearchClass(
                 using=databaseClient,
-                index=index_from_args(args),
+                index=index,
             ).extra(size=6000)
             for hit in [x['_source'] for x in s.execute().to_dict().get('hits', {}).get('hits', [])]:
                 if (fieldname := malcolm_utils.deep_get(hit, ['dbField2'])) and (fieldname not in fields):
@@ -776,16 +1726,14 @@ def fields():
                     if debugApi:
                         fields[fieldname]['original'] = [hit]
         except Exception as e:
+            complete = False
             if debugApi:
                 print(f"{type(e).__name__}: {str(e)} getting Arkime fields")
 
     # get fields from OpenSearch template (and descendant components)
     try:
-        getTemplateResponseJson = requests.get(
-            f'{opensearchUrl}/_index_template/{templateName}',
-            auth=opensearchReqHttpAuth,
-            verify=opensearchSslVerify,
-        ).json()
+        getTemplateResponseJson, getComponentResponseJsons = get_index_template(templateName)
+        fingerprint = index_template_fingerprint(getTemplateResponseJson, getComponentResponseJsons)
 
         for template in malcolm_utils.deep_get(getTemplateResponseJson, ["index_templates"]):
             # top-level fields
@@ -805,13 +1753,8 @@ def fields():
             for componentName in malcolm_utils.get_iterable(
                 malcolm_utils.deep_get(template, ["index_template", "composed_of"])
             ):
-                getComponentResponseJson = requests.get(
-                    f'{opensearchUrl}/_component_template/{componentName}',
-                    auth=opensearchReqHttpAuth,
-                    verify=opensearchSslVerify,
-                ).json()
                 for component in malcolm_utils.get_iterable(
-                    malcolm_utils.deep_get(getComponentResponseJson, ["component_templates"])
+                    malcolm_utils.deep_get(getComponentResponseJsons.get(componentName), ["component_templates"])
                 ):
                     for fieldname, fieldinfo in malcolm_utils.deep_get(
                         component,
@@ -826,16 +1769,18 @@ def fields():
                             fields[fieldname]['original'] = fields[fieldname].get('original', []) + [fieldinfo]
 
     except Exception as e:
+        complete = False
         if debugApi:
             print(f"{type(e).__name__}: {str(e)} getting OpenSearch index template fields")
 
     # get fields from OpenSearch dashboards
     try:
         for field in (
-            requests.get(
+            http_session()
+            .get(
                 f"{dashboardsUrl}/api/index_patterns/_fields_for_wildcard",
                 params={
-                    'pattern': index_from_args(args),
+                    'pattern': index,
                     'meta_fields': ["_source", "_id", "_type", "_index", "_score"],
                 },
                 auth=opensearchReqHttpAuth,
@@ -854,13 +1799,186 @@ def fields():
                 if debugApi:
                     fields[fieldname]['original'] = fields[fieldname].get('original', []) + [field]
     except Exception as e:
+        complete = False
         if debugApi:
             print(f"{type(e).__name__}: {str(e)} getting OpenSearch Dashboards index pattern fields")
 
     for fieldname in ("@version", "_source", "_id", "_type", "_index", "_score", "type"):
         fields.pop(fieldname, None)
 
-    return jsonify(fields=fields, total=len(fields))
+    return dict(fields), fingerprint, complete
+
+
+class FieldCatalog:
+    """Serves the merged field lists from build_field_catalog out of memory. Each (template, index,
+    arkimeFields) combination is built once, then rebuilt by a background thread when its index template
+    changes, when it is older than FIELD_CATALOG_MAX_AGE_SEC, or when a source was unavailable when it
+    was built. Combinations that haven't been requested within FIELD_CATALOG_MAX_AGE_SEC are dropped rather
+    than rebuilt, and only the FIELD_CATALOG_MAX_ENTRIES most recently requested are kept. The catalog is
+    saved to FIELD_CATALOG_SNAPSHOT_FILE (if set) and reloaded from it on startup.
+    """
+
+    def __init__(self, snapshotFile=None, refreshSec=60, maxAgeSec=3600, maxEntries=64):
+        self.snapshotFile = snapshotFile
+        self.refreshSec = refreshSec
+        self.maxAgeSec = maxAgeSec
+        self.maxEntries = max(maxEntries, 1)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.buildLock = threading.Lock()
+        self.refresher = None
+        self.load()
+
+    def get(self, templateName, index, arkimeFields, rebuild=False):
+        """Returns the catalog entry (a dict containing 'fields', 'total', 'etag', etc.) for the
+        combination, building it first if it isn't in memory or if rebuild is True
+        """
+        key = (templateName, index, arkimeFields)
+        self.start()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry['requested'] = time.time()
+                self.entries.move_to_end(key)
+        if rebuild or (entry is None):
+            with self.buildLock:
+                with self.lock:
+                    entry = self.entries.get(key)
+                if rebuild or (entry is None):
+                    entry = self.build(key)
+        return entry
+
+    def build(self, key):
+        fields, fingerprint, complete = build_field_catalog(*key)
+        entry = {
+            'fields': fields,
+            'total': len(fields),
+            'etag': hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest(),
+            'fingerprint': fingerprint,
+            'complete': complete,
+            'built': time.time(),
+        }
+        with self.lock:
+            # keep track of when it was last asked for (a rebuild isn't a request)
+            entry['requested'] = self.entries.get(key, {}).get('requested', entry['built'])
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxEntries:
+                self.entries.popitem(last=False)
+        self.save()
+        return entry
+
+    def refresh(self):
+        with self.lock:
+            # forget the combinations nobody has asked for lately rather than keep rebuilding them
+            expired = [
+                key
+                for key, entry in self.entries.items()
+                if time.time() - entry.get('requested', entry['built']) > self.maxAgeSec
+            ]
+            for key in expired:
+                del self.entries[key]
+            entries = list(self.entries.items())
+        if expired:
+            self.save()
+        for key, entry in entries:
+            try:
+                fingerprint = index_template_fingerprint(*get_index_template(key[0]))
+                if fingerprint != entry['fingerprint']:
+                    # mapping types may have changed along with the template
+                    invalidate_field_mapping_cache(key[1])
+                if (
+                    (fingerprint != entry['fingerprint'])
+                    or (not entry['complete'])
+                    or (time.time() - entry['built'] > self.maxAgeSec)
+                ):
+                    with self.buildLock:
+                        self.build(key)
+            except Exception as e:
+                if debugApi:
+                    print(f"{type(e).__name__}: {str(e)} refreshing field catalog for {key}")
+
+    def start(self):
+        if (self.refresher is None) and (self.refreshSec > 0):
+            with self.lock:
+                if self.refresher is None:
+                    self.refresher = threading.Thread(target=self.refresh_loop, name='field-catalog', daemon=True)
+                    self.refresher.start()
+
+    def refresh_loop(self):
+        while True:
+            time.sleep(self.refreshSec)
+            self.refresh()
+
+    def load(self):
+        if self.snapshotFile and os.path.isfile(self.snapshotFile):
+            try:
+                with open(self.snapshotFile, 'r') as f:
+                    snapshot = json.load(f)
+                with self.lock:
+                    for item in snapshot[-self.maxEntries :]:
+                        self.entries[tuple(item['key'])] = item['entry']
+            except Exception as e:
+                if debugApi:
+                    print(f"{type(e).__name__}: {str(e)} loading field catalog from {self.snapshotFile}")
+
+    def save(self):
+        if self.snapshotFile:
+            try:
+                with self.lock:
+                    snapshot = [{'key': list(key), 'entry': entry} for key, entry in self.entries.items()]
+                tmpFileName = f'{self.snapshotFile}.{os.getpid()}.tmp'
+                with open(tmpFileName, 'w') as f:
+                    json.dump(snapshot, f)
+                os.replace(tmpFileName, self.snapshotFile)
+            except Exception as e:
+                if debugApi:
+                    print(f"{type(e).__name__}: {str(e)} saving field catalog to {self.snapshotFile}")
+
+
+fieldCatalog = FieldCatalog(
+    snapshotFile=app.config["FIELD_CATALOG_SNAPSHOT_FILE"],
+    refreshSec=app.config["FIELD_CATALOG_REFRESH_SEC"],
+    maxAgeSec=app.config["FIELD_CATALOG_MAX_AGE_SEC"],
+    maxEntries=app.config["FIELD_CATALOG_MAX_ENTRIES"],
+)
+
+
+@app.route(
+    f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/fields",
+    methods=['GET', 'POST'],
+)
+def fields():
+    """Provide a list of fields Malcolm "knows about" merged from Arkime's field table, Malcolm's
+    OpenSearch template for the sessions indices, and Kibana's field list (see build_field_catalog
+    and FieldCatalog)
+
+    Parameters
+    ----------
+    request : Request
+        template - template name (default is app.config["MALCOLM_TEMPLATE"])
+        doctype - network|host
+        nocache - if true, rebuild the field list rather than returning it from memory
+    Returns
+    -------
+    fields
+        A dict of dicts where key is the field name and value may contain 'description' and 'type'
+    """
+    args = get_request_arguments(request)
+
+    templateName = malcolm_utils.deep_get(args, ["template"], app.config["MALCOLM_TEMPLATE"])
+    arkimeFields = (templateName == app.config["MALCOLM_TEMPLATE"]) and (doctype_from_args(args) == 'network')
+
+    entry = fieldCatalog.get(
+        templateName,
+        index_from_args(args),
+        arkimeFields,
+        rebuild=malcolm_utils.str2bool(str(args.get('nocache', 'false'))),
+    )
+
+    response = jsonify(fields=entry['fields'], total=entry['total'])
+    response.set_etag(entry['etag'])
+    return response.make_conditional(request)
 
 
 @app.route(f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/", methods=['GET'])
@@ -890,11 +2008,15 @@ def version():
     opensearch_health
         a JSON structure containing OpenSearch cluster health
     """
-    opensearchStats = requests.get(
-        opensearchUrl,
-        auth=opensearchReqHttpAuth,
-        verify=opensearchSslVerify,
-    ).json()
+    opensearchStats = (
+        http_session()
+        .get(
+            opensearchUrl,
+            auth=opensearchReqHttpAuth,
+            verify=opensearchSslVerify,
+        )
+        .json()
+    )
     if isinstance(opensearchStats, dict):
         opensearchStats['health'] = dict(databaseClient.cluster.health())
 
@@ -909,6 +2031,187 @@ def version():
     )
 
 
+def probe_http_ok(url, **kwargs):
+    """Returns True if an HTTP GET of url succeeds, otherwise raises an exception (see ready)"""
+    response = http_session(retry=False).get(url, **kwargs)
+    response.raise_for_status()
+    return True
+
+
+def database_health(timeout=None):
+    """Returns the OpenSearch (or Elasticsearch) cluster health as a dict
+
+    Parameters
+    ----------
+    timeout : float
+        The request timeout in seconds (None for the client default)
+
+    Returns
+    -------
+    health
+        the cluster health
+    """
+    if timeout is None:
+        return dict(databaseClient.cluster.health())
+    elif databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote:
+        return dict(databaseClient.options(request_timeout=timeout).cluster.health())
+    else:
+        return dict(databaseClient.cluster.health(request_timeout=timeout))
+
+
+def run_ready_probes():
+    """Concurrently checks the status of the Malcolm components reported by ready. Each probe is limited to
+    READY_PROBE_TIMEOUT_SEC seconds, and a probe that fails or doesn't finish in time reports its component
+    as not ready.
+
+    Parameters
+    ----------
+
+    Returns
+    -------
+    result
+        a dict of component name to ready status, plus 'latency' (see ready)
+    """
+    timeout = app.config["READY_PROBE_TIMEOUT_SEC"]
+
+    # name: (probe function, value on failure, error message context)
+    probes = {
+        'arkime': (
+            lambda: probe_http_ok(arkimeStatusUrl, verify=False, timeout=timeout),
+            False,
+            'getting Arkime status',
+        ),
+        'dashboards': (
+            lambda: http_session(retry=False)
+            .get(
+                f'{dashboardsUrl}/api/status',
+                auth=opensearchReqHttpAuth,
+                verify=opensearchSslVerify,
+                timeout=timeout,
+            )
+            .json(),
+            {},
+            'getting Dashboards status',
+        ),
+        'dashboards_maps': (
+            lambda: malcolm_utils.check_socket(dashboardsHelperHost, dashboardsMapsPort, timeout=timeout),
+            False,
+            'getting Logstash offline map server',
+        ),
+        'filebeat_tcp': (
+            lambda: malcolm_utils.check_socket(filebeatHost, filebeatTcpJsonPort, timeout=timeout),
+            False,
+            'getting filebeat TCP JSON listener status',
+        ),
+        'freq': (
+            lambda: probe_http_ok(freqUrl, timeout=timeout),
+            False,
+            'getting freq status',
+        ),
+        'logstash_pipelines': (
+            lambda: http_session(retry=False).get(f'{logstashUrl}/_health_report', timeout=timeout).json(),
+            {},
+            'getting Logstash node status',
+        ),
+        'logstash_lumberjack': (
+            lambda: malcolm_utils.check_socket(logstashHost, logstashLJPort, timeout=timeout),
+            False,
+            'getting Logstash lumberjack listener status',
+        ),
+        'netbox': (
+            lambda: http_session(retry=False)
+            .get(
+                f'{netboxUrl}/api/status/?format=json',
+                headers={"Authorization": f"Token {netboxToken}"} if netboxToken else None,
+                verify=False,
+                timeout=timeout,
+            )
+            .json(),
+            {},
+            'getting NetBox status',
+        ),
+        'opensearch': (
+            lambda: database_health(timeout=timeout),
+            {},
+            'getting OpenSearch health',
+        ),
+        'pcap_monitor': (
+            lambda: malcolm_utils.check_socket(pcapMonitorHost, pcapTopicPort, timeout=timeout),
+            False,
+            'getting PCAP monitor topic status',
+        ),
+        'zeek_extracted_file_logger': (
+            lambda: malcolm_utils.check_socket(
+                zeekExtractedFileLoggerHost, zeekExtractedFileLoggerTopicPort, timeout=timeout
+            ),
+            False,
+            'getting Zeek extracted file logger topic status',
+        ),
+        'zeek_extracted_file_monitor': (
+            lambda: malcolm_utils.check_socket(
+                zeekExtractedFileMonitorHost, zeekExtractedFileTopicPort, timeout=timeout
+            ),
+            False,
+            'getting Zeek extracted file monitor topic status',
+        ),
+    }
+
+    def timed_probe(probe, default, context):
+        startTime = time.perf_counter()
+        try:
+            value = probe()
+        except Exception as e:
+            value = default
+            if debugApi:
+                print(f"{type(e).__name__}: {str(e)} {context}")
+        return value, round((time.perf_counter() - startTime) * 1000, 3)
+
+    futures = {name: readyProbeExecutor.submit(timed_probe, *probe) for name, probe in probes.items()}
+
+    # wait for the probes to finish, giving up on any still running a little after their timeout
+    statuses = {}
+    latency = {}
+    deadline = time.monotonic() + timeout + 1
+    for name, future in futures.items():
+        try:
+            statuses[name], latency[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FuturesTimeoutError:
+            statuses[name], latency[name] = probes[name][1], None
+            if debugApi:
+                print(f"TimeoutError: {probes[name][2]}")
+
+    return {
+        'arkime': statuses['arkime'],
+        'dashboards': (
+            malcolm_utils.deep_get(
+                statuses['dashboards'],
+                [
+                    "status",
+                    "overall",
+                    "level" if databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote else "state",
+                ],
+                "red",
+            )
+            != "red"
+        ),
+        'dashboards_maps': statuses['dashboards_maps'],
+        'filebeat_tcp': statuses['filebeat_tcp'],
+        'freq': statuses['freq'],
+        'logstash_lumberjack': statuses['logstash_lumberjack'],
+        'logstash_pipelines': (malcolm_utils.deep_get(statuses['logstash_pipelines'], ["status"], "red") != "red")
+        and (
+            malcolm_utils.deep_get(statuses['logstash_pipelines'], ["indicators", "pipelines", "status"], "red")
+            != "red"
+        ),
+        'netbox': bool(isinstance(statuses['netbox'], dict) and statuses['netbox'].get('netbox-version')),
+        'opensearch': (malcolm_utils.deep_get(statuses['opensearch'], ["status"], 'red') != "red"),
+        'pcap_monitor': statuses['pcap_monitor'],
+        'zeek_extracted_file_logger': statuses['zeek_extracted_file_logger'],
+        'zeek_extracted_file_monitor': statuses['zeek_extracted_file_monitor'],
+        'latency': latency,
+    }
+
+
 @app.route(
     f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/ready", methods=['GET']
 )
@@ -944,136 +2247,141 @@ def ready():
         true or false, the ready status of the Zeek extracted file results logging process
     zeek_extracted_file_monitor
         true or false, the ready status of the Zeek extracted file monitoring process
+    latency
+        a dict of the time (in milliseconds) each component's probe took, or null if it timed out
     """
-    try:
-        arkimeResponse = requests.get(
-            arkimeStatusUrl,
-            verify=False,
-        )
-        arkimeResponse.raise_for_status()
-        arkimeStatus = True
-    except Exception as e:
-        arkimeStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting Arkime status")
+    with readySnapshotLock:
+        # concurrent polls within READY_CACHE_TTL_SEC of each other share a single probe cycle
+        if (readySnapshot['result'] is None) or (
+            time.monotonic() - readySnapshot['time'] > app.config["READY_CACHE_TTL_SEC"]
+        ):
+            readySnapshot['result'] = run_ready_probes()
+            readySnapshot['time'] = time.monotonic()
+        result = readySnapshot['result']
 
-    try:
-        dashboardsStatus = requests.get(
-            f'{dashboardsUrl}/api/status',
-            auth=opensearchReqHttpAuth,
-            verify=opensearchSslVerify,
-        ).json()
-    except Exception as e:
-        dashboardsStatus = {}
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting Dashboards status")
+    return jsonify(result)
 
-    try:
-        dashboardsMapsStatus = malcolm_utils.check_socket(dashboardsHelperHost, dashboardsMapsPort)
-    except Exception as e:
-        dashboardsMapsStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting Logstash offline map server")
 
-    try:
-        filebeatTcpJsonStatus = malcolm_utils.check_socket(filebeatHost, filebeatTcpJsonPort)
-    except Exception as e:
-        filebeatTcpJsonStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting filebeat TCP JSON listener status")
+# replace references to index pattern names with the _REPLACER strings, which will allow other Malcolm
+#   instances that use different index pattern names to import them and substitute their own names
+dashboardReplacements = {
+    app.config['MALCOLM_NETWORK_INDEX_PATTERN']: 'MALCOLM_NETWORK_INDEX_PATTERN_REPLACER',
+    app.config['MALCOLM_NETWORK_INDEX_TIME_FIELD']: 'MALCOLM_NETWORK_INDEX_TIME_FIELD_REPLACER',
+    app.config['MALCOLM_OTHER_INDEX_PATTERN']: 'MALCOLM_OTHER_INDEX_PATTERN_REPLACER',
+}
+dashboardReplacerPattern = re.compile('|'.join(re.escape(key) for key in dashboardReplacements))
+
+# exported dashboards keyed by (dashboard ID, replace) along with a hash of the content they were exported from
+dashboardExportCache = (
+    malcolm_utils.ExpiringLRUCache(maxsize=app.config["DASHBOARD_EXPORT_CACHE_SIZE"])
+    if app.config["DASHBOARD_EXPORT_CACHE_SIZE"] > 0
+    else None
+)
 
-    try:
-        freqResponse = requests.get(freqUrl)
-        freqResponse.raise_for_status()
-        freqStatus = True
-    except Exception as e:
-        freqStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting freq status")
 
-    try:
-        logstashHealth = requests.get(f'{logstashUrl}/_health_report').json()
-    except Exception as e:
-        logstashHealth = {}
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting Logstash node status")
+class ZipStreamBuffer:
+    """A write-only file object collecting the output of a zipfile.ZipFile so it can be streamed as it's written.
+    As it isn't seekable, ZipFile writes the sizes of each member after its data rather than seeking back.
+    """
 
-    try:
-        logstashLJStatus = malcolm_utils.check_socket(logstashHost, logstashLJPort)
-    except Exception as e:
-        logstashLJStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting Logstash lumberjack listener status")
+    def __init__(self):
+        self.chunks = []
 
-    try:
-        netboxStatus = requests.get(
-            f'{netboxUrl}/api/status/?format=json',
-            headers={"Authorization": f"Token {netboxToken}"} if netboxToken else None,
-            verify=False,
-        ).json()
-    except Exception as e:
-        netboxStatus = {}
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting NetBox status")
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
 
-    try:
-        openSearchHealth = dict(databaseClient.cluster.health())
-    except Exception as e:
-        openSearchHealth = {}
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting OpenSearch health")
+    def flush(self):
+        pass
 
-    try:
-        pcapMonitorStatus = malcolm_utils.check_socket(pcapMonitorHost, pcapTopicPort)
-    except Exception as e:
-        pcapMonitorStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting PCAP monitor topic status")
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
 
-    try:
-        zeekExtractedFileMonitorStatus = malcolm_utils.check_socket(
-            zeekExtractedFileMonitorHost, zeekExtractedFileTopicPort
-        )
-    except Exception as e:
-        zeekExtractedFileMonitorStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting Zeek extracted file monitor topic status")
 
-    try:
-        zeekExtractedFileLoggerStatus = malcolm_utils.check_socket(
-            zeekExtractedFileLoggerHost, zeekExtractedFileLoggerTopicPort
-        )
-    except Exception as e:
-        zeekExtractedFileLoggerStatus = False
-        if debugApi:
-            print(f"{type(e).__name__}: {str(e)} getting Zeek extracted file logger topic status")
+def export_dashboard(dashid, doReplacers=True):
+    """Uses the opensearch dashboards API to export a dashboard, then performs the _REPLACER substitutions
+    (see dashboard_export) and removes the index pattern definitions. The processed dashboard is cached
+    along with a hash of the exported content, so if the dashboard hasn't changed since the last export
+    it isn't processed again.
 
-    return jsonify(
-        arkime=arkimeStatus,
-        dashboards=(
-            malcolm_utils.deep_get(
-                dashboardsStatus,
-                [
-                    "status",
-                    "overall",
-                    "level" if databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote else "state",
-                ],
-                "red",
-            )
-            != "red"
-        ),
-        dashboards_maps=dashboardsMapsStatus,
-        filebeat_tcp=filebeatTcpJsonStatus,
-        freq=freqStatus,
-        logstash_lumberjack=logstashLJStatus,
-        logstash_pipelines=(malcolm_utils.deep_get(logstashHealth, ["status"], "red") != "red")
-        and (malcolm_utils.deep_get(logstashHealth, ["indicators", "pipelines", "status"], "red") != "red"),
-        netbox=bool(isinstance(netboxStatus, dict) and netboxStatus.get('netbox-version')),
-        opensearch=(malcolm_utils.deep_get(openSearchHealth, ["status"], 'red') != "red"),
-        pcap_monitor=pcapMonitorStatus,
-        zeek_extracted_file_logger=zeekExtractedFileLoggerStatus,
-        zeek_extracted_file_monitor=zeekExtractedFileMonitorStatus,
+    Parameters
+    ----------
+    dashid : string
+        the ID of the dashboard to export
+    doReplacers : bool
+        whether or not to do the _REPLACER substitutions
+
+    Returns
+    -------
+    dashboard
+        The exported dashboard (a dict)
+    contentHash
+        The SHA-256 hash of the dashboard as exported from the dashboards API
+    """
+    # call the API to get the dashboard JSON
+    response = http_session().get(
+        f"{dashboardsUrl}/api/{'kibana' if (databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote) else 'opensearch-dashboards'}/dashboards/export",
+        params={
+            'dashboard': dashid,
+        },
+        auth=opensearchReqHttpAuth,
+        verify=opensearchSslVerify,
     )
+    response.raise_for_status()
+
+    contentHash = hashlib.sha256(response.content).hexdigest()
+    if (dashboardExportCache is not None) and (cached := dashboardExportCache.get((dashid, doReplacers))):
+        if cached[0] == contentHash:
+            return cached[1], contentHash
+
+    if doReplacers:
+        responseText = dashboardReplacerPattern.sub(lambda match: dashboardReplacements[match.group(0)], response.text)
+    else:
+        # ... or just return it as-is
+        responseText = response.text
+
+    # remove index pattern definition from exported dashboard as they get created programatically
+    #   on Malcolm startup and we don't want them to come in with imported dashboards
+    if responseParsed := malcolm_utils.LoadStrIfJson(responseText):
+        if 'objects' in responseParsed and isinstance(responseParsed['objects'], list):
+            excludedIds = (
+                ("MALCOLM_NETWORK_INDEX_PATTERN_REPLACER", "MALCOLM_OTHER_INDEX_PATTERN_REPLACER")
+                if doReplacers
+                else (app.config['MALCOLM_NETWORK_INDEX_PATTERN'], app.config['MALCOLM_OTHER_INDEX_PATTERN'])
+            )
+            responseParsed['objects'] = [
+                o
+                for o in responseParsed['objects']
+                if not ((o.get("type") == "index-pattern") and (o.get("id") in excludedIds))
+            ]
+        if dashboardExportCache is not None:
+            dashboardExportCache.set((dashid, doReplacers), (contentHash, responseParsed))
+        return responseParsed, contentHash
+
+    else:
+        # what we got back from the API wasn't valid JSON, so sad
+        raise ValueError(f'Could not process export response for {dashid}')
+
+
+def dashboard_ids():
+    """Returns the IDs of all of the dashboards in OpenSearch Dashboards"""
+    ids = []
+    page = 1
+    while True:
+        response = http_session().get(
+            f"{dashboardsUrl}/api/saved_objects/_find",
+            params={'type': 'dashboard', 'fields': 'title', 'per_page': 1000, 'page': page},
+            auth=opensearchReqHttpAuth,
+            verify=opensearchSslVerify,
+        )
+        response.raise_for_status()
+        data = response.json()
+        ids.extend(o['id'] for o in data.get('saved_objects', []) if 'id' in o)
+        if (len(data.get('saved_objects', [])) == 0) or (len(ids) >= data.get('total', 0)):
+            return ids
+        page += 1
 
 
 @app.route(
@@ -1102,62 +2410,8 @@ def dashboard_export(dashid):
 
     args = get_request_arguments(request)
     try:
-        # call the API to get the dashboard JSON
-        response = requests.get(
-            f"{dashboardsUrl}/api/{'kibana' if (databaseMode == malcolm_utils.DatabaseMode.ElasticsearchRemote) else 'opensearch-dashboards'}/dashboards/export",
-            params={
-                'dashboard': dashid,
-            },
-            auth=opensearchReqHttpAuth,
-            verify=opensearchSslVerify,
-        )
-        response.raise_for_status()
-
-        if doReplacers := malcolm_utils.str2bool(args.get('replace', 'true')):
-            # replace references to index pattern names with the _REPLACER strings, which will allow other Malcolm
-            #   instances that use different index pattern names to import them and substitute their own names
-            replacements = {
-                app.config['MALCOLM_NETWORK_INDEX_PATTERN']: 'MALCOLM_NETWORK_INDEX_PATTERN_REPLACER',
-                app.config['MALCOLM_NETWORK_INDEX_TIME_FIELD']: 'MALCOLM_NETWORK_INDEX_TIME_FIELD_REPLACER',
-                app.config['MALCOLM_OTHER_INDEX_PATTERN']: 'MALCOLM_OTHER_INDEX_PATTERN_REPLACER',
-            }
-            pattern = re.compile('|'.join(re.escape(key) for key in replacements))
-            responseText = pattern.sub(lambda match: replacements[match.group(0)], response.text)
-        else:
-            # ... or just return it as-is
-            responseText = response.text
-
-        # remove index pattern definition from exported dashboard as they get created programatically
-        #   on Malcolm startup and we don't want them to come in with imported dashboards
-        if responseParsed := malcolm_utils.LoadStrIfJson(responseText):
-            if 'objects' in responseParsed and isinstance(responseParsed['objects'], list):
-                responseParsed['objects'] = [
-                    o
-                    for o in responseParsed['objects']
-                    if not (
-                        (o.get("type") == "index-pattern")
-                        and (
-                            o.get("id")
-                            in [
-                                (
-                                    "MALCOLM_NETWORK_INDEX_PATTERN_REPLACER"
-                                    if doReplacers
-                                    else app.config['MALCOLM_NETWORK_INDEX_PATTERN']
-                                ),
-                                (
-                                    "MALCOLM_OTHER_INDEX_PATTERN_REPLACER"
-                                    if doReplacers
-                                    else app.config['MALCOLM_OTHER_INDEX_PATTERN']
-                                ),
-                            ]
-                        )
-                    )
-                ]
-            return jsonify(responseParsed)
-
-        else:
-            # what we got back from the API wasn't valid JSON, so sad
-            return jsonify(error=f'Could not process export response for {dashid}')
+        dashboard, _ = export_dashboard(dashid, doReplacers=malcolm_utils.str2bool(args.get('replace', 'true')))
+        return jsonify(dashboard)
 
     except Exception as e:
         errStr = f"{type(e).__name__}: {str(e)} exporting OpenSearch Dashboard {dashid}"
@@ -1166,6 +2420,243 @@ def dashboard_export(dashid):
         return jsonify(error=errStr)
 
 
+@app.route(
+    f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/dashboard-export",
+    methods=['GET', 'POST'],
+)
+def dashboard_export_bulk():
+    """Exports several (or all) dashboards at once (see dashboard_export), fetching them from the opensearch
+    dashboards API concurrently and streaming the result as each is ready
+
+    Parameters
+    ----------
+    request : Request
+        'ids' - the IDs of the dashboards to export (a list, or comma-separated); all dashboards if unspecified
+        'replace' - see dashboard_export
+        'format' - ndjson (default) or zip
+        'hashes' - a dict of dashboard ID to the 'hash' previously returned for it; dashboards whose content
+            still has that hash are not exported again
+
+    Returns
+    -------
+    content
+        for ndjson, one line per dashboard containing its 'id' and either its 'hash' and the exported
+        'dashboard', 'unchanged' (if its hash matched) or an 'error'; for zip, an archive containing
+        <id>.json for each exported dashboard and manifest.json, a list of the ndjson lines without the
+        dashboards (so that dashboards that were unchanged or couldn't be exported aren't silently missing)
+    """
+    args = get_request_arguments(request)
+    doReplacers = malcolm_utils.str2bool(str(args.get('replace', 'true')))
+    asZip = str(args.get('format', 'ndjson')).lower() == 'zip'
+    knownHashes = args.get('hashes', {}) if isinstance(args.get('hashes', {}), dict) else {}
+    if ids := args.get('ids', None):
+        ids = ids.split(',') if isinstance(ids, str) else list(ids)
+    else:
+        ids = dashboard_ids()
+
+    def export_one(dashid):
+        try:
+            dashboard, contentHash = export_dashboard(dashid, doReplacers=doReplacers)
+            if knownHashes.get(dashid) == contentHash:
+                return {'id': dashid, 'hash': contentHash, 'unchanged': True}
+            return {'id': dashid, 'hash': contentHash, 'dashboard': dashboard}
+        except Exception as e:
+            errStr = f"{type(e).__name__}: {str(e)} exporting OpenSearch Dashboard {dashid}"
+            if debugApi:
+                print(errStr)
+            return {'id': dashid, 'error': errStr}
+
+    def generate():
+        zipBuffer = ZipStreamBuffer() if asZip else None
+        zipOut = zipfile.ZipFile(zipBuffer, mode='w', compression=zipfile.ZIP_DEFLATED) if asZip else None
+        manifest = []
+        with ThreadPoolExecutor(
+            max_workers=app.config["DASHBOARD_EXPORT_WORKERS"], thread_name_prefix='dashboard-export'
+        ) as pool:
+            for result in pool.map(export_one, ids):
+                if not asZip:
+                    yield (json.dumps(result) + '\n').encode()
+                else:
+                    manifest.append({k: v for k, v in result.items() if k != 'dashboard'})
+                    if 'dashboard' in result:
+                        zipOut.writestr(f"{result['id']}.json", json.dumps(result['dashboard'], indent=2))
+                        yield zipBuffer.drain()
+        if asZip:
+            zipOut.writestr('manifest.json', json.dumps(manifest, indent=2))
+            zipOut.close()
+            yield zipBuffer.drain()
+
+    return Response(
+        generate(),
+        mimetype='application/zip' if asZip else 'application/x-ndjson',
+        headers=(
+            {'Content-Disposition': 'attachment; filename="malcolm_dashboards.zip"', 'X-Accel-Buffering': 'no'}
+            if asZip
+            else {'X-Accel-Buffering': 'no'}
+        ),
+    )
+
+
+def query_ingest_times(index, excludedModule, sinceMs=None, untilMs=None):
+    """Aggregates the latest event.ingested time for each log source (host.name)
+
+    Parameters
+    ----------
+    index : string
+        The index pattern to search
+    excludedModule : string
+        The event.module to exclude (see ingest_stats)
+    sinceMs, untilMs : int
+        If set, only documents ingested within this range (in milliseconds since the epoch) are considered
+
+    Returns
+    -------
+    sources
+        dict where the key is host.name and the value is the latest event.ingested (milliseconds since the epoch)
+    """
+    s = (
+        SearchClass(
+            using=databaseClient,
+            index=index,
+        ).extra(size=0)
+        # Exclusions:
+        #   NGINX access and error logs: we want to exclude nginx error and
+        #       access logs, otherwise the very act of accessing Malcolm will
+        #       update the latest ingest time returned from this function.
+        #   event() webhook: we want to exclude alerts written by the event()
+        #       webhook API (see below) and limit our results to actual
+        #       network logs ingested via PCAP, etc.
+        .query(
+            QueryClass(
+                'bool',
+                must_not=[QueryClass('term', **{'event.module': excludedModule})],
+            )
+        )
+    )
+    if (sinceMs is not None) or (untilMs is not None):
+        s = s.filter(
+            'range',
+            **{
+                'event.ingested': {
+                    k: v for k, v in (('gte', sinceMs), ('lte', untilMs), ('format', 'epoch_millis')) if v is not None
+                }
+            },
+        )
+
+    hostAgg = AggregationClass('terms', field='host.name', size=app.config["INGEST_STATS_MAX_SOURCES"])
+    maxIngestAgg = AggregationClass('max', field='event.ingested')
+    s.aggs.bucket('host_names', hostAgg).metric('max_event_ingested', maxIngestAgg)
+    response = s.execute()
+
+    return {
+        bucket.key: int(bucket.max_event_ingested.value)
+        for bucket in response.aggregations.host_names.buckets
+        if bucket.max_event_ingested.value is not None
+    }
+
+
+class IngestWatermarks:
+    """Tracks the latest event.ingested time for each log source so that ingest_stats doesn't have to
+    aggregate over every document in the index. Each (index, excluded module) table is built once with an
+    all-time aggregation, then brought up to date by aggregating only the documents ingested since its
+    watermark (the time through which the table was last brought up to date, less overlapSec to allow for
+    documents that are ingested out of order). Tables are rebuilt from scratch every fullRefreshSec seconds
+    and saved to snapshotFile (if set) when they are.
+    """
+
+    def __init__(self, snapshotFile=None, overlapSec=300, fullRefreshSec=3600):
+        self.snapshotFile = snapshotFile
+        self.overlapSec = overlapSec
+        self.fullRefreshSec = fullRefreshSec
+        self.tables = {}
+        self.updating = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    def get(self, index, excludedModule, full=False):
+        """Returns the up-to-date table (a dict containing 'sources', 'built' and 'watermark', along with the
+        'window_ms' of the query used to update it) for an index and excluded module. The query is run
+        without holding the lock, and only one caller updates a given table at a time: while it does, other
+        callers get the table as it was (or, if there isn't one yet, wait for it)
+        """
+        key = (index, excludedModule)
+        waited = False
+        while True:
+            with self.lock:
+                table = self.tables.get(key)
+                updating = self.updating.get(key)
+                if (updating is None) and not (waited and (table is not None)):
+                    nowMs = int(time.time() * 1000)
+                    rebuild = full or (table is None) or (nowMs - table['built'] > self.fullRefreshSec * 1000)
+                    sinceMs = None if rebuild else max(table['watermark'] - self.overlapSec * 1000, 0)
+                    updating = self.updating[key] = threading.Event()
+                    break
+                elif (table is not None) and (waited or not full):
+                    return dict(table)
+            updating.wait()
+            waited = True
+
+        try:
+            sources = query_ingest_times(index, excludedModule, sinceMs, nowMs if sinceMs is not None else None)
+            with self.lock:
+                if rebuild:
+                    table = {'sources': sources, 'built': nowMs, 'window_ms': None}
+                else:
+                    table = self.tables.get(key, table)
+                    merged = dict(table['sources'])
+                    for source, ingestedMs in sources.items():
+                        merged[source] = max(ingestedMs, merged.get(source, 0))
+                    table = dict(table, sources=merged, window_ms=nowMs - sinceMs)
+                table['watermark'] = nowMs
+                self.tables[key] = table
+        finally:
+            with self.lock:
+                self.updating.pop(key, None)
+            updating.set()
+
+        # a snapshot that's behind just means a larger window for the first update after a restart, so it's
+        #   only saved when a table is rebuilt
+        if rebuild:
+            self.save()
+        return dict(table)
+
+    def load(self):
+        if self.snapshotFile and os.path.isfile(self.snapshotFile):
+            try:
+                with open(self.snapshotFile, 'r') as f:
+                    snapshot = json.load(f)
+                with self.lock:
+                    for item in snapshot:
+                        self.tables[tuple(item['key'])] = item['table']
+            except Exception as e:
+                if debugApi:
+                    print(f"{type(e).__name__}: {str(e)} loading ingest watermarks from {self.snapshotFile}")
+
+    def save(self):
+        if self.snapshotFile:
+            try:
+                with self.lock:
+                    snapshot = [{'key': list(key), 'table': table} for key, table in self.tables.items()]
+                tmpFileName = f'{self.snapshotFile}.{os.getpid()}.tmp'
+                with open(tmpFileName, 'w') as f:
+                    json.dump(snapshot, f)
+                os.replace(tmpFileName, self.snapshotFile)
+            except Exception as e:
+                if debugApi:
+                    print(f"{type(e).__name__}: {str(e)} saving ingest watermarks to {self.snapshotFile}")
+
+
+ingestWatermarks = (
+    IngestWatermarks(
+        snapshotFile=app.config["INGEST_STATS_SNAPSHOT_FILE"],
+        overlapSec=app.config["INGEST_STATS_OVERLAP_SEC"],
+        fullRefreshSec=app.config["INGEST_STATS_FULL_REFRESH_SEC"],
+    )
+    if malcolm_utils.str2bool(app.config["INGEST_STATS_INCREMENTAL"])
+    else None
+)
+
+
 @app.route(
     f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/ingest-stats",
     methods=['GET'],
@@ -1178,60 +2669,47 @@ def ingest_stats():
     Parameters
     ----------
     request : Request
-        Uses 'doctype' from request arguments
+        Uses 'doctype' from request arguments, and 'nocache' (if true, aggregate over all documents rather
+        than updating the ingest watermark table, see IngestWatermarks)
     Returns
     -------
     fields
         A dict where "sources" contains a sub-dict where key is host.name and value is max(event.ingested)
         for that host, and "latest_ingest_age_seconds" is the age (in seconds) of the most recently
-        ingested log
+        ingested log. If INGEST_STATS_INCREMENTAL is true, "watermarks" contains the age (in seconds) of the
+        table since it was last fully rebuilt ("table_age_seconds") and the size (in seconds) of the window
+        queried to update it ("window_seconds", or null if it was just rebuilt).
     """
     result = {}
     result['latest_ingest_age_seconds'] = 0
     try:
         # do the aggregation bucket query for the max event.ingested value for each data source
         request_args = get_request_arguments(request)
-        s = (
-            SearchClass(
-                using=databaseClient,
-                index=index_from_args(request_args),
-            ).extra(size=0)
-            # Exclusions:
-            #   NGINX access and error logs: we want to exclude nginx error and
-            #       access logs, otherwise the very act of accessing Malcolm will
-            #       update the latest ingest time returned from this function.
-            #   event() webhook: we want to exclude alerts written by the event()
-            #       webhook API (see below) and limit our results to actual
-            #       network logs ingested via PCAP, etc.
-            .query(
-                QueryClass(
-                    'bool',
-                    must_not=[
-                        QueryClass(
-                            'term',
-                            **{
-                                'event.module': (
-                                    'nginx' if doctype_is_host_logs(doctype_from_args(request_args)) else 'alerting'
-                                )
-                            },
-                        )
-                    ],
-                )
+        index = index_from_args(request_args)
+        excludedModule = 'nginx' if doctype_is_host_logs(doctype_from_args(request_args)) else 'alerting'
+        if ingestWatermarks:
+            table = ingestWatermarks.get(
+                index,
+                excludedModule,
+                full=malcolm_utils.str2bool(str(request_args.get('nocache', 'false'))),
             )
-        )
-
-        hostAgg = AggregationClass('terms', field='host.name')
-        maxIngestAgg = AggregationClass('max', field='event.ingested')
-        s.aggs.bucket('host_names', hostAgg).metric('max_event_ingested', maxIngestAgg)
-        response = s.execute()
+            sources = table['sources']
+            result['watermarks'] = {
+                'table_age_seconds': max(round((table['watermark'] - table['built']) / 1000), 0),
+                'window_seconds': (
+                    round(table['window_ms'] / 1000) if table.get('window_ms', None) is not None else None
+                ),
+            }
+        else:
+            sources = query_ingest_times(index, excludedModule)
 
         # put the result array together while tracking the most recent ingest time
         nowTime = datetime.now().astimezone(timezone.utc)
         maxTime = None
         result['sources'] = {}
-        for bucket in response.aggregations.host_names.buckets:
-            sourceTime = datetime.fromtimestamp(bucket.max_event_ingested.value / 1000, timezone.utc)
-            result['sources'][bucket.key] = sourceTime.replace(microsecond=0).isoformat()
+        for source, ingestedMs in sources.items():
+            sourceTime = datetime.fromtimestamp(ingestedMs / 1000, timezone.utc)
+            result['sources'][source] = sourceTime.replace(microsecond=0).isoformat()
             if (maxTime is None) or (sourceTime > maxTime):
                 maxTime = sourceTime
 
@@ -1247,15 +2725,112 @@ def ingest_stats():
     return jsonify(result)
 
 
+class NetboxSiteDirectory:
+    """Serves NetBox's sites out of memory. The directory is loaded when first needed, then refreshed in
+    the background every ttlSec seconds (and by a request, if the background refresh hasn't kept up). Once
+    the first page of sites reveals the total count, the remaining pages are fetched concurrently. Each page
+    is requested with If-None-Match using the ETag (if any) NetBox returned for it previously, so an
+    unchanged page doesn't need to be sent again.
+    """
+
+    def __init__(self, ttlSec=300, pageSize=250, fetchWorkers=4):
+        self.ttlSec = ttlSec
+        self.pageSize = max(pageSize, 1)
+        self.fetchWorkers = max(fetchWorkers, 1)
+        self.sites = None
+        self.pages = {}
+        self.updated = 0.0
+        self.lock = threading.Lock()
+        self.refreshLock = threading.Lock()
+        self.refresher = None
+
+    def get(self, refresh=False):
+        """Returns the sites (see netbox_sites) and the time (seconds since the epoch) they were retrieved"""
+        self.start()
+        if refresh or (self.sites is None) or (time.time() - self.updated > self.ttlSec):
+            self.refresh(force=refresh)
+        with self.lock:
+            return self.sites if self.sites is not None else {}, self.updated
+
+    def fetch_page(self, offset):
+        """Returns the sites on the page at offset, the page's ETag, and the total count of sites"""
+        headers = {"Authorization": f"Token {netboxToken}"} if netboxToken else {}
+        with self.lock:
+            cached = self.pages.get(offset)
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        response = http_session().get(
+            f'{netboxUrl}/api/dcim/sites/?format=json&limit={self.pageSize}&offset={offset}',
+            headers=headers,
+            verify=False,
+        )
+        if (response.status_code == 304) and cached:
+            return cached
+        response.raise_for_status()
+        data = response.json()
+        return {
+            'sites': {
+                site["id"]: {"name": site.get("name"), "display": site.get("display"), "slug": site.get("slug")}
+                for site in data.get("results", [])
+            },
+            'etag': response.headers.get('ETag'),
+            'count': data.get('count', 0),
+        }
+
+    def refresh(self, force=False):
+        startTime = time.time()
+        with self.refreshLock:
+            if (not force) and (self.sites is not None) and (self.updated >= startTime - 1):
+                # another thread just finished refreshing
+                return
+            try:
+                pages = {0: self.fetch_page(0)}
+                offsets = range(self.pageSize, pages[0]['count'], self.pageSize)
+                if len(offsets) > 0:
+                    with ThreadPoolExecutor(max_workers=self.fetchWorkers, thread_name_prefix='netbox-sites') as pool:
+                        pages.update(zip(offsets, pool.map(self.fetch_page, offsets)))
+                sites = {}
+                for offset in sorted(pages.keys()):
+                    sites.update(pages[offset]['sites'])
+                with self.lock:
+                    self.pages = pages
+                    self.sites = sites
+                    self.updated = time.time()
+            except Exception as e:
+                if debugApi:
+                    print(f"{type(e).__name__}: \"{str(e)}\" getting NetBox sites")
+
+    def start(self):
+        if (self.refresher is None) and (self.ttlSec > 0):
+            with self.lock:
+                if self.refresher is None:
+                    self.refresher = threading.Thread(target=self.refresh_loop, name='netbox-sites', daemon=True)
+                    self.refresher.start()
+
+    def refresh_loop(self):
+        while True:
+            time.sleep(self.ttlSec)
+            self.refresh()
+
+
+netboxSiteDirectory = NetboxSiteDirectory(
+    ttlSec=app.config["NETBOX_SITES_CACHE_TTL_SEC"],
+    pageSize=app.config["NETBOX_SITES_PAGE_SIZE"],
+    fetchWorkers=app.config["NETBOX_SITES_FETCH_WORKERS"],
+)
+
+
 @app.route(
     f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/netbox-sites",
     methods=['GET'],
 )
 def netbox_sites():
-    """Query the NetBox API and return its sites
+    """Query the NetBox API and return its sites (served from memory, see NetboxSiteDirectory)
 
     Parameters
     ----------
+    request : Request
+        nocache - if true, retrieve the sites from NetBox rather than returning them from memory
 
     Returns
     -------
@@ -1267,36 +2842,15 @@ def netbox_sites():
                 232: {"name": "Site2", "display": "Site Two", "slug": "site2"},
                 ...
             }
-
+        The Age header contains the age (in seconds) of the sites.
     """
-    result = {}
-    try:
-        headers = {"Authorization": f"Token {netboxToken}"} if netboxToken else None
-        url = f'{netboxUrl}/api/dcim/sites/?format=json'
-        while url:
-            try:
-                response = requests.get(url, headers=headers, verify=False)
-                response.raise_for_status()
-            except Exception as e:
-                if debugApi:
-                    print(f"{type(e).__name__}: \"{str(e)}\" getting NetBox sites")
-                break
-            if response and (data := response.json()):
-                result.update(
-                    {
-                        site["id"]: {"name": site.get("name"), "display": site.get("display"), "slug": site.get("slug")}
-                        for site in data.get("results", [])
-                    }
-                )
-                url = data.get("next")
-            else:
-                break
-
-    except Exception as e:
-        if debugApi:
-            print(f"{type(e).__name__}: \"{str(e)}\" getting NetBox sites")
-
-    return jsonify(result)
+    args = get_request_arguments(request)
+    sites, updated = netboxSiteDirectory.get(refresh=malcolm_utils.str2bool(str(args.get('nocache', 'false'))))
+    response = jsonify(sites)
+    if updated:
+        response.headers['Age'] = str(max(int(time.time() - updated), 0))
+        response.last_modified = datetime.fromtimestamp(updated, timezone.utc)
+    return response
 
 
 @app.route(
@@ -1316,6 +2870,131 @@ def ping():
     return jsonify(ping="pong")
 
 
+class EventBatcher:
+    """Queues alert records from the event webhook and indexes them with the bulk API, flushing when
+    EVENT_BATCH_MAX_SIZE records are waiting or EVENT_BATCH_FLUSH_SEC seconds have passed. When the queue
+    (of EVENT_BATCH_QUEUE_SIZE records) is full, enqueuing blocks for up to EVENT_BATCH_ENQUEUE_TIMEOUT_SEC
+    seconds before the caller falls back to indexing the record itself.
+    """
+
+    def __init__(self, maxBatch=500, flushSec=1.0, queueSize=10000, enqueueTimeoutSec=0.5):
+        self.maxBatch = max(maxBatch, 1)
+        self.flushSec = flushSec
+        self.enqueueTimeoutSec = enqueueTimeoutSec
+        self.queue = queue.Queue(maxsize=queueSize)
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.stats = {
+            'batches': 0,
+            'indexed': 0,
+            'errors': 0,
+            'last_batch_size': 0,
+            'last_batch_latency_ms': None,
+            'max_batch_latency_ms': None,
+        }
+
+    def start(self):
+        if self.flusher is None:
+            with self.lock:
+                if self.flusher is None:
+                    self.flusher = threading.Thread(target=self.flush_loop, name='event-batcher', daemon=True)
+                    self.flusher.start()
+                    atexit.register(self.drain)
+
+    def put(self, action):
+        """Queues a bulk action (a dict with _index, _id and _source), returning False if the queue
+        remained full for enqueueTimeoutSec
+        """
+        self.start()
+        try:
+            self.queue.put(action, timeout=self.enqueueTimeoutSec)
+            return True
+        except queue.Full:
+            return False
+
+    def take(self):
+        """Blocks until at least one action is queued (or flushSec passes), then returns up to
+        maxBatch actions, waiting no more than flushSec from the first one for the batch to fill
+        """
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=self.flushSec))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.flushSec
+        while len(batch) < self.maxBatch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self, batch):
+        if not batch:
+            return
+        startTime = time.perf_counter()
+        try:
+            indexed, errors = DatabaseImport.helpers.bulk(
+                databaseClient,
+                batch,
+                raise_on_error=False,
+                raise_on_exception=False,
+            )
+            errorCount = len(errors) if isinstance(errors, list) else errors
+        except Exception as e:
+            indexed, errors, errorCount = 0, [], len(batch)
+            if debugApi:
+                print(f"{type(e).__name__}: {str(e)} bulk indexing {len(batch)} events")
+        latencyMs = round((time.perf_counter() - startTime) * 1000, 2)
+        with self.lock:
+            self.stats['batches'] += 1
+            self.stats['indexed'] += indexed
+            self.stats['errors'] += errorCount
+            self.stats['last_batch_size'] = len(batch)
+            self.stats['last_batch_latency_ms'] = latencyMs
+            self.stats['max_batch_latency_ms'] = max(latencyMs, self.stats['max_batch_latency_ms'] or 0)
+        if debugApi:
+            print(f"Bulk indexed {indexed} of {len(batch)} events in {latencyMs} ms")
+            if errors and isinstance(errors, list):
+                print(json.dumps(errors, default=str))
+
+    def flush_loop(self):
+        while True:
+            self.flush(self.take())
+
+    def drain(self):
+        """Flushes whatever is still queued (e.g., at exit)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.maxBatch:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+
+    def status(self):
+        with self.lock:
+            return dict(self.stats, queued=self.queue.qsize())
+
+
+eventBatcher = (
+    EventBatcher(
+        maxBatch=app.config["EVENT_BATCH_MAX_SIZE"],
+        flushSec=app.config["EVENT_BATCH_FLUSH_SEC"],
+        queueSize=app.config["EVENT_BATCH_QUEUE_SIZE"],
+        enqueueTimeoutSec=app.config["EVENT_BATCH_ENQUEUE_TIMEOUT_SEC"],
+    )
+    if malcolm_utils.str2bool(app.config["EVENT_BATCH_ENABLED"])
+    else None
+)
+
+
 @app.route(
     f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/alert", methods=['POST']
 )
@@ -1375,7 +3054,9 @@ def event():
     Returns
     -------
     status
-        the JSON-formatted OpenSearch response from indexing/updating the alert record
+        the JSON-formatted OpenSearch response from indexing/updating the alert record, or (if
+        EVENT_BATCH_ENABLED is set and the record was queued for bulk indexing) the record's _index
+        and _id along with the batcher's status (see EventBatcher)
     """
     alert = {}
     idxResponse = {}
@@ -1473,12 +3154,21 @@ def event():
                 if hitCount := malcolm_utils.deep_get(alertResults[0], ['hits', 'total', 'value'], 0):
                     alert['event']['hits'] = hitCount
 
-        docDateStr = dateparser.parse(alert[app.config["MALCOLM_NETWORK_INDEX_TIME_FIELD"]]).strftime('%y%m%d')
-        idxResponse = databaseClient.index(
-            index=f"{app.config['MALCOLM_NETWORK_INDEX_PATTERN'].rstrip('*')}{docDateStr}",
-            id=f"{docDateStr}-{alert['event']['id']}",
-            body=alert,
-        )
+        docTimeStr = alert[app.config["MALCOLM_NETWORK_INDEX_TIME_FIELD"]]
+        try:
+            docDateStr = datetime.fromisoformat(docTimeStr).strftime('%y%m%d')
+        except (TypeError, ValueError):
+            docDateStr = dateparser.parse(docTimeStr).strftime('%y%m%d')
+        docIndex = f"{app.config['MALCOLM_NETWORK_INDEX_PATTERN'].rstrip('*')}{docDateStr}"
+        docId = f"{docDateStr}-{alert['event']['id']}"
+        if eventBatcher and eventBatcher.put({'_index': docIndex, '_id': docId, '_source': alert}):
+            idxResponse = {'_index': docIndex, '_id': docId, 'result': 'queued', 'batch': eventBatcher.status()}
+        else:
+            idxResponse = databaseClient.index(
+                index=docIndex,
+                id=docId,
+                body=alert,
+            )
 
     if debugApi:
         print(json.dumps(data))
@@ -1487,6 +3177,87 @@ def event():
     return jsonify(result=idxResponse)
 
 
+@app.route(
+    f"{('/' + app.config['MALCOLM_API_PREFIX']) if app.config['MALCOLM_API_PREFIX'] else ''}/metrics", methods=['GET']
+)
+def metrics():
+    """Provides request, database, outbound HTTP and cache metrics in the Prometheus text exposition format
+    (if API_METRICS_ENABLED is set)
+
+    Parameters
+    ----------
+
+    Returns
+    -------
+    metrics
+        the metrics as text, or a 404 response if metrics are disabled
+    """
+    if not apiMetrics:
+        return jsonify(error="metrics are not enabled (see API_METRICS_ENABLED)"), 404
+
+    extra = []
+    caches = [
+        ('field_mapping', fieldMappingCache),
+        ('response', responseCache),
+        ('dashboard_export', dashboardExportCache),
+    ]
+    for cacheName, cache in caches:
+        if cache is not None:
+            extra.extend(
+                [
+                    ('malcolm_api_cache_hits_total', 'counter', 'Cache hits', (('cache', cacheName),), cache.hits),
+                    (
+                        'malcolm_api_cache_misses_total',
+                        'counter',
+                        'Cache misses',
+                        (('cache', cacheName),),
+                        cache.misses,
+                    ),
+                    ('malcolm_api_cache_entries', 'gauge', 'Cache entries', (('cache', cacheName),), len(cache)),
+                ]
+            )
+    for cacheName, func in [('relative_time', relative_time_template), ('field_urls', field_url_templates)]:
+        info = func.cache_info()
+        extra.extend(
+            [
+                ('malcolm_api_cache_hits_total', 'counter', 'Cache hits', (('cache', cacheName),), info.hits),
+                ('malcolm_api_cache_misses_total', 'counter', 'Cache misses', (('cache', cacheName),), info.misses),
+                ('malcolm_api_cache_entries', 'gauge', 'Cache entries', (('cache', cacheName),), info.currsize),
+            ]
+        )
+    # sort so that samples of the same metric are grouped together
+    extra.sort(key=lambda sample: sample[0])
+    if eventBatcher:
+        batcherStatus = eventBatcher.status()
+        extra.extend(
+            [
+                (
+                    'malcolm_api_event_batcher_queued',
+                    'gauge',
+                    'Events waiting to be bulk indexed',
+                    (),
+                    batcherStatus['queued'],
+                ),
+                (
+                    'malcolm_api_event_batcher_indexed_total',
+                    'counter',
+                    'Events bulk indexed',
+                    (),
+                    batcherStatus['indexed'],
+                ),
+                (
+                    'malcolm_api_event_batcher_errors_total',
+                    'counter',
+                    'Events that failed bulk indexing',
+                    (),
+                    batcherStatus['errors'],
+                ),
+            ]
+        )
+
+    return Response(apiMetrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+
 @app.errorhandler(Exception)
 def basic_error(e):
     """General exception handler for the app
@@ -13,17 +13,44 @@ class Config(object):
     ARKIME_NETWORK_INDEX_PATTERN = f"{os.getenv('ARKIME_NETWORK_INDEX_PATTERN', 'arkime_sessions3-*')}"
     ARKIME_NETWORK_INDEX_TIME_FIELD = f"{os.getenv('ARKIME_NETWORK_INDEX_TIME_FIELD', 'firstPacket')}"
 
+    AGG_BATCH_MAX_SPECS = int(f"{os.getenv('AGG_BATCH_MAX_SPECS', '50')}")
+    API_METRICS_ENABLED = f"{os.getenv('API_METRICS_ENABLED', 'false')}"
     ARKIME_SSL = f"{os.getenv('ARKIME_SSL', 'true')}"
     ARKIME_HOST = f"{os.getenv('ARKIME_HOST', 'arkime')}"
     ARKIME_PORT = int(f"{os.getenv('ARKIME_VIEWER_PORT', os.getenv('ARKIME_PORT', '8005'))}".split(':')[-1])
     BUILD_DATE = f"{os.getenv('BUILD_DATE', 'unknown')}"
+    DASHBOARD_EXPORT_CACHE_SIZE = int(f"{os.getenv('DASHBOARD_EXPORT_CACHE_SIZE', '256')}")
+    DASHBOARD_EXPORT_WORKERS = int(f"{os.getenv('DASHBOARD_EXPORT_WORKERS', '8')}")
     DASHBOARDS_URL = f"{os.getenv('DASHBOARDS_URL', 'http://dashboards:5601/dashboards')}"
     DASHBOARDS_HELPER_HOST = f"{os.getenv('DASHBOARDS_HELPER_HOST', 'dashboards-helper')}"
     DASHBOARDS_MAPS_PORT = int(f"{os.getenv('DASHBOARDS_MAPS_PORT', '28991')}")
     DOCTYPE_DEFAULT = f"{os.getenv('DOCTYPE_DEFAULT', 'network')}"
+    EVENT_BATCH_ENABLED = f"{os.getenv('EVENT_BATCH_ENABLED', 'false')}"
+    EVENT_BATCH_ENQUEUE_TIMEOUT_SEC = float(f"{os.getenv('EVENT_BATCH_ENQUEUE_TIMEOUT_SEC', '0.5')}")
+    EVENT_BATCH_FLUSH_SEC = float(f"{os.getenv('EVENT_BATCH_FLUSH_SEC', '1.0')}")
+    EVENT_BATCH_MAX_SIZE = int(f"{os.getenv('EVENT_BATCH_MAX_SIZE', '500')}")
+    EVENT_BATCH_QUEUE_SIZE = int(f"{os.getenv('EVENT_BATCH_QUEUE_SIZE', '10000')}")
+    EXPORT_PAGE_SIZE = int(f"{os.getenv('EXPORT_PAGE_SIZE', '1000')}")
+    EXPORT_PIT_KEEP_ALIVE = f"{os.getenv('EXPORT_PIT_KEEP_ALIVE', '5m')}"
+    FIELD_CATALOG_MAX_AGE_SEC = int(f"{os.getenv('FIELD_CATALOG_MAX_AGE_SEC', '3600')}")
+    FIELD_CATALOG_MAX_ENTRIES = int(f"{os.getenv('FIELD_CATALOG_MAX_ENTRIES', '64')}")
+    FIELD_CATALOG_REFRESH_SEC = int(f"{os.getenv('FIELD_CATALOG_REFRESH_SEC', '60')}")
+    FIELD_CATALOG_SNAPSHOT_FILE = os.getenv('FIELD_CATALOG_SNAPSHOT_FILE', '/tmp/malcolm-api-field-catalog.json')
+    FIELD_MAPPING_CACHE_SIZE = int(f"{os.getenv('FIELD_MAPPING_CACHE_SIZE', '4096')}")
+    FIELD_MAPPING_CACHE_TTL_SEC = int(f"{os.getenv('FIELD_MAPPING_CACHE_TTL_SEC', '600')}")
     FILEBEAT_HOST = f"{os.getenv('FILEBEAT_HOST', 'filebeat')}"
     FILEBEAT_TCP_JSON_PORT = int(f"{os.getenv('FILEBEAT_TCP_JSON_PORT', '5045')}")
     FREQ_URL = f"{os.getenv('FREQ_URL', 'http://freq:10004')}"
+    HTTP_POOL_CONNECTIONS = int(f"{os.getenv('HTTP_POOL_CONNECTIONS', '10')}")
+    HTTP_POOL_MAXSIZE = int(f"{os.getenv('HTTP_POOL_MAXSIZE', '20')}")
+    HTTP_RETRIES = int(f"{os.getenv('HTTP_RETRIES', '2')}")
+    HTTP_RETRY_BACKOFF = float(f"{os.getenv('HTTP_RETRY_BACKOFF', '0.25')}")
+    HTTP_TIMEOUT_SEC = float(f"{os.getenv('HTTP_TIMEOUT_SEC', '30')}")
+    INGEST_STATS_FULL_REFRESH_SEC = int(f"{os.getenv('INGEST_STATS_FULL_REFRESH_SEC', '3600')}")
+    INGEST_STATS_INCREMENTAL = f"{os.getenv('INGEST_STATS_INCREMENTAL', 'false')}"
+    INGEST_STATS_MAX_SOURCES = int(f"{os.getenv('INGEST_STATS_MAX_SOURCES', '1000')}")
+    INGEST_STATS_OVERLAP_SEC = int(f"{os.getenv('INGEST_STATS_OVERLAP_SEC', '300')}")
+    INGEST_STATS_SNAPSHOT_FILE = f"{os.getenv('INGEST_STATS_SNAPSHOT_FILE', '/tmp/malcolm-api-ingest-stats.json')}"
     LOGSTASH_API_PORT = int(f"{os.getenv('LOGSTASH_API_PORT', '9600')}")
     LOGSTASH_HOST = f"{os.getenv('LOGSTASH_HOST', 'logstash')}"
     LOGSTASH_LJ_PORT = int(f"{os.getenv('LOGSTASH_LJ_PORT', '5044')}")
@@ -32,6 +59,9 @@ class Config(object):
     MALCOLM_TEMPLATE = f"{os.getenv('MALCOLM_TEMPLATE', 'malcolm_template')}"
     MALCOLM_VERSION = f"{os.getenv('MALCOLM_VERSION', 'unknown')}"
     NETBOX_URL = os.getenv('NETBOX_URL') or 'http://netbox:8080/netbox'
+    NETBOX_SITES_CACHE_TTL_SEC = int(f"{os.getenv('NETBOX_SITES_CACHE_TTL_SEC', '300')}")
+    NETBOX_SITES_FETCH_WORKERS = int(f"{os.getenv('NETBOX_SITES_FETCH_WORKERS', '4')}")
+    NETBOX_SITES_PAGE_SIZE = int(f"{os.getenv('NETBOX_SITES_PAGE_SIZE', '250')}")
     NETBOX_TOKEN = f"{os.getenv('NETBOX_TOKEN') or os.getenv('SUPERUSER_API_TOKEN', '')}"
     OPENSEARCH_CREDS_CONFIG_FILE = (
         f"{os.getenv('OPENSEARCH_CREDS_CONFIG_FILE', '/var/local/curlrc/.opensearch.primary.curlrc')}"
@@ -41,6 +71,12 @@ class Config(object):
     OPENSEARCH_URL = f"{os.getenv('OPENSEARCH_URL', 'http://opensearch:9200')}"
     PCAP_MONITOR_HOST = f"{os.getenv('PCAP_MONITOR_HOST', 'pcap-monitor')}"
     PCAP_TOPIC_PORT = int(f"{os.getenv('PCAP_TOPIC_PORT', '30441')}")
+    READY_CACHE_TTL_SEC = float(f"{os.getenv('READY_CACHE_TTL_SEC', '5')}")
+    READY_PROBE_TIMEOUT_SEC = float(f"{os.getenv('READY_PROBE_TIMEOUT_SEC', '5')}")
+    RESPONSE_CACHE_ENABLED = f"{os.getenv('RESPONSE_CACHE_ENABLED', 'false')}"
+    RESPONSE_CACHE_SIZE = int(f"{os.getenv('RESPONSE_CACHE_SIZE', '256')}")
+    RESPONSE_CACHE_TIME_BUCKET_SEC = int(f"{os.getenv('RESPONSE_CACHE_TIME_BUCKET_SEC', '60')}")
+    RESPONSE_CACHE_TTL_SEC = int(f"{os.getenv('RESPONSE_CACHE_TTL_SEC', '60')}")
     RESULT_SET_LIMIT = int(f"{os.getenv('RESULT_SET_LIMIT', '500')}")
     VCS_REVISION = f"{os.getenv('VCS_REVISION', 'unknown')}"
     ZEEK_EXTRACTED_FILE_LOGGER_HOST = f"{os.getenv('ZEEK_EXTRACTED_FILE_LOGGER_HOST', 'file-monitor')}"
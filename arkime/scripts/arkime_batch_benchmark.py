@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 Battelle Energy Alliance, LLC.  All rights reserved.
+
+#
+# Measures how quickly Arkime capture processes a set of PCAP files when each file gets its own capture process
+#   and when batches of files are given to a single capture process (see ARKIME_PCAP_BATCH_SIZE), reporting
+#   files/sec and MB/sec for each batch size. Run it in the arkime container, e.g.:
+#
+#   arkime_batch_benchmark.py -b 1,10,50 /data/pcap/processed/mnetsniff-*.pcap
+#
+# By default capture is run with --dryrun so nothing is written to the database; note that this also leaves out
+#   the database connection setup each capture process does, so the savings from batching will be understated.
+#   With --dry-run false the sessions are indexed (tagged "benchmark"), once for each batch size.
+#
+
+import argparse
+import os
+import sys
+import time
+
+from malcolm_utils import str2bool, run_process
+from pcap_processor import ARKIME_CAPTURE_PATH, arkime_capture_command
+
+###################################################################################################
+args = None
+script_name = os.path.basename(__file__)
+script_path = os.path.dirname(os.path.realpath(__file__))
+orig_path = os.getcwd()
+
+
+###################################################################################################
+# main
+def main():
+    global args
+
+    parser = argparse.ArgumentParser(
+        description=script_name, add_help=True, usage='{} <arguments> <pcap> [<pcap> ...]'.format(script_name)
+    )
+    parser.add_argument(
+        '--arkime',
+        dest='arkimeBin',
+        type=str,
+        default=os.getenv('ARKIME_CAPTURE_PATH', ARKIME_CAPTURE_PATH),
+        metavar='<string>',
+        help="Arkime capture executable",
+    )
+    parser.add_argument(
+        '-b',
+        '--batch-sizes',
+        dest='batchSizes',
+        type=str,
+        default='1,10,50',
+        metavar='<int>[,<int>...]',
+        help="Comma-separated list of batch sizes to measure",
+    )
+    parser.add_argument(
+        '-n',
+        '--node',
+        dest='nodeName',
+        type=str,
+        default='benchmark',
+        metavar='<string>',
+        help="Arkime node name",
+    )
+    parser.add_argument(
+        '--dry-run',
+        dest='dryRun',
+        type=str2bool,
+        nargs='?',
+        const=True,
+        default=True,
+        metavar='true|false',
+        help="Run capture with --dryrun (nothing is written to the database)",
+    )
+    parser.add_argument(
+        'pcaps',
+        nargs='+',
+        type=str,
+        metavar='<pcap>',
+        help="PCAP files (or directories containing them) to capture",
+    )
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args()
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    pcapFiles = []
+    for pcap in args.pcaps:
+        if os.path.isdir(pcap):
+            pcapFiles.extend(
+                sorted(os.path.join(pcap, x) for x in os.listdir(pcap) if os.path.isfile(os.path.join(pcap, x)))
+            )
+        elif os.path.isfile(pcap):
+            pcapFiles.append(pcap)
+    if not pcapFiles:
+        print("No PCAP files found", file=sys.stderr)
+        return 1
+    totalMB = sum(os.path.getsize(x) for x in pcapFiles) / 1048576
+    batchSizes = [max(int(x), 1) for x in args.batchSizes.split(',') if x.strip()]
+
+    print(f"{len(pcapFiles)} files, {totalMB:.1f} MB")
+    print(f"{'batch':>6} {'processes':>10} {'errors':>7} {'seconds':>9} {'files/s':>9} {'MB/s':>9} {'speedup':>8}")
+    baselineSec = None
+    errors = 0
+    for batchSize in batchSizes:
+        batches = [pcapFiles[i : i + batchSize] for i in range(0, len(pcapFiles), batchSize)]
+        batchErrors = 0
+        startTime = time.monotonic()
+        for batch in batches:
+            cmd = arkime_capture_command(args.arkimeBin, batch, nodeName=args.nodeName, tags=['benchmark'])
+            if args.dryRun:
+                cmd.append('--dryrun')
+            retcode, output = run_process(cmd)
+            if retcode != 0:
+                batchErrors += 1
+        elapsedSec = time.monotonic() - startTime
+        if baselineSec is None:
+            baselineSec = elapsedSec
+        errors += batchErrors
+        print(
+            f"{batchSize:>6} {len(batches):>10} {batchErrors:>7} {elapsedSec:>9.2f} "
+            f"{len(pcapFiles) / elapsedSec:>9.1f} {totalMB / elapsedSec:>9.1f} {baselineSec / elapsedSec:>7.2f}x"
+        )
+
+    return 1 if errors > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
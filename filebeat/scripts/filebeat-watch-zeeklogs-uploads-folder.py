@@ -43,6 +43,7 @@ SUPPORTED_MIME_TYPES = [
     'application/x-tar',
     'application/x-xz',
     'application/zip',
+    'application/zstd',
     # windows event logs (idaholab/Malcolm#465) will be handled here as well, as they
     # may be uploaded either as-is or compressed
     'application/x-ms-evtx',
@@ -130,16 +130,19 @@ if [ -d "$WORKDIR" ]; then
   mkdir -p "$MALCOLM_DEST_DIR/kubernetes/"
   mkdir -p "$MALCOLM_DEST_DIR/opensearch-backup/"
   mkdir -p "$MALCOLM_DEST_DIR/opensearch/nodes/"
+  mkdir -p "$MALCOLM_DEST_DIR/pcap/arkime-journal/"
   mkdir -p "$MALCOLM_DEST_DIR/pcap/arkime-live/"
   mkdir -p "$MALCOLM_DEST_DIR/pcap/processed/"
   mkdir -p "$MALCOLM_DEST_DIR/pcap/upload/tmp/spool/"
   mkdir -p "$MALCOLM_DEST_DIR/pcap/upload/variants/"
   mkdir -p "$MALCOLM_DEST_DIR/scripts/"
+  mkdir -p "$MALCOLM_DEST_DIR/suricata-logs/journal/"
   mkdir -p "$MALCOLM_DEST_DIR/suricata-logs/live/"
   mkdir -p "$MALCOLM_DEST_DIR/suricata/rules/"
   mkdir -p "$MALCOLM_DEST_DIR/suricata/include-configs/"
   mkdir -p "$MALCOLM_DEST_DIR/yara/rules/"
   mkdir -p "$MALCOLM_DEST_DIR/zeek-logs/current/"
+  mkdir -p "$MALCOLM_DEST_DIR/zeek-logs/journal/"
   mkdir -p "$MALCOLM_DEST_DIR/zeek-logs/extract_files/preserved/"
   mkdir -p "$MALCOLM_DEST_DIR/zeek-logs/extract_files/quarantine/"
   mkdir -p "$MALCOLM_DEST_DIR/zeek-logs/live/"
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 Battelle Energy Alliance, LLC.  All rights reserved.
+
+#
+# A simple load generator for Malcolm's API: a number of concurrent clients repeatedly request one or more
+#   API URIs for a fixed duration, after which the request rate, errors and latency percentiles are reported.
+#
+# To compare the API's serving modes (see api/gunicorn.conf.py), run it once against the API with
+#   API_WORKER_CLASS=sync and again with API_WORKER_CLASS=gevent, e.g.:
+#
+#   ./api_load_test.py -u https://localhost/mapi --user analyst -c 50 -d 30 ingest-stats ready
+#
+
+import argparse
+import getpass
+import os
+import random
+import requests
+import sys
+import threading
+import time
+import urllib3
+
+from collections import defaultdict
+
+from malcolm_utils import str2bool
+
+###################################################################################################
+args = None
+script_name = os.path.basename(__file__)
+script_path = os.path.dirname(os.path.realpath(__file__))
+orig_path = os.getcwd()
+
+
+###################################################################################################
+def percentile(sortedValues, pct):
+    if not sortedValues:
+        return None
+    return sortedValues[min(int(round(pct / 100.0 * (len(sortedValues) - 1))), len(sortedValues) - 1)]
+
+
+###################################################################################################
+def client_loop(urls, auth, verify, deadline, results, lock):
+    session = requests.Session()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    while time.monotonic() < deadline:
+        url = random.choice(urls)
+        startTime = time.perf_counter()
+        try:
+            response = session.get(url, auth=auth, verify=verify, timeout=args.timeout)
+            if not response.ok:
+                errors[url] += 1
+        except Exception:
+            errors[url] += 1
+        latencies[url].append(time.perf_counter() - startTime)
+    with lock:
+        for url, values in latencies.items():
+            results['latencies'][url].extend(values)
+        for url, count in errors.items():
+            results['errors'][url] += count
+
+
+###################################################################################################
+# main
+def main():
+    global args
+
+    parser = argparse.ArgumentParser(
+        description=script_name, add_help=True, usage='{} <arguments> <uri> [<uri> ...]'.format(script_name)
+    )
+    parser.add_argument(
+        '-u',
+        '--url',
+        dest='url',
+        type=str,
+        default=os.getenv('MALCOLM_API_URL', 'https://localhost/mapi'),
+        metavar='<string>',
+        help="Base URL of the Malcolm API",
+    )
+    parser.add_argument(
+        '--user',
+        dest='user',
+        type=str,
+        default=os.getenv('MALCOLM_USERNAME', None),
+        metavar='<string>',
+        help="Username (the password is read from MALCOLM_PASSWORD or prompted for)",
+    )
+    parser.add_argument(
+        '-c',
+        '--concurrency',
+        dest='concurrency',
+        type=int,
+        default=20,
+        metavar='<int>',
+        help="Number of concurrent clients",
+    )
+    parser.add_argument(
+        '-d',
+        '--duration',
+        dest='duration',
+        type=float,
+        default=30.0,
+        metavar='<seconds>',
+        help="Test duration",
+    )
+    parser.add_argument(
+        '-t',
+        '--timeout',
+        dest='timeout',
+        type=float,
+        default=60.0,
+        metavar='<seconds>',
+        help="Request timeout",
+    )
+    parser.add_argument(
+        '-k',
+        '--insecure',
+        dest='insecure',
+        type=str2bool,
+        nargs='?',
+        const=True,
+        default=True,
+        metavar='true|false',
+        help="Don't verify TLS certificates",
+    )
+    parser.add_argument(
+        'uris',
+        nargs='*',
+        type=str,
+        default=['ingest-stats', 'ready'],
+        metavar='<uri>',
+        help="API URIs to request (relative to --url)",
+    )
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args()
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    if args.insecure:
+        urllib3.disable_warnings()
+    auth = None
+    if args.user:
+        auth = (args.user, os.getenv('MALCOLM_PASSWORD', None) or getpass.getpass(f'Password for {args.user}: '))
+    urls = [f"{args.url.rstrip('/')}/{uri.lstrip('/')}" for uri in args.uris]
+
+    results = {'latencies': defaultdict(list), 'errors': defaultdict(int)}
+    lock = threading.Lock()
+    startTime = time.monotonic()
+    deadline = startTime + args.duration
+    clients = [
+        threading.Thread(target=client_loop, args=(urls, auth, not args.insecure, deadline, results, lock))
+        for _ in range(max(args.concurrency, 1))
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.monotonic() - startTime
+
+    print(f"{'uri':<40} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    allLatencies = []
+    for url in urls:
+        latencies = sorted(results['latencies'][url])
+        allLatencies.extend(latencies)
+        print(
+            f"{url[len(args.url.rstrip('/')) :]:<40} {len(latencies):>9} {results['errors'][url]:>7} "
+            f"{len(latencies) / elapsed:>9.1f} {(percentile(latencies, 50) or 0) * 1000:>9.1f} "
+            f"{(percentile(latencies, 99) or 0) * 1000:>9.1f} {(latencies[-1] if latencies else 0) * 1000:>9.1f}"
+        )
+    allLatencies.sort()
+    print(
+        f"{'total':<40} {len(allLatencies):>9} {sum(results['errors'].values()):>7} "
+        f"{len(allLatencies) / elapsed:>9.1f} {(percentile(allLatencies, 50) or 0) * 1000:>9.1f} "
+        f"{(percentile(allLatencies, 99) or 0) * 1000:>9.1f} {(allLatencies[-1] if allLatencies else 0) * 1000:>9.1f}"
+    )
+
+    return 1 if sum(results['errors'].values()) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1226,12 +1226,15 @@ class Installer(object):
                             malcolm_install_path,
                             indexDirFull,
                             indexSnapshotDirFull,
+                            os.path.join(pcapDirFull, 'arkime-journal'),
                             os.path.join(pcapDirFull, 'arkime-live'),
                             os.path.join(pcapDirFull, 'processed'),
                             os.path.join(pcapDirFull, os.path.join('upload', os.path.join('tmp', 'spool'))),
                             os.path.join(pcapDirFull, os.path.join('upload', 'variants')),
+                            os.path.join(suricataLogDirFull, 'journal'),
                             os.path.join(suricataLogDirFull, 'live'),
                             os.path.join(zeekLogDirFull, 'current'),
+                            os.path.join(zeekLogDirFull, 'journal'),
                             os.path.join(zeekLogDirFull, 'live'),
                             os.path.join(zeekLogDirFull, 'upload'),
                             os.path.join(zeekLogDirFull, os.path.join('extract_files', 'preserved')),
@@ -2851,6 +2854,9 @@ class Installer(object):
                         #   bind mount sources with user-specified locations
                         boundPathsToAdjust = (
                             BoundPathReplacer("arkime", "/data/pcap", pcapDir),
+                            BoundPathReplacer(
+                                "arkime", "/var/local/pcap-journal", os.path.join(pcapDir, 'arkime-journal')
+                            ),
                             BoundPathReplacer("arkime-live", "/data/pcap", pcapDir),
                             BoundPathReplacer("filebeat", "/suricata", suricataLogDir),
                             BoundPathReplacer("filebeat", "/zeek", zeekLogDir),
@@ -2865,6 +2871,9 @@ class Installer(object):
                             BoundPathReplacer("pcap-monitor", "/zeek", zeekLogDir),
                             BoundPathReplacer("suricata", "/data/pcap", pcapDir),
                             BoundPathReplacer("suricata", "/var/log/suricata", suricataLogDir),
+                            BoundPathReplacer(
+                                "suricata", "/var/local/pcap-journal", os.path.join(suricataLogDir, 'journal')
+                            ),
                             BoundPathReplacer("suricata-live", "/var/log/suricata", suricataLogDir),
                             BoundPathReplacer(
                                 "upload", "/var/www/upload/server/php/chroot/files", os.path.join(pcapDir, 'upload')
@@ -2872,6 +2881,7 @@ class Installer(object):
                             BoundPathReplacer("zeek", "/pcap", pcapDir),
                             BoundPathReplacer("zeek", "/zeek/upload", os.path.join(zeekLogDir, 'upload')),
                             BoundPathReplacer("zeek", "/zeek/extract_files", os.path.join(zeekLogDir, 'extract_files')),
+                            BoundPathReplacer("zeek", "/var/local/pcap-journal", os.path.join(zeekLogDir, 'journal')),
                             BoundPathReplacer("zeek-live", "/zeek/live", os.path.join(zeekLogDir, 'live')),
                             BoundPathReplacer(
                                 "zeek-live", "/zeek/extract_files", os.path.join(zeekLogDir, 'extract_files')
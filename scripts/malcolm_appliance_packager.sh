@@ -81,17 +81,20 @@ if mkdir "$DESTDIR"; then
   mkdir $VERBOSE -p "$DESTDIR/nginx/certs/"
   mkdir $VERBOSE -p "$DESTDIR/opensearch-backup/"
   mkdir $VERBOSE -p "$DESTDIR/opensearch/nodes/"
+  mkdir $VERBOSE -p "$DESTDIR/pcap/arkime-journal/"
   mkdir $VERBOSE -p "$DESTDIR/pcap/arkime-live/"
   mkdir $VERBOSE -p "$DESTDIR/pcap/processed/"
   mkdir $VERBOSE -p "$DESTDIR/pcap/upload/tmp/spool"
   mkdir $VERBOSE -p "$DESTDIR/pcap/upload/variants/"
   mkdir $VERBOSE -p "$DESTDIR/config/"
   mkdir $VERBOSE -p "$DESTDIR/scripts/"
+  mkdir $VERBOSE -p "$DESTDIR/suricata-logs/journal/"
   mkdir $VERBOSE -p "$DESTDIR/suricata-logs/live/"
   mkdir $VERBOSE -p "$DESTDIR/suricata/rules/"
   mkdir $VERBOSE -p "$DESTDIR/suricata/include-configs/"
   mkdir $VERBOSE -p "$DESTDIR/yara/rules/"
   mkdir $VERBOSE -p "$DESTDIR/zeek-logs/current/"
+  mkdir $VERBOSE -p "$DESTDIR/zeek-logs/journal/"
   mkdir $VERBOSE -p "$DESTDIR/zeek-logs/extract_files/preserved/"
   mkdir $VERBOSE -p "$DESTDIR/zeek-logs/extract_files/quarantine/"
   mkdir $VERBOSE -p "$DESTDIR/zeek-logs/live/"
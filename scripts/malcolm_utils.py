@@ -129,9 +129,9 @@ def base64_decode_if_prefixed(s: str):
 
 ###################################################################################################
 # test if a remote port is open
-def check_socket(host, port):
+def check_socket(host, port, timeout=10):
     with contextlib.closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
-        sock.settimeout(10)
+        sock.settimeout(timeout)
         if sock.connect_ex((host, port)) == 0:
             return True
         else:
@@ -159,6 +159,62 @@ class ContextLockedOrderedDict(OrderedDict):
         return self
 
 
+###################################################################################################
+# a thread-safe, size-bounded key/value cache where entries expire after ttl seconds (None for
+#   never) and the least-recently-used entry is evicted once maxsize entries are stored
+class ExpiringLRUCache:
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            if (entry := self.data.get(key, None)) is not None:
+                if (entry[0] is None) or (entry[0] > time.monotonic()):
+                    self.data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self.data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expireTtl = ttl if ttl is not None else self.ttl
+        with self.lock:
+            self.data[key] = (time.monotonic() + expireTtl if expireTtl is not None else None, value)
+            self.data.move_to_end(key)
+            while len(self.data) > max(self.maxsize, 0):
+                self.data.popitem(last=False)
+
+    # seconds until the entry for key expires (None if it never expires, 0 if it isn't cached)
+    def expires_in(self, key):
+        with self.lock:
+            if (entry := self.data.get(key, None)) is not None:
+                return max(entry[0] - time.monotonic(), 0) if entry[0] is not None else None
+            return 0
+
+    # remove entries for which predicate(key) is true, or all entries if predicate is None
+    def invalidate(self, predicate=None):
+        with self.lock:
+            if predicate is None:
+                removed = len(self.data)
+                self.data.clear()
+            else:
+                keys = [k for k in self.data.keys() if predicate(k)]
+                for k in keys:
+                    del self.data[k]
+                removed = len(keys)
+            return removed
+
+    def __len__(self):
+        with self.lock:
+            return len(self.data)
+
+
 ###################################################################################################
 def custom_make_translation(text, translation):
     regex = re.compile('|'.join(map(re.escape, translation)))
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 Battelle Energy Alliance, LLC.  All rights reserved.
+
+###################################################################################################
+# Load-balanced distribution of PCAP files from pcap_watcher.py to pcap_processor.py instances
+#
+# With the PUB/SUB topic every subscribed processor receives every file, so running several Zeek
+#   (or Arkime, or Suricata) processors just analyzes each file several times. Instead, the broker
+#   (run by pcap_watcher.py) keeps a queue of files for each kind of processor. Each processor tells
+#   the broker how many more files it can take (its credit) and the broker hands them out to the
+#   processors of that kind, so every kind gets every file but each file goes to only one processor
+#   of a given kind. Processors acknowledge each file once they're done with it; a processor that
+#   goes quiet for longer than the liveness timeout (or says goodbye) is considered gone, and the files
+#   it hadn't acknowledged are put back at the front of the queue for another processor to take.
+#
+# Messages are JSON objects sent over a ROUTER (broker) / DEALER (processor) socket pair:
+#   processor → broker: {"type": "ready", "kind": <str>, "want": <int>, "received": <int>}
+#                       {"type": "ack", "id": <str>}
+#                       {"type": "bye"}
+#   broker → processor: {"type": "work", "id": <str>, "file": <file info dict>}
+###################################################################################################
+
+import collections
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+import zmq
+
+from pcap_utils import FILE_INFO_DICT_ID
+
+###################################################################################################
+BROKER_MSG_READY = 'ready'
+BROKER_MSG_ACK = 'ack'
+BROKER_MSG_BYE = 'bye'
+BROKER_MSG_WORK = 'work'
+
+BROKER_HEARTBEAT_SEC = 5
+BROKER_LIVENESS_SEC = 3 * BROKER_HEARTBEAT_SEC
+BROKER_MAX_PENDING_DEFAULT = 100000
+# the kinds of processors files are queued for from the start, whether or not one has connected yet
+BROKER_KINDS_DEFAULT = ('arkime', 'zeek', 'suricata')
+BROKER_POLL_MSEC = 200
+
+
+###################################################################################################
+# the broker side, run in its own thread by pcap_watcher.py
+class PcapWorkBroker:
+    def __init__(
+        self,
+        port,
+        context=None,
+        logger=None,
+        livenessSec=BROKER_LIVENESS_SEC,
+        maxPending=BROKER_MAX_PENDING_DEFAULT,
+        kinds=BROKER_KINDS_DEFAULT,
+    ):
+        self.port = port
+        self.context = context if context else zmq.Context.instance()
+        self.logger = logger if logger else logging
+        self.livenessSec = livenessSec
+        self.maxPending = maxPending
+        self.incoming = queue.Queue()
+        # files are kept for the expected kinds of processors until one connects (e.g., preexisting files
+        #   published at startup, or a processor container that starts after pcap-monitor), unless a kind's
+        #   queue fills up before any processor of that kind has connected (it's probably not running)
+        self.pending = {kind: collections.deque() for kind in kinds}
+        self.connectedKinds = set()
+        self.workers = {}
+        self.idPrefix = f"{int(time.time())}-"
+        self.sequence = itertools.count(1)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(5)
+
+    # queue a file for each kind of processor (thread-safe)
+    def publish(self, fileInfo):
+        self.incoming.put(fileInfo)
+
+    def _enqueue(self, fileInfo):
+        fileId = f"{self.idPrefix}{next(self.sequence)}"
+        for kind, kindPending in list(self.pending.items()):
+            if len(kindPending) >= self.maxPending:
+                if kind not in self.connectedKinds:
+                    del self.pending[kind]
+                    self.logger.warning(
+                        f"broker:\tno {kind} processor has connected, no longer queueing files for {kind}"
+                    )
+                    continue
+                droppedId, droppedInfo = kindPending.popleft()
+                self.logger.warning(f"broker:\t{kind} queue full, dropped {droppedInfo}")
+            kindPending.append((fileId, dict(fileInfo)))
+
+    # a worker is gone: put its unacknowledged files back at the front of its kind's queue
+    def _retire(self, identity, reason):
+        worker = self.workers.pop(identity, None)
+        if worker:
+            if worker['inflight']:
+                self.pending[worker['kind']].extendleft(reversed(list(worker['inflight'].items())))
+            self.logger.info(
+                f"broker:\t{identity.decode(errors='replace')} {reason}, {len(worker['inflight'])} files requeued"
+            )
+
+    def _handle(self, identity, message):
+        msgType = message.get('type', None)
+        worker = self.workers.get(identity, None)
+        if msgType == BROKER_MSG_READY:
+            kind = str(message.get('kind', ''))
+            if worker is None:
+                # the processor's count of files received covers its whole lifetime (e.g., before pcap-monitor
+                #   restarted, or before we gave up on it for going quiet), so count what we send from there
+                worker = self.workers[identity] = {
+                    'kind': kind,
+                    'want': 0,
+                    'sent': int(message.get('received', 0)),
+                    'inflight': {},
+                }
+                self.logger.info(f"broker:\t{identity.decode(errors='replace')} ({kind}) connected")
+            # processors of a kind we weren't expecting (or had stopped queueing for) get files from now on
+            self.pending.setdefault(kind, collections.deque())
+            self.connectedKinds.add(kind)
+            # account for files we've sent that the processor hadn't received when it sent this
+            worker['want'] = max(int(message.get('want', 0)) - (worker['sent'] - int(message.get('received', 0))), 0)
+        elif worker is None:
+            # an ack or goodbye from a worker we've already given up on (its files have been requeued)
+            return
+        elif msgType == BROKER_MSG_ACK:
+            worker['inflight'].pop(message.get('id', None), None)
+        elif msgType == BROKER_MSG_BYE:
+            self._retire(identity, 'disconnected')
+            return
+        worker['lastSeen'] = time.monotonic()
+
+    def _dispatch(self, brokerSocket):
+        # hand out files one at a time, round-robin, to the workers that have credit for them
+        sentAny = True
+        while sentAny:
+            sentAny = False
+            for identity, worker in list(self.workers.items()):
+                kindPending = self.pending.get(worker['kind'], None)
+                if (worker['want'] > 0) and kindPending:
+                    fileId, fileInfo = kindPending.popleft()
+                    brokerSocket.send_multipart(
+                        [identity, json.dumps({'type': BROKER_MSG_WORK, 'id': fileId, 'file': fileInfo}).encode()]
+                    )
+                    worker['inflight'][fileId] = fileInfo
+                    worker['want'] -= 1
+                    worker['sent'] += 1
+                    sentAny = True
+
+    def run(self):
+        brokerSocket = self.context.socket(zmq.ROUTER)
+        brokerSocket.setsockopt(zmq.LINGER, 0)
+        brokerSocket.bind(f"tcp://*:{self.port}")
+        self.logger.info(f"broker:\tbound to port {self.port}")
+        try:
+            while not self.stopped.is_set():
+                if brokerSocket.poll(BROKER_POLL_MSEC):
+                    while True:
+                        try:
+                            identity, payload = brokerSocket.recv_multipart(zmq.NOBLOCK)
+                        except zmq.Again:
+                            break
+                        except ValueError:
+                            continue
+                        try:
+                            self._handle(identity, json.loads(payload))
+                        except Exception as e:
+                            self.logger.warning(f"broker:\tbad message from {identity}: {e}")
+
+                while True:
+                    try:
+                        self._enqueue(self.incoming.get_nowait())
+                    except queue.Empty:
+                        break
+
+                nowTime = time.monotonic()
+                for identity, worker in list(self.workers.items()):
+                    if nowTime - worker.get('lastSeen', nowTime) > self.livenessSec:
+                        self._retire(identity, f"silent for {self.livenessSec}s")
+
+                self._dispatch(brokerSocket)
+        finally:
+            brokerSocket.close()
+
+    def stats(self):
+        return {
+            'pending': {kind: len(kindPending) for kind, kindPending in self.pending.items()},
+            'workers': len(self.workers),
+            'inflight': sum(len(worker['inflight']) for worker in self.workers.values()),
+        }
+
+
+###################################################################################################
+# the processor side, used from the main thread of pcap_processor.py (except for ack, which is thread-safe)
+class PcapWorkClient:
+    def __init__(self, host, port, kind, capacity, context=None, logger=None):
+        self.kind = kind
+        self.capacity = max(capacity, 1)
+        self.logger = logger if logger else logging
+        self.context = context if context else zmq.Context.instance()
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.setsockopt(
+            zmq.IDENTITY, f"{kind}:{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}".encode()
+        )
+        self.socket.setsockopt(zmq.LINGER, 1000)
+        self.socket.connect(f"tcp://{host}:{port}")
+        self.acks = queue.Queue()
+        self.outstanding = set()
+        self.received = 0
+        self.lastWant = None
+        self.lastReceived = None
+        self.lastSentTime = 0
+
+    def _send(self, message):
+        self.socket.send_string(json.dumps(message))
+        self.lastSentTime = time.monotonic()
+
+    # note that a file received from the broker has been processed, successfully or not (thread-safe)
+    def ack(self, fileInfo, succeeded=True):
+        if isinstance(fileInfo, dict) and fileInfo.get(FILE_INFO_DICT_ID, None):
+            self.acks.put(fileInfo[FILE_INFO_DICT_ID])
+
+    # send any acknowledgements and our credit (if it's changed or a heartbeat is due), then wait up to
+    #   timeoutMsec for files from the broker and return them. room (if not None) caps the credit at
+    #   how many more files we have space for right now
+    def receive(self, timeoutMsec, room=None):
+        while True:
+            try:
+                fileId = self.acks.get_nowait()
+            except queue.Empty:
+                break
+            self.outstanding.discard(fileId)
+            self._send({'type': BROKER_MSG_ACK, 'id': fileId})
+
+        want = max(self.capacity - len(self.outstanding), 0)
+        if room is not None:
+            want = min(want, max(room, 0))
+        # the broker takes what it's sent us since our last message out of our credit, so it needs to hear from
+        #   us again once we've received more even if we want as many as before
+        if (
+            (want != self.lastWant)
+            or (self.received != self.lastReceived)
+            or (time.monotonic() - self.lastSentTime >= BROKER_HEARTBEAT_SEC)
+        ):
+            self._send({'type': BROKER_MSG_READY, 'kind': self.kind, 'want': want, 'received': self.received})
+            self.lastWant = want
+            self.lastReceived = self.received
+
+        fileInfos = []
+        if self.socket.poll(timeoutMsec):
+            while True:
+                try:
+                    message = json.loads(self.socket.recv(zmq.NOBLOCK))
+                except zmq.Again:
+                    break
+                if (message.get('type', None) == BROKER_MSG_WORK) and isinstance(message.get('file', None), dict):
+                    self.received += 1
+                    fileInfo = message['file']
+                    fileInfo[FILE_INFO_DICT_ID] = message['id']
+                    self.outstanding.add(message['id'])
+                    fileInfos.append(fileInfo)
+        return fileInfos
+
+    # tell the broker we're leaving so it can requeue our unacknowledged files right away
+    def close(self):
+        try:
+            self._send({'type': BROKER_MSG_BYE})
+        finally:
+            self.socket.close()
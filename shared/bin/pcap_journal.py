@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 Battelle Energy Alliance, LLC.  All rights reserved.
+
+###################################################################################################
+# An on-disk (SQLite) journal of the PCAP files a pcap_processor.py instance has been given
+#
+# Each file is recorded as it's received, when a worker starts on it and when it's finished (or failed), so
+#   that if the processor is restarted the files it had received but not finished can be replayed, and so that
+#   a file it has already processed (e.g., republished when pcap_watcher.py restarts) isn't processed again.
+#   Files are identified by their name (as published), size and a fingerprint of their contents (see
+#   pcap_file_fingerprint); modification time isn't used, as pcap_watcher.py touches preexisting files to
+#   republish them. Each processor instance keeps its own journal (see journal_file_name), as the PCAP
+#   directory is shared by processors of the same kind and SQLite isn't safe on shared network volumes.
+###################################################################################################
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from pcap_utils import (
+    FILE_INFO_DICT_ID,
+    FILE_INFO_DICT_JOURNAL_ID,
+    FILE_INFO_DICT_NAME,
+    pcap_file_fingerprint,
+)
+
+###################################################################################################
+JOURNAL_STATE_RECEIVED = 'received'
+JOURNAL_STATE_STARTED = 'started'
+JOURNAL_STATE_FINISHED = 'finished'
+JOURNAL_STATE_FAILED = 'failed'
+
+# a file that was being processed this many times when the processor stopped isn't replayed again
+JOURNAL_MAX_ATTEMPTS = 3
+
+JOURNAL_RETENTION_DAYS_DEFAULT = 30
+
+# the journal is kept on a volume of each processor's own (bind mounted from ./zeek-logs/journal,
+#   ./suricata-logs/journal or ./pcap/arkime-journal) rather than in the (shared) PCAP directory,
+#   so that it outlives the container
+JOURNAL_DIR_DEFAULT = '/var/local/pcap-journal'
+
+
+###################################################################################################
+# the journal file for this instance of a kind of processor
+def journal_file_name(journalDir, kind):
+    return os.path.join(journalDir or JOURNAL_DIR_DEFAULT, f"{kind}-{socket.gethostname()}.db")
+
+
+###################################################################################################
+class PcapWorkJournal:
+    def __init__(self, dbFileName, kind, retentionDays=JOURNAL_RETENTION_DAYS_DEFAULT, logger=None):
+        self.kind = kind
+        self.retentionDays = retentionDays
+        self.logger = logger if logger else logging
+        self.lock = threading.Lock()
+        if os.path.dirname(dbFileName):
+            os.makedirs(os.path.dirname(dbFileName), exist_ok=True)
+        # autocommit, so each state change is written as it happens
+        self.conn = sqlite3.connect(dbFileName, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                info TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                received REAL,
+                started REAL,
+                finished REAL,
+                error TEXT,
+                UNIQUE (kind, name, size, fingerprint)
+            )""")
+        self.conn.execute('CREATE INDEX IF NOT EXISTS files_kind_state ON files (kind, state)')
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # record a newly-received file (fileName being where it is on disk), returning True if it should be processed
+    #   or False if it's a duplicate of a file that's already been processed or is waiting to be. a file from the
+    #   broker (i.e., with an ID) is only a duplicate if it's been finished: if we'd received or started it, the
+    #   broker gave up on us and is redelivering it, and it's no longer in our queue (see release)
+    def received(self, fileInfo, fileName):
+        try:
+            fileSize = os.path.getsize(fileName)
+            fingerprint = pcap_file_fingerprint(fileName)
+        except OSError:
+            # let the worker deal with a file that isn't there
+            return True
+
+        info = {k: v for k, v in fileInfo.items() if k not in (FILE_INFO_DICT_ID, FILE_INFO_DICT_JOURNAL_ID)}
+        nowTime = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT id, state FROM files WHERE kind = ? AND name = ? AND size = ? AND fingerprint = ?',
+                (self.kind, fileInfo[FILE_INFO_DICT_NAME], fileSize, fingerprint),
+            ).fetchone()
+            if row is None:
+                cursor = self.conn.execute(
+                    'INSERT INTO files (kind, name, size, fingerprint, info, state, received) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        self.kind,
+                        fileInfo[FILE_INFO_DICT_NAME],
+                        fileSize,
+                        fingerprint,
+                        json.dumps(info),
+                        JOURNAL_STATE_RECEIVED,
+                        nowTime,
+                    ),
+                )
+                fileInfo[FILE_INFO_DICT_JOURNAL_ID] = cursor.lastrowid
+                return True
+
+            elif (row[1] == JOURNAL_STATE_FAILED) or (
+                fileInfo.get(FILE_INFO_DICT_ID, None) and (row[1] != JOURNAL_STATE_FINISHED)
+            ):
+                # try a file that failed before (or that the broker is redelivering) again
+                self.conn.execute(
+                    'UPDATE files SET info = ?, state = ?, received = ?, started = NULL, finished = NULL, error = NULL WHERE id = ?',
+                    (json.dumps(info), JOURNAL_STATE_RECEIVED, nowTime, row[0]),
+                )
+                fileInfo[FILE_INFO_DICT_JOURNAL_ID] = row[0]
+                return True
+
+            else:
+                return False
+
+    def started(self, fileInfo):
+        if isinstance(fileInfo, dict) and (FILE_INFO_DICT_JOURNAL_ID in fileInfo):
+            with self.lock:
+                self.conn.execute(
+                    'UPDATE files SET state = ?, started = ?, attempts = attempts + 1 WHERE id = ?',
+                    (JOURNAL_STATE_STARTED, time.time(), fileInfo[FILE_INFO_DICT_JOURNAL_ID]),
+                )
+
+    def finished(self, fileInfo, succeeded=True, error=None):
+        if isinstance(fileInfo, dict) and (FILE_INFO_DICT_JOURNAL_ID in fileInfo):
+            with self.lock:
+                self.conn.execute(
+                    'UPDATE files SET state = ?, finished = ?, error = ? WHERE id = ?',
+                    (
+                        JOURNAL_STATE_FINISHED if succeeded else JOURNAL_STATE_FAILED,
+                        time.time(),
+                        error,
+                        fileInfo[FILE_INFO_DICT_JOURNAL_ID],
+                    ),
+                )
+
+    # return the files that were received but not finished (in the order they were received), giving up on
+    #   any that were already being processed JOURNAL_MAX_ATTEMPTS times when the processor stopped
+    def pending(self):
+        with self.lock:
+            self.conn.execute(
+                'UPDATE files SET state = ?, finished = ?, error = ? WHERE kind = ? AND state = ? AND attempts >= ?',
+                (
+                    JOURNAL_STATE_FAILED,
+                    time.time(),
+                    f'interrupted {JOURNAL_MAX_ATTEMPTS} times',
+                    self.kind,
+                    JOURNAL_STATE_STARTED,
+                    JOURNAL_MAX_ATTEMPTS,
+                ),
+            )
+            rows = self.conn.execute(
+                'SELECT id, info FROM files WHERE kind = ? AND state IN (?, ?) ORDER BY id',
+                (self.kind, JOURNAL_STATE_RECEIVED, JOURNAL_STATE_STARTED),
+            ).fetchall()
+
+        fileInfos = []
+        for rowId, info in rows:
+            fileInfo = json.loads(info)
+            fileInfo[FILE_INFO_DICT_JOURNAL_ID] = rowId
+            fileInfos.append(fileInfo)
+        return fileInfos
+
+    # give up on the files that were received but not finished, returning how many there were. with files
+    #   from the broker, the broker hands those to another processor (or back to us) when we go away, so
+    #   we leave them to it rather than resume them ourselves
+    def release(self):
+        with self.lock:
+            return self.conn.execute(
+                'UPDATE files SET state = ?, finished = ?, error = ? WHERE kind = ? AND state IN (?, ?)',
+                (
+                    JOURNAL_STATE_FAILED,
+                    time.time(),
+                    'released to the broker',
+                    self.kind,
+                    JOURNAL_STATE_RECEIVED,
+                    JOURNAL_STATE_STARTED,
+                ),
+            ).rowcount
+
+    # forget about files finished (or failed) more than retentionDays ago
+    def prune(self):
+        if self.retentionDays > 0:
+            with self.lock:
+                return self.conn.execute(
+                    'DELETE FROM files WHERE kind = ? AND state IN (?, ?) AND finished < ?',
+                    (
+                        self.kind,
+                        JOURNAL_STATE_FINISHED,
+                        JOURNAL_STATE_FAILED,
+                        time.time() - self.retentionDays * 86400,
+                    ),
+                ).rowcount
+        return 0
+
+    def stats(self):
+        with self.lock:
+            return dict(
+                self.conn.execute('SELECT state, COUNT(*) FROM files WHERE kind = ? GROUP BY state', (self.kind,))
+            )
@@ -11,15 +11,20 @@
 ###################################################################################################
 
 import argparse
+import heapq
+import itertools
 import json
 import logging
 import os
+import queue
 import re
 import shutil
 import signal
+import subprocess
 import sys
 import tarfile
 import tempfile
+import threading
 import time
 import zmq
 
@@ -31,23 +36,47 @@ from pcap_utils import (
     FILE_INFO_DICT_TAGS,
     FILE_INFO_FILE_MIME,
     FILE_INFO_FILE_TYPE,
+    PCAP_BROKER_PORT,
+    PCAP_DISTRIBUTION_PUBSUB,
+    PCAP_DISTRIBUTION_QUEUE,
     PCAP_MIME_TYPES,
     PCAP_TOPIC_PORT,
     tags_from_filename,
 )
+from pcap_broker import PcapWorkClient
+from pcap_journal import PcapWorkJournal, JOURNAL_DIR_DEFAULT, JOURNAL_RETENTION_DAYS_DEFAULT, journal_file_name
+from pcap_shard import copy_pcap_records, pcap_file_header, zeek_sharded
+from collections import deque
 from malcolm_utils import eprint, str2bool, AtomicInt, run_process, same_file_or_dir
 from multiprocessing.pool import ThreadPool
-from collections import deque
 from itertools import chain, repeat
 
 try:
-    from suricata_socket import SuricataSocketClient
+    from suricata_socket import SuricataSocketClient, SuricataCompletionTracker
 except ModuleNotFoundError:
     # this will blow up later on instantiation, of course
     SuricataSocketClient = object
+    SuricataCompletionTracker = object
+
+try:
+    import zstandard
+except ModuleNotFoundError:
+    zstandard = None
 
 ###################################################################################################
 MAX_WORKER_PROCESSES_DEFAULT = 1
+WORK_QUEUE_SIZE_DEFAULT = 1000
+WORK_QUEUE_GET_TIMEOUT_SEC = 5
+WORK_QUEUE_STATS_MAX_SOURCES = 10
+
+JOURNAL_PRUNE_INTERVAL_SEC = 3600
+WORK_QUEUE_FAIR_BY_NODE = 'node'
+WORK_QUEUE_FAIR_BY_DIRECTORY = 'directory'
+WORK_QUEUE_FAIR_BY_TAGS = 'tags'
+WORK_QUEUE_FAIR_BY_NONE = 'none'
+WORK_QUEUE_ORDER_FIFO = 'fifo'
+WORK_QUEUE_ORDER_SMALLEST = 'smallest'
+WORK_QUEUE_LIVE_SOURCE = 'live'
 
 PCAP_PROCESSING_MODE_ARKIME = "arkime"
 PCAP_PROCESSING_MODE_ZEEK = "zeek"
@@ -74,6 +103,19 @@ ZEEK_STATE_DIR = '.state'
 ZEEK_AUTOZEEK_TAG = 'AUTOZEEK'
 ZEEK_EXTRACTOR_MODE_ENV_VAR = 'ZEEK_EXTRACTOR_MODE'
 ZEEK_LOG_COMPRESSION_LEVEL = 6
+ZEEK_LOG_CODEC_GZIP = 'gzip'
+ZEEK_LOG_CODEC_ZSTD = 'zstd'
+ZEEK_LOG_CODEC_NONE = 'none'
+ZEEK_LOG_CODEC_EXTENSIONS = {
+    ZEEK_LOG_CODEC_GZIP: 'tar.gz',
+    ZEEK_LOG_CODEC_ZSTD: 'tar.zst',
+    ZEEK_LOG_CODEC_NONE: 'tar',
+}
+# archives are written here (under the upload directory, so on the same filesystem, but not in the directory
+#   being watched) and renamed into the upload directory once they're complete
+ZEEK_UPLOAD_STAGING_DIR = '.staging'
+# a libpcap global header (microsecond timestamps, ethernet) with no packets following it
+EMPTY_PCAP_HEADER = b'\xd4\xc3\xb2\xa1\x02\x00\x04\x00' + bytes(8) + b'\xff\xff\x00\x00\x01\x00\x00\x00'
 NETBOX_SITE_ID_TAG_PREFIX = 'NBSITEID'
 USERTAG_TAG = 'USERTAG'
 
@@ -111,12 +153,189 @@ def pdb_handler(sig, frame):
     pdbFlagged = True
 
 
+###################################################################################################
+# a bounded, blocking queue of file info dicts to be processed by the worker threads, which tracks
+# how long each item waits in the queue before a worker picks it up
+class WorkQueue:
+    # Items are held in a queue per source (as determined by classifier(item), which returns the source's
+    #   name and weight), and the sources take turns in proportion to their weights: each time an item is
+    #   removed its source's "pass" advances by 1/weight, and the next item comes from the source with the lowest
+    #   pass. Within a source items are removed in order of arrival or, if sizeOf is provided, smallest first,
+    #   with an item's size handicapped by agingBytesPerSec for each second it arrived after the others (so that
+    #   a large file can't be held back indefinitely by a stream of smaller ones). Each item removed is passed
+    #   to onGet, and workers call done(item, succeeded) when they've finished with it, which is passed along to
+    #   onDone (e.g., to record it in the journal and acknowledge it to the broker).
+    def __init__(self, maxsize=0, classifier=None, sizeOf=None, agingBytesPerSec=0, onGet=None, onDone=None):
+        self.maxsize = max(maxsize, 0)
+        self.onGet = onGet
+        self.onDone = onDone
+        self.classifier = classifier
+        self.sizeOf = sizeOf
+        self.agingBytesPerSec = agingBytesPerSec
+        self.lock = threading.Lock()
+        self.notEmpty = threading.Condition(self.lock)
+        self.notFull = threading.Condition(self.lock)
+        self.sources = {}
+        self.count = 0
+        self.wakeups = 0
+        self.sequence = itertools.count()
+        self.virtualTime = 0.0
+        self.enqueued = 0
+        self.dequeued = 0
+        self.totalWaitSec = 0.0
+        self.maxWaitSec = 0.0
+
+    # add an item, blocking for up to timeout seconds (forever if None) while the queue is full
+    #   (raises queue.Full if it's still full after timeout)
+    def put(self, item, timeout=None):
+        sourceName, weight = self.classifier(item) if self.classifier else (None, 1.0)
+        with self.notFull:
+            deadline = (time.monotonic() + timeout) if (timeout is not None) else None
+            while (self.maxsize > 0) and (self.count >= self.maxsize):
+                remainingSec = (deadline - time.monotonic()) if (deadline is not None) else None
+                if (remainingSec is not None) and (remainingSec <= 0):
+                    raise queue.Full
+                self.notFull.wait(remainingSec)
+
+            source = self.sources.get(sourceName, None)
+            if source is None:
+                # a source that's been idle starts at the current virtual time rather than with banked credit
+                source = self.sources[sourceName] = {'items': [], 'pass': self.virtualTime}
+            source['weight'] = max(weight, 0.001)
+            queuedTime = time.monotonic()
+            sortKey = (self.sizeOf(item) + queuedTime * self.agingBytesPerSec) if self.sizeOf else 0
+            heapq.heappush(source['items'], (sortKey, next(self.sequence), queuedTime, item))
+            self.count += 1
+            self.enqueued += 1
+            self.notEmpty.notify()
+
+    # remove an item, blocking for up to timeout seconds (forever if None) until one is available,
+    #   returning the item and how long (in seconds) it waited in the queue (raises queue.Empty on timeout)
+    def get(self, timeout=None):
+        with self.notEmpty:
+            deadline = (time.monotonic() + timeout) if (timeout is not None) else None
+            while (self.count == 0) and (self.wakeups == 0):
+                remainingSec = (deadline - time.monotonic()) if (deadline is not None) else None
+                if (remainingSec is not None) and (remainingSec <= 0):
+                    raise queue.Empty
+                self.notEmpty.wait(remainingSec)
+
+            if self.wakeups > 0:
+                self.wakeups -= 1
+                return None, 0.0
+
+            sourceName, source = min(self.sources.items(), key=lambda x: x[1]['pass'])
+            _, _, queuedTime, item = heapq.heappop(source['items'])
+            self.virtualTime = source['pass']
+            source['pass'] += 1.0 / source['weight']
+            if not source['items']:
+                del self.sources[sourceName]
+            self.count -= 1
+            self.notFull.notify()
+
+            waitSec = time.monotonic() - queuedTime
+            self.dequeued += 1
+            self.totalWaitSec += waitSec
+            self.maxWaitSec = max(self.maxWaitSec, waitSec)
+        if self.onGet:
+            self.onGet(item)
+        return item, waitSec
+
+    # note that a worker has finished with an item it got from the queue
+    def done(self, item, succeeded=True):
+        if self.onDone and (item is not None):
+            self.onDone(item, succeeded)
+
+    # wake up to count waiting workers (e.g., so they notice we're shutting down)
+    def wake(self, count):
+        with self.notEmpty:
+            self.wakeups += count
+            self.notEmpty.notify(count)
+
+    def depth(self):
+        with self.lock:
+            return self.count
+
+    # how many more items the queue can take right now (None if it's unbounded)
+    def room(self):
+        with self.lock:
+            return max(self.maxsize - self.count, 0) if (self.maxsize > 0) else None
+
+    # return the queue statistics, resetting the maximum wait time
+    def stats(self):
+        with self.lock:
+            result = {
+                'depth': self.count,
+                'capacity': self.maxsize,
+                'enqueued': self.enqueued,
+                'dequeued': self.dequeued,
+                'avg_wait_sec': round(self.totalWaitSec / self.dequeued, 3) if self.dequeued else 0.0,
+                'max_wait_sec': round(self.maxWaitSec, 3),
+            }
+            if (len(self.sources) > 1) or any(name is not None for name in self.sources):
+                result['sources'] = dict(
+                    sorted(
+                        ((str(name), len(source['items'])) for name, source in self.sources.items()),
+                        key=lambda x: x[1],
+                        reverse=True,
+                    )[:WORK_QUEUE_STATS_MAX_SOURCES]
+                )
+            self.maxWaitSec = 0.0
+        return result
+
+
+###################################################################################################
+# return a WorkQueue classifier assigning each file to a source according to fairBy, except for files from live
+#   capture, which share a source of their own weighted by liveWeight (relative to 1 for each of the others)
+def file_info_classifier(fairBy, liveWeight):
+    def _classify(fileInfo):
+        if fileInfo.get(FILE_INFO_DICT_LIVE, False):
+            return WORK_QUEUE_LIVE_SOURCE, liveWeight
+        elif fairBy == WORK_QUEUE_FAIR_BY_NODE:
+            return f"node:{fileInfo.get(FILE_INFO_DICT_NODE, '')}", 1.0
+        elif fairBy == WORK_QUEUE_FAIR_BY_DIRECTORY:
+            return f"directory:{os.path.dirname(fileInfo.get(FILE_INFO_DICT_NAME, ''))}", 1.0
+        elif fairBy == WORK_QUEUE_FAIR_BY_TAGS:
+            return f"tags:{','.join(sorted(fileInfo.get(FILE_INFO_DICT_TAGS, None) or []))}", 1.0
+        else:
+            return None, 1.0
+
+    return _classify
+
+
+def file_info_size(fileInfo):
+    return fileInfo.get(FILE_INFO_DICT_SIZE, 0) or 0
+
+
+###################################################################################################
+# build the command line for Arkime capture to process one or more PCAP files (in order) with the same node and tags
+def arkime_capture_command(arkimeBin, pcapFiles, nodeName=None, nodeHost=None, notLocked=False, tags=None):
+    cmd = [
+        arkimeBin,
+        '--quiet',
+        '--insecure',
+        '-o',
+        f'ecsEventProvider={arkimeProvider}',
+        '-o',
+        f'ecsEventDataset={arkimeDataset}',
+    ]
+    cmd.extend(list(chain.from_iterable(zip(repeat('-r'), pcapFiles))))
+    if nodeName:
+        cmd.append('--node')
+        cmd.append(nodeName)
+    if nodeHost:
+        cmd.append('--host')
+        cmd.append(nodeHost)
+    if notLocked:
+        cmd.append('--nolockpcap')
+    cmd.extend(list(chain.from_iterable(zip(repeat('-t'), tags or []))))
+    return cmd
+
+
 ###################################################################################################
 def arkimeCaptureFileWorker(arkimeWorkerArgs):
     global shuttingDown
     global workersCount
-    global arkimeProvider
-    global arkimeDataset
 
     workerId = workersCount.increment()  # unique ID for this thread
 
@@ -131,6 +350,9 @@ def arkimeCaptureFileWorker(arkimeWorkerArgs):
         extraTags,
         autoTag,
         notLocked,
+        batchSize,
+        batchMaxBytes,
+        batchWaitSec,
         logger,
         debug,
     ) = (
@@ -146,6 +368,9 @@ def arkimeCaptureFileWorker(arkimeWorkerArgs):
         arkimeWorkerArgs[9],
         arkimeWorkerArgs[10],
         arkimeWorkerArgs[11],
+        arkimeWorkerArgs[12],
+        arkimeWorkerArgs[13],
+        arkimeWorkerArgs[14],
     )
 
     if not logger:
@@ -153,93 +378,227 @@ def arkimeCaptureFileWorker(arkimeWorkerArgs):
 
     logger.info(f"{scriptName}[{workerId}]:\tstarted")
 
+    # returns fileInfo, with its path and tags finalized, if it's a PCAP file Arkime should capture (or None otherwise)
+    def _arkime_file_info(fileInfo):
+        if isinstance(fileInfo, dict) and (FILE_INFO_DICT_NAME in fileInfo):
+            if pcapBaseDir and os.path.isdir(pcapBaseDir):
+                fileInfo[FILE_INFO_DICT_NAME] = os.path.join(pcapBaseDir, fileInfo[FILE_INFO_DICT_NAME])
+
+            if os.path.isfile(fileInfo[FILE_INFO_DICT_NAME]):
+                # Arkime this PCAP if it's tagged "AUTOARKIME" or if the global autoArkime flag is turned on.
+                if (
+                    autoArkime
+                    or ((FILE_INFO_DICT_TAGS in fileInfo) and ARKIME_AUTOARKIME_TAG in fileInfo[FILE_INFO_DICT_TAGS])
+                ) and (
+                    forceArkime
+                    or (
+                        not any(
+                            os.path.basename(fileInfo[FILE_INFO_DICT_NAME]).startswith(prefix)
+                            for prefix in ('mnetsniff', 'mtcpdump')
+                        )
+                    )
+                ):
+                    # finalize tags list
+                    fileInfo[FILE_INFO_DICT_TAGS] = (
+                        [
+                            x
+                            for x in fileInfo[FILE_INFO_DICT_TAGS]
+                            if (x not in TAGS_NOSHOW) and (not x.startswith(NETBOX_SITE_ID_TAG_PREFIX))
+                        ]
+                        if ((FILE_INFO_DICT_TAGS in fileInfo) and autoTag)
+                        else list()
+                    )
+                    if extraTags and isinstance(extraTags, list):
+                        fileInfo[FILE_INFO_DICT_TAGS].extend(extraTags)
+                    fileInfo[FILE_INFO_DICT_TAGS] = list(dict.fromkeys(fileInfo[FILE_INFO_DICT_TAGS]))
+                    logger.info(f"{scriptName}[{workerId}]:\t🔎\t{fileInfo}")
+                    return fileInfo
+
+        return None
+
+    # pull an item from the queue of files that need to be processed (blocking for up to timeout seconds until there is one)
+    def _next_arkime_file(timeout):
+        try:
+            fileInfo, waitSec = newFileQueue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        logger.debug(f"{scriptName}[{workerId}]:\t🕑\t{waitSec:.3f}s queued")
+        arkimeFileInfo = _arkime_file_info(fileInfo)
+        if not arkimeFileInfo:
+            # nothing for arkime to do with this one
+            newFileQueue.done(fileInfo)
+        return arkimeFileInfo
+
+    # if this is an uploaded PCAP (not captured "live"") append -upload to the node name used (which originates
+    #   from PCAP_NODE_NAME)
+    def _arkime_node_name(fileInfo):
+        tmpNodeName = fileInfo[FILE_INFO_DICT_NODE] if (FILE_INFO_DICT_NODE in fileInfo) else nodeName
+        if tmpNodeName and ((not (FILE_INFO_DICT_LIVE in fileInfo)) or (not fileInfo[FILE_INFO_DICT_LIVE])):
+            tmpNodeName = tmpNodeName + '-upload'
+        return tmpNodeName
+
+    # files may be captured together by one arkime process if they'll be recorded with the same node and tags
+    def _arkime_batch_key(fileInfo):
+        return (_arkime_node_name(fileInfo), tuple(fileInfo[FILE_INFO_DICT_TAGS]))
+
+    def _file_size(fileInfo):
+        try:
+            return os.path.getsize(fileInfo[FILE_INFO_DICT_NAME])
+        except OSError:
+            return 0
+
+    # files pulled from the queue while assembling a batch that didn't belong in it, to be processed next
+    deferredFiles = deque()
+
     # loop forever, or until we're told to shut down
     while not shuttingDown:
-        try:
-            # pull an item from the queue of files that need to be processed
-            fileInfo = newFileQueue.popleft()
-        except IndexError:
-            time.sleep(1)
+        fileInfo = deferredFiles.popleft() if deferredFiles else _next_arkime_file(WORK_QUEUE_GET_TIMEOUT_SEC)
+        if not fileInfo:
+            continue
+
+        # when batching, gather other files that can be captured along with this one by a single arkime process,
+        #   waiting up to batchWaitSec for them to arrive
+        batch = [fileInfo]
+        batchKey = _arkime_batch_key(fileInfo)
+        batchBytes = _file_size(fileInfo)
+        if batchSize > 1:
+            deadline = time.monotonic() + batchWaitSec
+            while (len(batch) < batchSize) and (batchBytes < batchMaxBytes) and (not shuttingDown):
+                if deferredFiles:
+                    nextFileInfo = deferredFiles.popleft()
+                else:
+                    remainingSec = deadline - time.monotonic()
+                    nextFileInfo = _next_arkime_file(remainingSec) if (remainingSec > 0) else None
+                    if not nextFileInfo:
+                        if remainingSec > 0:
+                            continue
+                        break
+                nextBytes = _file_size(nextFileInfo)
+                if (_arkime_batch_key(nextFileInfo) != batchKey) or (batchBytes + nextBytes > batchMaxBytes):
+                    # this one will have to wait for the next go-round
+                    deferredFiles.appendleft(nextFileInfo)
+                    break
+                batch.append(nextFileInfo)
+                batchBytes += nextBytes
+
+        batchName = os.path.basename(batch[0][FILE_INFO_DICT_NAME]) + (
+            f" (+{len(batch) - 1} more)" if (len(batch) > 1) else ''
+        )
+        if len(batch) > 1:
+            logger.info(f"{scriptName}[{workerId}]:\t📚\t{batchName}")
+
+        # execute capture for pcap file(s)
+        startTime = time.monotonic()
+        retcode, output = run_process(
+            arkime_capture_command(
+                arkimeBin,
+                [x[FILE_INFO_DICT_NAME] for x in batch],
+                nodeName=batchKey[0],
+                nodeHost=nodeHost,
+                notLocked=notLocked,
+                tags=batch[0][FILE_INFO_DICT_TAGS],
+            ),
+            logger=logger,
+        )
+        elapsedSec = time.monotonic() - startTime
+        if retcode == 0:
+            logger.info(
+                f"{scriptName}[{workerId}]:\t✅\t{batchName} {elapsedSec:.2f}s"
+                + (f" ({len(batch) / elapsedSec:.1f} files/s)" if (len(batch) > 1) and (elapsedSec > 0) else '')
+            )
         else:
-            if isinstance(fileInfo, dict) and (FILE_INFO_DICT_NAME in fileInfo):
-                if pcapBaseDir and os.path.isdir(pcapBaseDir):
-                    fileInfo[FILE_INFO_DICT_NAME] = os.path.join(pcapBaseDir, fileInfo[FILE_INFO_DICT_NAME])
+            logger.warning(f"{scriptName}[{workerId}]:\t❗\t{arkimeBin} {batchName} returned {retcode} {output}")
 
-                if os.path.isfile(fileInfo[FILE_INFO_DICT_NAME]):
-                    # Arkime this PCAP if it's tagged "AUTOARKIME" or if the global autoArkime flag is turned on.
-                    if (
-                        autoArkime
-                        or (
-                            (FILE_INFO_DICT_TAGS in fileInfo) and ARKIME_AUTOARKIME_TAG in fileInfo[FILE_INFO_DICT_TAGS]
-                        )
-                    ) and (
-                        forceArkime
-                        or (
-                            not any(
-                                os.path.basename(fileInfo[FILE_INFO_DICT_NAME]).startswith(prefix)
-                                for prefix in ('mnetsniff', 'mtcpdump')
-                            )
-                        )
-                    ):
-                        # finalize tags list
-                        fileInfo[FILE_INFO_DICT_TAGS] = (
-                            [
-                                x
-                                for x in fileInfo[FILE_INFO_DICT_TAGS]
-                                if (x not in TAGS_NOSHOW) and (not x.startswith(NETBOX_SITE_ID_TAG_PREFIX))
-                            ]
-                            if ((FILE_INFO_DICT_TAGS in fileInfo) and autoTag)
-                            else list()
-                        )
-                        if extraTags and isinstance(extraTags, list):
-                            fileInfo[FILE_INFO_DICT_TAGS].extend(extraTags)
-                        fileInfo[FILE_INFO_DICT_TAGS] = list(dict.fromkeys(fileInfo[FILE_INFO_DICT_TAGS]))
-                        logger.info(f"{scriptName}[{workerId}]:\t🔎\t{fileInfo}")
-
-                        # if this is an uploaded PCAP (not captured "live"")
-                        #   append -upload to the node name used (which originates from PCAP_NODE_NAME)
-                        tmpNodeName = fileInfo[FILE_INFO_DICT_NODE] if (FILE_INFO_DICT_NODE in fileInfo) else nodeName
-                        if tmpNodeName and (
-                            (not (FILE_INFO_DICT_LIVE in fileInfo)) or (not fileInfo[FILE_INFO_DICT_LIVE])
-                        ):
-                            tmpNodeName = tmpNodeName + '-upload'
-
-                        # put together arkime execution command
-                        cmd = [
-                            arkimeBin,
-                            '--quiet',
-                            '--insecure',
-                            '-o',
-                            f'ecsEventProvider={arkimeProvider}',
-                            '-o',
-                            f'ecsEventDataset={arkimeDataset}',
-                            '-r',
-                            fileInfo[FILE_INFO_DICT_NAME],
-                        ]
-                        if tmpNodeName:
-                            cmd.append('--node')
-                            cmd.append(tmpNodeName)
-                        if nodeHost:
-                            cmd.append('--host')
-                            cmd.append(nodeHost)
-                        if notLocked:
-                            cmd.append('--nolockpcap')
-                        cmd.extend(list(chain.from_iterable(zip(repeat('-t'), fileInfo[FILE_INFO_DICT_TAGS]))))
-
-                        # execute capture for pcap file
-                        retcode, output = run_process(cmd, logger=logger)
-                        if retcode == 0:
-                            logger.info(
-                                f"{scriptName}[{workerId}]:\t✅\t{os.path.basename(fileInfo[FILE_INFO_DICT_NAME])}"
-                            )
-                        else:
-                            logger.warning(
-                                f"{scriptName}[{workerId}]:\t❗\t{arkimeBin} {os.path.basename(fileInfo[FILE_INFO_DICT_NAME])} returned {retcode} {output}"
-                            )
+        for fileInfo in batch:
+            newFileQueue.done(fileInfo, retcode == 0)
 
     logger.info(f"{scriptName}[{workerId}]:\tfinished")
 
 
+###################################################################################################
+# write a tar archive of the contents of logDir directly into destDir as archiveName. The archive is written
+#   under a temporary name in a staging directory on the same filesystem and atomically renamed into place when
+#   complete, so that whatever is watching destDir never sees a partial file.
+def write_log_archive(
+    logDir, destDir, archiveName, codec=ZEEK_LOG_CODEC_GZIP, compressLevel=ZEEK_LOG_COMPRESSION_LEVEL
+):
+    stagingDir = os.path.join(destDir, ZEEK_UPLOAD_STAGING_DIR)
+    os.makedirs(stagingDir, exist_ok=True)
+    tmpFd, tmpFileName = tempfile.mkstemp(dir=stagingDir, prefix=f'{archiveName}.', suffix='.partial')
+    try:
+        with os.fdopen(tmpFd, 'wb') as archiveFile:
+            if codec == ZEEK_LOG_CODEC_ZSTD:
+                with zstandard.ZstdCompressor(level=compressLevel).stream_writer(
+                    archiveFile, closefd=False
+                ) as zstdWriter:
+                    with tarfile.open(fileobj=zstdWriter, mode='w|') as tar:
+                        tar.add(logDir, arcname=os.path.basename('.'))
+            elif codec == ZEEK_LOG_CODEC_NONE:
+                with tarfile.open(fileobj=archiveFile, mode='w') as tar:
+                    tar.add(logDir, arcname=os.path.basename('.'))
+            else:
+                with tarfile.open(fileobj=archiveFile, mode='w:gz', compresslevel=compressLevel) as tar:
+                    tar.add(logDir, arcname=os.path.basename('.'))
+        os.chmod(tmpFileName, 0o644)
+        archiveFileName = os.path.join(destDir, archiveName)
+        os.replace(tmpFileName, archiveFileName)
+    except Exception:
+        if os.path.isfile(tmpFileName):
+            os.unlink(tmpFileName)
+        raise
+    return archiveFileName
+
+
+###################################################################################################
+# run a single zeek process over several classic libpcap files (which must share the same global header) by
+#   streaming their packet records, one file after another, to its standard input. Returns (retcode, output, feedSec)
+#   where feedSec is the time spent feeding each file to zeek.
+def run_zeek_stream(zeekBin, pcapFiles, zeekScripts, cwd, env=None):
+    feedSec = []
+    with tempfile.TemporaryFile() as outputFile:
+        process = subprocess.Popen(
+            [zeekBin, "-r", "-"] + zeekScripts,
+            stdin=subprocess.PIPE,
+            stdout=outputFile,
+            stderr=subprocess.STDOUT,
+            cwd=cwd,
+            env=env,
+        )
+        try:
+            for idx, (pcapFile, globalHeader, endian) in enumerate(pcapFiles):
+                startTime = time.monotonic()
+                if idx == 0:
+                    process.stdin.write(globalHeader)
+                with open(pcapFile, 'rb', buffering=1024 * 1024) as inFile:
+                    copy_pcap_records(inFile, process.stdin, endian)
+                feedSec.append(time.monotonic() - startTime)
+            process.stdin.close()
+        except BrokenPipeError:
+            # zeek exited early, which its return code will reflect
+            pass
+        retcode = process.wait()
+        outputFile.seek(0)
+        output = outputFile.read().decode(sys.getdefaultencoding(), errors='replace').split('\n')
+    return retcode, output, feedSec
+
+
+###################################################################################################
+# measure how long zeek takes to start (load and initialize its scripts) and finish with no traffic at all,
+#   which is the fixed per-process overhead that analyzing several PCAP files in one process avoids
+def zeek_startup_sec(zeekBin, zeekScripts, env=None):
+    with tempfile.TemporaryDirectory() as tmpDir:
+        startTime = time.monotonic()
+        process = subprocess.run(
+            [zeekBin, "-r", "-"] + zeekScripts,
+            input=EMPTY_PCAP_HEADER,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=tmpDir,
+            env=env,
+        )
+        return (time.monotonic() - startTime) if (process.returncode == 0) else None
+
+
 ###################################################################################################
 def zeekFileWorker(zeekWorkerArgs):
     global shuttingDown
@@ -257,6 +616,14 @@ def zeekFileWorker(zeekWorkerArgs):
         autoTag,
         uploadDir,
         defaultExtractFileMode,
+        shardThresholdBytes,
+        shardCount,
+        shardDir,
+        logCodec,
+        logCompressLevel,
+        batchSize,
+        batchMaxBytes,
+        batchWaitSec,
         logger,
         debug,
     ) = (
@@ -271,6 +638,14 @@ def zeekFileWorker(zeekWorkerArgs):
         zeekWorkerArgs[8],
         zeekWorkerArgs[9],
         zeekWorkerArgs[10],
+        zeekWorkerArgs[11],
+        zeekWorkerArgs[12],
+        zeekWorkerArgs[13],
+        zeekWorkerArgs[14],
+        zeekWorkerArgs[15],
+        zeekWorkerArgs[16],
+        zeekWorkerArgs[17],
+        zeekWorkerArgs[18],
     )
 
     if not logger:
@@ -278,114 +653,261 @@ def zeekFileWorker(zeekWorkerArgs):
 
     logger.info(f"{scriptName}[{workerId}]:\tstarted")
 
+    # returns fileInfo, with its path and tags finalized, if it's a PCAP file Zeek should analyze (or None otherwise)
+    def _zeek_file_info(fileInfo):
+        if isinstance(fileInfo, dict) and (FILE_INFO_DICT_NAME in fileInfo) and os.path.isdir(uploadDir):
+            if pcapBaseDir and os.path.isdir(pcapBaseDir):
+                fileInfo[FILE_INFO_DICT_NAME] = os.path.join(pcapBaseDir, fileInfo[FILE_INFO_DICT_NAME])
+
+            if os.path.isfile(fileInfo[FILE_INFO_DICT_NAME]):
+                # Zeek this PCAP if it's tagged "AUTOZEEK" or if the global autoZeek flag is turned on.
+                # However, skip "live" PCAPs Malcolm is capturing and rotating through for Arkime capture,
+                # as Zeek now does its own network capture in Malcolm standalone mode.
+                if (
+                    autoZeek
+                    or ((FILE_INFO_DICT_TAGS in fileInfo) and ZEEK_AUTOZEEK_TAG in fileInfo[FILE_INFO_DICT_TAGS])
+                ) and (
+                    forceZeek
+                    or (
+                        not any(
+                            os.path.basename(fileInfo[FILE_INFO_DICT_NAME]).startswith(prefix)
+                            for prefix in ('mnetsniff', 'mtcpdump')
+                        )
+                    )
+                ):
+                    # finalize tags list
+                    fileInfo[FILE_INFO_DICT_TAGS] = (
+                        [x for x in fileInfo[FILE_INFO_DICT_TAGS] if (x not in TAGS_NOSHOW)]
+                        if ((FILE_INFO_DICT_TAGS in fileInfo) and autoTag)
+                        else list()
+                    )
+                    if extraTags and isinstance(extraTags, list):
+                        fileInfo[FILE_INFO_DICT_TAGS].extend(extraTags)
+                    fileInfo[FILE_INFO_DICT_TAGS] = list(dict.fromkeys(fileInfo[FILE_INFO_DICT_TAGS]))
+                    logger.info(f"{scriptName}[{workerId}]:\t🔎\t{fileInfo}")
+                    return fileInfo
+
+        return None
+
+    # pull an item from the queue of files that need to be processed (blocking for up to timeout seconds until there is one)
+    def _next_zeek_file(timeout):
+        try:
+            fileInfo, waitSec = newFileQueue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        logger.debug(f"{scriptName}[{workerId}]:\t🕑\t{waitSec:.3f}s queued")
+        zeekFileInfo = _zeek_file_info(fileInfo)
+        if not zeekFileInfo:
+            # nothing for zeek to do with this one
+            newFileQueue.done(fileInfo)
+        return zeekFileInfo
+
+    # files may be analyzed together by one zeek process if they're small classic libpcap files with identical global
+    #   headers, node, live flag, tags and file name-derived tags (as the archive of their logs will be named for the
+    #   first of them). Returns the key files are batched on and the details needed to stream them (size, global header,
+    #   endianness and the times of the first and last packets), or (None, None) if it can't be batched.
+    def _zeek_batch_key(fileInfo):
+        try:
+            fileSize = os.path.getsize(fileInfo[FILE_INFO_DICT_NAME])
+            if (fileSize > batchMaxBytes) or ((shardThresholdBytes > 0) and (fileSize >= shardThresholdBytes)):
+                return None, None
+            header = pcap_file_header(fileInfo[FILE_INFO_DICT_NAME])
+        except OSError:
+            return None, None
+        if not header:
+            return None, None
+        globalHeader, endian, firstPacketTime, lastPacketTime = header
+        return (
+            globalHeader,
+            fileInfo.get(FILE_INFO_DICT_NODE, ''),
+            bool(fileInfo.get(FILE_INFO_DICT_LIVE, False)),
+            tuple(fileInfo[FILE_INFO_DICT_TAGS]),
+            tuple(tags_from_filename(os.path.basename(fileInfo[FILE_INFO_DICT_NAME]))),
+        ), (fileSize, globalHeader, endian, firstPacketTime, lastPacketTime)
+
+    # zeek sees a batch's packets as a single stream in order of each file's first packet, so a file can only join
+    #   a batch if none of its packets fall within the time span of a file already in it (otherwise time would run
+    #   backwards in the middle of the stream)
+    def _zeek_batch_overlaps(batchDetails, details):
+        return any((details[3] < otherDetails[4]) and (otherDetails[3] < details[4]) for otherDetails in batchDetails)
+
+    # files pulled from the queue while assembling a batch that didn't belong in it, to be processed next
+    deferredFiles = deque()
+
+    # the fixed cost of a zeek process with each set of scripts, measured (when batching) for reporting
+    startupSec = {}
+
     # loop forever, or until we're told to shut down
     while not shuttingDown:
-        try:
-            # pull an item from the queue of files that need to be processed
-            fileInfo = newFileQueue.popleft()
-        except IndexError:
-            time.sleep(1)
-        else:
-            if isinstance(fileInfo, dict) and (FILE_INFO_DICT_NAME in fileInfo) and os.path.isdir(uploadDir):
-                if pcapBaseDir and os.path.isdir(pcapBaseDir):
-                    fileInfo[FILE_INFO_DICT_NAME] = os.path.join(pcapBaseDir, fileInfo[FILE_INFO_DICT_NAME])
+        fileInfo = deferredFiles.popleft() if deferredFiles else _next_zeek_file(WORK_QUEUE_GET_TIMEOUT_SEC)
+        if not fileInfo:
+            continue
 
-                if os.path.isfile(fileInfo[FILE_INFO_DICT_NAME]):
-                    # Zeek this PCAP if it's tagged "AUTOZEEK" or if the global autoZeek flag is turned on.
-                    # However, skip "live" PCAPs Malcolm is capturing and rotating through for Arkime capture,
-                    # as Zeek now does its own network capture in Malcolm standalone mode.
-                    if (
-                        autoZeek
-                        or ((FILE_INFO_DICT_TAGS in fileInfo) and ZEEK_AUTOZEEK_TAG in fileInfo[FILE_INFO_DICT_TAGS])
-                    ) and (
-                        forceZeek
-                        or (
-                            not any(
-                                os.path.basename(fileInfo[FILE_INFO_DICT_NAME]).startswith(prefix)
-                                for prefix in ('mnetsniff', 'mtcpdump')
-                            )
+        # when batching, gather other files that can be analyzed along with this one by a single zeek process,
+        #   waiting up to batchWaitSec for them to arrive
+        batch = [fileInfo]
+        batchDetails = [None]
+        batchKey, details = _zeek_batch_key(fileInfo) if (batchSize > 1) else (None, None)
+        if batchKey:
+            batchDetails = [details]
+            batchBytes = details[0]
+            deadline = time.monotonic() + batchWaitSec
+            while (len(batch) < batchSize) and (batchBytes < batchMaxBytes) and (not shuttingDown):
+                if deferredFiles:
+                    nextFileInfo = deferredFiles.popleft()
+                else:
+                    remainingSec = deadline - time.monotonic()
+                    nextFileInfo = _next_zeek_file(remainingSec) if (remainingSec > 0) else None
+                    if not nextFileInfo:
+                        if remainingSec > 0:
+                            continue
+                        break
+                nextKey, nextDetails = _zeek_batch_key(nextFileInfo)
+                if (
+                    (nextKey != batchKey)
+                    or (batchBytes + nextDetails[0] > batchMaxBytes)
+                    or _zeek_batch_overlaps(batchDetails, nextDetails)
+                ):
+                    # this one will have to wait for the next go-round
+                    deferredFiles.appendleft(nextFileInfo)
+                    break
+                batch.append(nextFileInfo)
+                batchDetails.append(nextDetails)
+                batchBytes += nextDetails[0]
+            if len(batch) > 1:
+                # zeek should see the packets in chronological order
+                batch, batchDetails = map(list, zip(*sorted(zip(batch, batchDetails), key=lambda x: x[1][3])))
+
+        batchName = os.path.basename(batch[0][FILE_INFO_DICT_NAME]) + (
+            f" (+{len(batch) - 1} more)" if (len(batch) > 1) else ''
+        )
+        extractFileMode = defaultExtractFileMode
+        extractFileMode = extractFileMode.lower() if extractFileMode else ZEEK_EXTRACTOR_MODE_NONE
+        succeeded = False
+
+        # create a temporary work directory where zeek will be executed to generate the log files
+        with tempfile.TemporaryDirectory() as tmpLogDir:
+            if os.path.isdir(tmpLogDir):
+                processTimeUsec = int(round(time.time() * 1000000))
+
+                # use Zeek to process the pcap
+                zeekScripts = [ZEEK_LOCAL_SCRIPT]
+
+                # set file extraction parameters if required
+                if extractFileMode != ZEEK_EXTRACTOR_MODE_NONE:
+                    zeekScripts.append(ZEEK_EXTRACTOR_SCRIPT)
+                    if extractFileMode == ZEEK_EXTRACTOR_MODE_INTERESTING:
+                        zeekScripts.append(ZEEK_EXTRACTOR_SCRIPT_INTERESTING)
+                        extractFileMode = ZEEK_EXTRACTOR_MODE_MAPPED
+
+                # execute zeek with the cwd of tmpLogDir so that's where the logs go, and with the updated file carving environment variable
+                zeekEnv = os.environ.copy()
+                zeekEnv[ZEEK_EXTRACTOR_MODE_ENV_VAR] = extractFileMode
+                if (batchSize > 1) and (tuple(zeekScripts) not in startupSec):
+                    startupSec[tuple(zeekScripts)] = zeek_startup_sec(zeekBin, zeekScripts, env=zeekEnv)
+                    logger.info(
+                        f"{scriptName}[{workerId}]:\t⏱\tzeek startup with {zeekScripts}: {startupSec[tuple(zeekScripts)] or 0:.2f}s"
+                    )
+
+                startTime = time.monotonic()
+                feedSec = None
+                if len(batch) > 1:
+                    # several small PCAPs: stream them all through a single zeek process
+                    logger.info(f"{scriptName}[{workerId}]:\t📚\t{batchName}")
+                    try:
+                        retcode, output, feedSec = run_zeek_stream(
+                            zeekBin,
+                            [
+                                (fileInfo[FILE_INFO_DICT_NAME], details[1], details[2])
+                                for fileInfo, details in zip(batch, batchDetails)
+                            ],
+                            zeekScripts,
+                            tmpLogDir,
+                            env=zeekEnv,
+                        )
+                    except Exception as e:
+                        retcode, output = -1, [str(e)]
+                elif (
+                    (shardCount > 1)
+                    and (shardThresholdBytes > 0)
+                    and (os.path.getsize(fileInfo[FILE_INFO_DICT_NAME]) >= shardThresholdBytes)
+                ):
+                    # large PCAP: split it at flow boundaries and run a zeek process on each shard concurrently,
+                    #   merging the logs from each into tmpLogDir
+                    logger.info(
+                        f"{scriptName}[{workerId}]:\t🔀\t{os.path.basename(fileInfo[FILE_INFO_DICT_NAME])} ({shardCount} shards)"
+                    )
+                    try:
+                        retcode, output = zeek_sharded(
+                            zeekBin,
+                            fileInfo[FILE_INFO_DICT_NAME],
+                            zeekScripts,
+                            tmpLogDir,
+                            shardCount,
+                            env=zeekEnv,
+                            workDir=shardDir,
+                            logger=logger,
+                        )
+                    except Exception as e:
+                        retcode, output = -1, [str(e)]
+                else:
+                    zeekCmd = [zeekBin, "-r", fileInfo[FILE_INFO_DICT_NAME], zeekScripts]
+                    retcode, output = run_process(zeekCmd, cwd=tmpLogDir, env=zeekEnv, logger=logger)
+                elapsedSec = time.monotonic() - startTime
+
+                if retcode == 0:
+                    # report the time spent, and how much of it was zeek's fixed startup cost (if we know it)
+                    zeekStartupSec = startupSec.get(tuple(zeekScripts), None)
+                    timing = f"{elapsedSec:.2f}s"
+                    if zeekStartupSec is not None:
+                        timing += (
+                            f" ({zeekStartupSec:.2f}s startup, {max(elapsedSec - zeekStartupSec, 0):.2f}s processing"
                         )
-                    ):
-                        extractFileMode = defaultExtractFileMode
-                        extractFileMode = extractFileMode.lower() if extractFileMode else ZEEK_EXTRACTOR_MODE_NONE
-
-                        # finalize tags list
-                        fileInfo[FILE_INFO_DICT_TAGS] = (
-                            [x for x in fileInfo[FILE_INFO_DICT_TAGS] if (x not in TAGS_NOSHOW)]
-                            if ((FILE_INFO_DICT_TAGS in fileInfo) and autoTag)
-                            else list()
+                        if len(batch) > 1:
+                            timing += f"; {zeekStartupSec * (len(batch) - 1):.2f}s startup saved"
+                        timing += ")"
+                    logger.info(f"{scriptName}[{workerId}]:\t✅\t{batchName} {timing}")
+                    if feedSec:
+                        for fileInfo, fileFeedSec in zip(batch, feedSec):
+                            logger.debug(
+                                f"{scriptName}[{workerId}]:\t⏱\t{os.path.basename(fileInfo[FILE_INFO_DICT_NAME])} {fileFeedSec:.2f}s"
+                            )
+                else:
+                    logger.info(f"{scriptName}[{workerId}]:\t❗\t{zeekBin} {batchName} returned {retcode} {output}")
+
+                # clean up the .state directory we don't care to keep
+                tmpStateDir = os.path.join(tmpLogDir, ZEEK_STATE_DIR)
+                if os.path.isdir(tmpStateDir):
+                    shutil.rmtree(tmpStateDir)
+
+                # make sure log files were generated
+                logFiles = [logFile for logFile in os.listdir(tmpLogDir) if logFile.endswith('.log')]
+                if len(logFiles) > 0:
+                    # tar up the results, streaming the archive directly into the upload directory
+                    archiveName = "{}-{}-{}.{}".format(
+                        os.path.basename(batch[0][FILE_INFO_DICT_NAME]),
+                        '_'.join(batch[0][FILE_INFO_DICT_TAGS]),
+                        processTimeUsec,
+                        ZEEK_LOG_CODEC_EXTENSIONS[logCodec],
+                    )
+                    try:
+                        archiveFileName = write_log_archive(
+                            tmpLogDir, uploadDir, archiveName, logCodec, logCompressLevel
                         )
-                        if extraTags and isinstance(extraTags, list):
-                            fileInfo[FILE_INFO_DICT_TAGS].extend(extraTags)
-                        fileInfo[FILE_INFO_DICT_TAGS] = list(dict.fromkeys(fileInfo[FILE_INFO_DICT_TAGS]))
-                        logger.info(f"{scriptName}[{workerId}]:\t🔎\t{fileInfo}")
-
-                        # create a temporary work directory where zeek will be executed to generate the log files
-                        with tempfile.TemporaryDirectory() as tmpLogDir:
-                            if os.path.isdir(tmpLogDir):
-                                processTimeUsec = int(round(time.time() * 1000000))
-
-                                # use Zeek to process the pcap
-                                zeekCmd = [zeekBin, "-r", fileInfo[FILE_INFO_DICT_NAME], ZEEK_LOCAL_SCRIPT]
-
-                                # set file extraction parameters if required
-                                if extractFileMode != ZEEK_EXTRACTOR_MODE_NONE:
-                                    zeekCmd.append(ZEEK_EXTRACTOR_SCRIPT)
-                                    if extractFileMode == ZEEK_EXTRACTOR_MODE_INTERESTING:
-                                        zeekCmd.append(ZEEK_EXTRACTOR_SCRIPT_INTERESTING)
-                                        extractFileMode = ZEEK_EXTRACTOR_MODE_MAPPED
-
-                                # execute zeek with the cwd of tmpLogDir so that's where the logs go, and with the updated file carving environment variable
-                                zeekEnv = os.environ.copy()
-                                zeekEnv[ZEEK_EXTRACTOR_MODE_ENV_VAR] = extractFileMode
-                                retcode, output = run_process(zeekCmd, cwd=tmpLogDir, env=zeekEnv, logger=logger)
-                                if retcode == 0:
-                                    logger.info(
-                                        f"{scriptName}[{workerId}]:\t✅\t{os.path.basename(fileInfo[FILE_INFO_DICT_NAME])}"
-                                    )
-                                else:
-                                    logger.info(
-                                        f"{scriptName}[{workerId}]:\t❗\t{zeekBin} {os.path.basename(fileInfo[FILE_INFO_DICT_NAME])} returned {retcode} {output}"
-                                    )
-
-                                # clean up the .state directory we don't care to keep
-                                tmpStateDir = os.path.join(tmpLogDir, ZEEK_STATE_DIR)
-                                if os.path.isdir(tmpStateDir):
-                                    shutil.rmtree(tmpStateDir)
-
-                                # make sure log files were generated
-                                logFiles = [logFile for logFile in os.listdir(tmpLogDir) if logFile.endswith('.log')]
-                                if len(logFiles) > 0:
-                                    # tar up the results
-                                    tgzFileName = os.path.join(
-                                        tmpLogDir,
-                                        "{}-{}-{}.tar.gz".format(
-                                            os.path.basename(fileInfo[FILE_INFO_DICT_NAME]),
-                                            '_'.join(fileInfo[FILE_INFO_DICT_TAGS]),
-                                            processTimeUsec,
-                                        ),
-                                    )
-                                    with tarfile.open(
-                                        tgzFileName, mode="w:gz", compresslevel=ZEEK_LOG_COMPRESSION_LEVEL
-                                    ) as tar:
-                                        tar.add(tmpLogDir, arcname=os.path.basename('.'))
-
-                                    # relocate the tarball to the upload directory (do it this way instead of with a shutil.move because of
-                                    # the way Docker volume mounts work, ie. avoid "OSError: [Errno 18] Invalid cross-device link").
-                                    # we don't have to explicitly delete it since this whole directory is about to leave context and be removed
-                                    shutil.copy(tgzFileName, uploadDir)
-                                    logger.debug(f"{scriptName}[{workerId}]:\t⏩\t{tgzFileName} → {uploadDir}")
-
-                                else:
-                                    # zeek returned no log files (or an error)
-                                    logger.warning(
-                                        f"{scriptName}[{workerId}]:\t❓\t{zeekBin} {os.path.basename(fileInfo[FILE_INFO_DICT_NAME])} generated no log files"
-                                    )
-
-                            else:
-                                logger.warning(
-                                    f"{scriptName}[{workerId}]:\t❗\terror creating temporary directory {tmpLogDir}"
-                                )
+                        logger.debug(f"{scriptName}[{workerId}]:\t⏩\t{archiveFileName}")
+                        succeeded = True
+                    except Exception as e:
+                        logger.error(f"{scriptName}[{workerId}]:\t💥\terror writing {archiveName} to {uploadDir}: {e}")
+
+                else:
+                    # zeek returned no log files (or an error)
+                    logger.warning(f"{scriptName}[{workerId}]:\t❓\t{zeekBin} {batchName} generated no log files")
+
+            else:
+                logger.warning(f"{scriptName}[{workerId}]:\t❗\terror creating temporary directory {tmpLogDir}")
+
+        for fileInfo in batch:
+            newFileQueue.done(fileInfo, succeeded)
 
     logger.info(f"{scriptName}[{workerId}]:\tfinished")
 
@@ -407,6 +929,8 @@ def suricataFileWorker(suricataWorkerArgs):
         autoTag,
         uploadDir,
         suricataConfig,
+        maxInFlight,
+        pollSec,
         logger,
         debug,
     ) = (
@@ -421,6 +945,8 @@ def suricataFileWorker(suricataWorkerArgs):
         suricataWorkerArgs[8],
         suricataWorkerArgs[9],
         suricataWorkerArgs[10],
+        suricataWorkerArgs[11],
+        suricataWorkerArgs[12],
     )
 
     if not logger:
@@ -440,15 +966,51 @@ def suricataFileWorker(suricataWorkerArgs):
         logger.error(f"Failed to create Suricata socket client: {e}")
         suricata = None
 
+    # suricata in socket mode doesn't let us know when a PCAP file is done processing, so we keep track by
+    #   polling how many of the files we've submitted it still has, keeping up to maxInFlight files submitted
+    #   at a time so it always has the next one ready without queueing up more than it needs
+    tracker = SuricataCompletionTracker(suricata) if suricata else None
+    processedBytes = 0
+    processedSec = 0.0
+
     # loop forever, or until we're told to shut down
     while suricata and (not shuttingDown):
+        finishedFiles = tracker.poll()
+        for finished in finishedFiles:
+            fileInfo = finished['context']
+            fileSize = fileInfo.get(FILE_INFO_DICT_SIZE, 0) or 0
+            processedBytes += fileSize
+            processedSec += finished['processing_sec']
+            logger.info(
+                f"{scriptName}[{workerId}]:\t✅\t{os.path.basename(fileInfo[FILE_INFO_DICT_NAME])} {finished['processing_sec']:.2f}s"
+                + (
+                    f" ({fileSize / 1048576 / finished['processing_sec']:.1f} MB/s)"
+                    if finished['processing_sec'] > 0
+                    else ''
+                )
+                + f", {finished['wait_sec']:.2f}s waiting in Suricata"
+            )
+            newFileQueue.done(fileInfo, True)
+        if finishedFiles and (processedSec > 0):
+            logger.debug(
+                f"{scriptName}[{workerId}]:\t⏱\t{processedBytes / 1048576 / processedSec:.1f} MB/s overall, {len(tracker)} in flight"
+            )
+
+        if len(tracker) >= maxInFlight:
+            # suricata has as many files as we want to give it at a time, wait for one to finish
+            time.sleep(pollSec)
+            continue
+
         try:
-            # pull an item from the queue of files that need to be processed
-            fileInfo = newFileQueue.popleft()
-        except IndexError:
-            time.sleep(1)
+            # pull an item from the queue of files that need to be processed (blocking until there is one, or,
+            #   if we're waiting on suricata, until it's time to check on it again)
+            fileInfo, waitSec = newFileQueue.get(timeout=pollSec if len(tracker) else WORK_QUEUE_GET_TIMEOUT_SEC)
+        except queue.Empty:
             continue
+        logger.debug(f"{scriptName}[{workerId}]:\t🕑\t{waitSec:.3f}s queued")
 
+        succeeded = True
+        submitted = False
         if isinstance(fileInfo, dict) and (FILE_INFO_DICT_NAME in fileInfo):
             # Suricata this PCAP if it's tagged "AUTOSURICATA" or if the global autoSuricata flag is turned on.
             # However, skip "live" PCAPs Malcolm is capturing and rotating through for Arkime capture,
@@ -494,22 +1056,24 @@ def suricataFileWorker(suricataWorkerArgs):
                             pcap_file=fileInfo[FILE_INFO_DICT_NAME],
                             output_dir=output_dir,
                         ):
-                            # suricata over socket mode doesn't let us know when a PCAP file is done processing,
-                            #   so all we do here is submit it and then we'll let filebeat tail the results
-                            #   as long as it needs to
-                            logger.info(
-                                f"{scriptName}[{workerId}]:\t✅\t{os.path.basename(fileInfo[FILE_INFO_DICT_NAME])}"
-                            )
+                            # we'll find out when it's done by polling, above (filebeat will tail the results)
+                            tracker.submitted(fileInfo[FILE_INFO_DICT_NAME], fileInfo)
+                            submitted = True
 
                         else:
+                            succeeded = False
                             logger.error(
                                 f"{scriptName}[{workerId}]:\t❌\tFailed to process {os.path.basename(fileInfo[FILE_INFO_DICT_NAME])}"
                             )
                     except Exception as e:
+                        succeeded = False
                         logger.error(
                             f"{scriptName}[{workerId}]:\t💥\tError processing {os.path.basename(fileInfo[FILE_INFO_DICT_NAME])}: {e}"
                         )
 
+        if not submitted:
+            newFileQueue.done(fileInfo, succeeded)
+
     logger.info(f"{scriptName}[{workerId}]:\tfinished")
 
 
@@ -568,6 +1132,54 @@ def main():
         type=str,
         default="127.0.0.1",
     )
+    parser.add_argument(
+        '--distribution',
+        dest='distribution',
+        help=f"Receive every PCAP file published ({PCAP_DISTRIBUTION_PUBSUB}) or share them with other processors of the same kind ({PCAP_DISTRIBUTION_QUEUE})",
+        metavar=f'{PCAP_DISTRIBUTION_PUBSUB}|{PCAP_DISTRIBUTION_QUEUE}',
+        type=str,
+        choices=[PCAP_DISTRIBUTION_PUBSUB, PCAP_DISTRIBUTION_QUEUE],
+        default=os.getenv('PCAP_PIPELINE_DISTRIBUTION', PCAP_DISTRIBUTION_PUBSUB).lower(),
+        required=False,
+    )
+    parser.add_argument(
+        '--prefetch',
+        dest='prefetch',
+        help=f"With --distribution {PCAP_DISTRIBUTION_QUEUE}, how many unfinished files to take from the queue at once (0 for twice the number of worker threads, or enough to fill a batch for each)",
+        metavar='<count>',
+        type=int,
+        default=int(os.getenv('PCAP_PROCESSOR_PREFETCH', 0)),
+        required=False,
+    )
+    parser.add_argument(
+        '--journal',
+        dest='journal',
+        help="Keep a journal of PCAP files received and processed, to resume unfinished work after a restart and skip files already processed",
+        metavar='true|false',
+        type=str2bool,
+        nargs='?',
+        const=True,
+        default=str2bool(os.getenv('PCAP_PROCESSOR_JOURNAL', default='False')),
+        required=False,
+    )
+    parser.add_argument(
+        '--journal-directory',
+        dest='journalDir',
+        help=f"Directory for the journal, which shouldn't be shared with other processors (default is {JOURNAL_DIR_DEFAULT})",
+        metavar='<directory>',
+        type=str,
+        default=os.getenv('PCAP_PROCESSOR_JOURNAL_DIR', ''),
+        required=False,
+    )
+    parser.add_argument(
+        '--journal-retention',
+        dest='journalRetentionDays',
+        help="Days to remember PCAP files that have been processed (0 to remember them forever)",
+        metavar='<days>',
+        type=int,
+        default=int(os.getenv('PCAP_PROCESSOR_JOURNAL_RETENTION_DAYS', JOURNAL_RETENTION_DAYS_DEFAULT)),
+        required=False,
+    )
     parser.add_argument(
         '--extra-tags',
         dest='extraTags',
@@ -606,6 +1218,67 @@ def main():
         type=str,
         default='',
     )
+    parser.add_argument(
+        '--queue-size',
+        dest='queueSize',
+        help="Maximum number of files waiting to be processed before no more are accepted from the publisher (0 for no limit)",
+        metavar='<count>',
+        type=int,
+        default=int(os.getenv('PCAP_PROCESSOR_QUEUE_SIZE', WORK_QUEUE_SIZE_DEFAULT)),
+        required=False,
+    )
+    parser.add_argument(
+        '--queue-stats-interval',
+        dest='queueStatsIntervalSec',
+        help="How often to log work queue statistics (0 to disable)",
+        metavar='<seconds>',
+        type=int,
+        default=int(os.getenv('PCAP_PROCESSOR_QUEUE_STATS_INTERVAL_SEC', 60)),
+        required=False,
+    )
+    parser.add_argument(
+        '--queue-fair-by',
+        dest='queueFairBy',
+        help="Share processing fairly between files grouped by this attribute",
+        metavar=f'{WORK_QUEUE_FAIR_BY_NODE}|{WORK_QUEUE_FAIR_BY_DIRECTORY}|{WORK_QUEUE_FAIR_BY_TAGS}|{WORK_QUEUE_FAIR_BY_NONE}',
+        type=str,
+        choices=[
+            WORK_QUEUE_FAIR_BY_NODE,
+            WORK_QUEUE_FAIR_BY_DIRECTORY,
+            WORK_QUEUE_FAIR_BY_TAGS,
+            WORK_QUEUE_FAIR_BY_NONE,
+        ],
+        default=os.getenv('PCAP_PROCESSOR_QUEUE_FAIR_BY', WORK_QUEUE_FAIR_BY_NODE).lower(),
+        required=False,
+    )
+    parser.add_argument(
+        '--queue-order',
+        dest='queueOrder',
+        help="Order in which each group's files are processed",
+        metavar=f'{WORK_QUEUE_ORDER_FIFO}|{WORK_QUEUE_ORDER_SMALLEST}',
+        type=str,
+        choices=[WORK_QUEUE_ORDER_FIFO, WORK_QUEUE_ORDER_SMALLEST],
+        default=os.getenv('PCAP_PROCESSOR_QUEUE_ORDER', WORK_QUEUE_ORDER_FIFO).lower(),
+        required=False,
+    )
+    parser.add_argument(
+        '--queue-aging',
+        dest='queueAgingMBPerSec',
+        help=f"With --queue-order {WORK_QUEUE_ORDER_SMALLEST}, how many megabytes a file's size is discounted for each second it has waited",
+        metavar='<megabytes>',
+        type=float,
+        default=float(os.getenv('PCAP_PROCESSOR_QUEUE_AGING_MB_PER_SEC', 10.0)),
+        required=False,
+    )
+    parser.add_argument(
+        '--queue-live-weight',
+        dest='queueLiveWeight',
+        help="Share of processing given to files from live capture relative to each other group of files",
+        metavar='<weight>',
+        type=float,
+        default=float(os.getenv('PCAP_PROCESSOR_QUEUE_LIVE_WEIGHT', 4.0)),
+        required=False,
+    )
     requiredNamed = parser.add_argument_group('required arguments')
     requiredNamed.add_argument(
         '--pcap-directory',
@@ -658,6 +1331,30 @@ def main():
             default=False,
             required=False,
         )
+        parser.add_argument(
+            '--arkime-batch-size',
+            dest='arkimeBatchSize',
+            help='Capture up to this many PCAP files (with the same node and tags) with a single Arkime process (0 or 1 to disable)',
+            metavar='<count>',
+            type=int,
+            default=int(os.getenv('ARKIME_PCAP_BATCH_SIZE', 0)),
+        )
+        parser.add_argument(
+            '--arkime-batch-max-size',
+            dest='arkimeBatchMaxMB',
+            help='Maximum total size of the PCAP files captured by a single Arkime process',
+            metavar='<megabytes>',
+            type=int,
+            default=int(os.getenv('ARKIME_PCAP_BATCH_MAX_MB', 256)),
+        )
+        parser.add_argument(
+            '--arkime-batch-wait',
+            dest='arkimeBatchWaitSec',
+            help='How long to wait for more PCAP files to fill a batch',
+            metavar='<seconds>',
+            type=float,
+            default=float(os.getenv('ARKIME_PCAP_BATCH_WAIT_SEC', 2.0)),
+        )
     elif processingMode == PCAP_PROCESSING_MODE_ZEEK:
         parser.add_argument(
             '--zeek',
@@ -698,6 +1395,71 @@ def main():
             type=str,
             default=ZEEK_EXTRACTOR_MODE_NONE,
         )
+        parser.add_argument(
+            '--zeek-shard-threshold',
+            dest='zeekShardThresholdMB',
+            help='Split PCAP files at least this large into flow-consistent shards analyzed by concurrent Zeek processes (0 to disable)',
+            metavar='<megabytes>',
+            type=int,
+            default=int(os.getenv('ZEEK_PCAP_SHARD_THRESHOLD_MB', 0)),
+        )
+        parser.add_argument(
+            '--zeek-shards',
+            dest='zeekShards',
+            help='Number of shards (and concurrent Zeek processes) per PCAP file over the shard threshold (0 for the number of CPUs divided by --threads)',
+            metavar='<count>',
+            type=int,
+            default=int(os.getenv('ZEEK_PCAP_SHARDS', 0)),
+        )
+        parser.add_argument(
+            '--zeek-shard-directory',
+            dest='zeekShardDir',
+            help='Directory for temporary PCAP shards (default is the system temporary directory)',
+            metavar='<directory>',
+            type=str,
+            default=os.getenv('ZEEK_PCAP_SHARD_DIR', None) or None,
+        )
+        parser.add_argument(
+            '--zeek-batch-size',
+            dest='zeekBatchSize',
+            help='Analyze up to this many small PCAP files (with the same tags) with a single Zeek process (0 or 1 to disable)',
+            metavar='<count>',
+            type=int,
+            default=int(os.getenv('ZEEK_PCAP_BATCH_SIZE', 0)),
+        )
+        parser.add_argument(
+            '--zeek-batch-max-size',
+            dest='zeekBatchMaxMB',
+            help='Maximum total size of the PCAP files analyzed by a single Zeek process',
+            metavar='<megabytes>',
+            type=int,
+            default=int(os.getenv('ZEEK_PCAP_BATCH_MAX_MB', 256)),
+        )
+        parser.add_argument(
+            '--zeek-batch-wait',
+            dest='zeekBatchWaitSec',
+            help='How long to wait for more PCAP files to fill a batch',
+            metavar='<seconds>',
+            type=float,
+            default=float(os.getenv('ZEEK_PCAP_BATCH_WAIT_SEC', 2.0)),
+        )
+        parser.add_argument(
+            '--zeek-log-codec',
+            dest='zeekLogCodec',
+            help='Compression for the archive of Zeek logs written to --zeek-directory',
+            metavar=f'{ZEEK_LOG_CODEC_GZIP}|{ZEEK_LOG_CODEC_ZSTD}|{ZEEK_LOG_CODEC_NONE}',
+            type=str,
+            choices=list(ZEEK_LOG_CODEC_EXTENSIONS.keys()),
+            default=os.getenv('ZEEK_LOG_CODEC', ZEEK_LOG_CODEC_GZIP).lower(),
+        )
+        parser.add_argument(
+            '--zeek-log-compression-level',
+            dest='zeekLogCompressLevel',
+            help='Compression level for the archive of Zeek logs',
+            metavar='<level>',
+            type=int,
+            default=int(os.getenv('ZEEK_LOG_COMPRESSION_LEVEL', ZEEK_LOG_COMPRESSION_LEVEL)),
+        )
         requiredNamed.add_argument(
             '--zeek-directory',
             dest='zeekUploadDir',
@@ -738,6 +1500,22 @@ def main():
             default=False,
             required=False,
         )
+        parser.add_argument(
+            '--suricata-in-flight',
+            dest='suricataMaxInFlight',
+            help="Maximum number of PCAP files submitted to Suricata at a time",
+            metavar='<count>',
+            type=int,
+            default=max(int(os.getenv('SURICATA_PCAP_MAX_IN_FLIGHT', 2)), 1),
+        )
+        parser.add_argument(
+            '--suricata-poll',
+            dest='suricataPollSec',
+            help="Interval for checking which submitted PCAP files Suricata has finished",
+            metavar='<seconds>',
+            type=float,
+            default=float(os.getenv('SURICATA_PCAP_POLL_SEC', 1.0)),
+        )
         requiredNamed.add_argument(
             '--suricata-config',
             dest='suricataConfigFile',
@@ -776,6 +1554,14 @@ def main():
     signal.signal(signal.SIGTERM, shutdown_handler)
     signal.signal(signal.SIGUSR1, pdb_handler)
 
+    if (
+        (processingMode == PCAP_PROCESSING_MODE_ZEEK)
+        and (args.zeekLogCodec == ZEEK_LOG_CODEC_ZSTD)
+        and (zstandard is None)
+    ):
+        logging.warning(f"{scriptName}:\tzstandard is not available, using {ZEEK_LOG_CODEC_GZIP} for Zeek logs")
+        args.zeekLogCodec = ZEEK_LOG_CODEC_GZIP
+
     if args.extraTags is not None:
         args.extraTags = [
             tag for tag in [re.sub(r'[^A-Za-z0-9 ._-]', '', x.strip()) for x in args.extraTags.split(',')] if tag
@@ -790,16 +1576,81 @@ def main():
     # initialize ZeroMQ context and socket(s) to receive filenames and send scan results
     context = zmq.Context()
 
-    # Socket to subscribe to messages on
-    new_files_socket = context.socket(zmq.SUB)
-    new_files_socket.connect(f"tcp://{args.publisherHost}:{PCAP_TOPIC_PORT}")
-    new_files_socket.setsockopt(zmq.SUBSCRIBE, b"")  # All topics
-    new_files_socket.setsockopt(zmq.LINGER, 0)  # All topics
-    new_files_socket.RCVTIMEO = 1500
-    logging.info(f"{scriptName}:\tsubscribed to topic at {PCAP_TOPIC_PORT}")
+    workerThreadCount = 1 if (processingMode == PCAP_PROCESSING_MODE_SURICATA) else args.threads
+
+    new_files_socket = None
+    workClient = None
+    if args.distribution == PCAP_DISTRIBUTION_QUEUE:
+        # take files from the broker's queue for this kind of processor, shared with any other processors of the
+        #   same kind, acknowledging each one once the worker thread that took it is done with it
+        prefetch = args.prefetch
+        if prefetch <= 0:
+            batchSize = {
+                PCAP_PROCESSING_MODE_ARKIME: getattr(args, 'arkimeBatchSize', 0),
+                PCAP_PROCESSING_MODE_ZEEK: getattr(args, 'zeekBatchSize', 0),
+            }.get(processingMode, 0)
+            prefetch = workerThreadCount * (max(batchSize, 1) + 1)
+        workClient = PcapWorkClient(
+            args.publisherHost,
+            PCAP_BROKER_PORT,
+            processingMode,
+            prefetch,
+            context=context,
+            logger=logging,
+        )
+        logging.info(f"{scriptName}:\tconnected to work queue at {PCAP_BROKER_PORT} (prefetch {prefetch})")
+
+    else:
+        # Socket to subscribe to messages on
+        new_files_socket = context.socket(zmq.SUB)
+        # while the work queue is full we stop reading from the socket, so let messages accumulate
+        #   here instead of dropping them when the default high water mark is reached
+        new_files_socket.setsockopt(zmq.RCVHWM, 0)
+        new_files_socket.connect(f"tcp://{args.publisherHost}:{PCAP_TOPIC_PORT}")
+        new_files_socket.setsockopt(zmq.SUBSCRIBE, b"")  # All topics
+        new_files_socket.setsockopt(zmq.LINGER, 0)  # All topics
+        new_files_socket.RCVTIMEO = 1500
+        logging.info(f"{scriptName}:\tsubscribed to topic at {PCAP_TOPIC_PORT}")
+
+    # the journal of files received and processed, and those that weren't finished when we last stopped
+    journal = None
+    replayFiles = deque()
+    if args.journal:
+        journalFileName = journal_file_name(args.journalDir, processingMode)
+        journal = PcapWorkJournal(journalFileName, processingMode, args.journalRetentionDays, logger=logging)
+        journal.prune()
+        if workClient:
+            # the broker has requeued whatever we hadn't finished for the other processors (or us)
+            releasedCount = journal.release()
+            logging.info(
+                f"{scriptName}:\tjournal {journalFileName}: {json.dumps(journal.stats())}, {releasedCount} left to the broker"
+            )
+        else:
+            replayFiles.extend(journal.pending())
+            logging.info(
+                f"{scriptName}:\tjournal {journalFileName}: {json.dumps(journal.stats())}, {len(replayFiles)} to resume"
+            )
+
+    # workers let us know when they've finished with each file so we can record it and acknowledge it to the broker
+    def _file_started(fileInfo):
+        if journal:
+            journal.started(fileInfo)
+
+    def _file_done(fileInfo, succeeded):
+        if journal:
+            journal.finished(fileInfo, succeeded)
+        if workClient:
+            workClient.ack(fileInfo, succeeded)
 
     # we'll pull from the topic in the main thread and queue them for processing by the worker threads
-    newFileQueue = deque()
+    newFileQueue = WorkQueue(
+        maxsize=args.queueSize,
+        classifier=file_info_classifier(args.queueFairBy, args.queueLiveWeight),
+        sizeOf=file_info_size if (args.queueOrder == WORK_QUEUE_ORDER_SMALLEST) else None,
+        agingBytesPerSec=args.queueAgingMBPerSec * 1024 * 1024,
+        onGet=_file_started,
+        onDone=_file_done,
+    )
 
     # start worker threads which will pull filenames/tags to be processed by capture
     if processingMode == PCAP_PROCESSING_MODE_ARKIME:
@@ -818,6 +1669,9 @@ def main():
                     args.extraTags,
                     args.autoTag,
                     args.notLocked,
+                    args.arkimeBatchSize,
+                    args.arkimeBatchMaxMB * 1024 * 1024,
+                    args.arkimeBatchWaitSec,
                     logging,
                     args.verbose <= logging.DEBUG,
                 ],
@@ -838,6 +1692,14 @@ def main():
                     args.autoTag,
                     args.zeekUploadDir,
                     args.zeekExtractFileMode,
+                    args.zeekShardThresholdMB * 1024 * 1024,
+                    args.zeekShards or max((os.cpu_count() or 1) // max(args.threads, 1), 1),
+                    args.zeekShardDir,
+                    args.zeekLogCodec,
+                    args.zeekLogCompressLevel,
+                    args.zeekBatchSize,
+                    args.zeekBatchMaxMB * 1024 * 1024,
+                    args.zeekBatchWaitSec,
                     logging,
                     args.verbose <= logging.DEBUG,
                 ],
@@ -846,7 +1708,7 @@ def main():
     elif processingMode == PCAP_PROCESSING_MODE_SURICATA:
         ThreadPool(
             # threading is done inside of Suricata in socket mode, so just use 1 thread to submit PCAP
-            1,
+            workerThreadCount,
             suricataFileWorker,
             (
                 [
@@ -859,32 +1721,101 @@ def main():
                     args.autoTag,
                     args.suricataUploadDir,
                     args.suricataConfigFile,
+                    args.suricataMaxInFlight,
+                    args.suricataPollSec,
                     logging,
                     args.verbose <= logging.DEBUG,
                 ],
             ),
         )
 
+    arrivedFiles = deque()
+    lastStatsTime = time.monotonic()
+    lastStats = None
+    lastPruneTime = time.monotonic()
     while not shuttingDown:
         # for debugging
         if pdbFlagged:
             pdbFlagged = False
             breakpoint()
 
-        # accept a file info dict from new_files_socket as json
-        try:
-            fileInfo = json.loads(new_files_socket.recv_string())
-        except zmq.Again:
-            # no file received due to timeout, we'll go around and try again
-            fileInfo = None
-
-        if isinstance(fileInfo, dict) and (FILE_INFO_DICT_NAME in fileInfo):
-            # queue for the workers to process with capture
-            newFileQueue.append(fileInfo)
-            logging.info(f"{scriptName}:\t📨\t{fileInfo}")
+        # periodically log the work queue depth and wait times (if anything has changed)
+        if (args.queueStatsIntervalSec > 0) and (time.monotonic() - lastStatsTime >= args.queueStatsIntervalSec):
+            lastStatsTime = time.monotonic()
+            stats = newFileQueue.stats()
+            if (stats['depth'] > 0) or (lastStats is None) or (stats['dequeued'] != lastStats['dequeued']):
+                logging.info(f"{scriptName}:\t📊\t{json.dumps(stats)}")
+            lastStats = stats
+
+        if journal and (time.monotonic() - lastPruneTime >= JOURNAL_PRUNE_INTERVAL_SEC):
+            lastPruneTime = time.monotonic()
+            journal.prune()
+
+        # resume the work that wasn't finished when we last stopped, as there's room for it in the queue
+        while replayFiles and not shuttingDown:
+            try:
+                newFileQueue.put(replayFiles[0], timeout=0)
+                logging.info(f"{scriptName}:\t🔁\t{replayFiles.popleft()}")
+            except queue.Full:
+                break
+
+        if workClient:
+            # acknowledge finished files and accept new ones from the broker, asking for no more than will fit
+            #   in the queue
+            queueRoom = newFileQueue.room()
+            arrivedFiles.extend(
+                workClient.receive(
+                    1500,
+                    room=(
+                        max(queueRoom - len(replayFiles) - len(arrivedFiles), 0) if (queueRoom is not None) else None
+                    ),
+                )
+            )
+        else:
+            # accept a file info dict from new_files_socket as json
+            try:
+                arrivedFiles.append(json.loads(new_files_socket.recv_string()))
+            except zmq.Again:
+                # no file received due to timeout, we'll go around and try again
+                pass
+
+        while arrivedFiles and not shuttingDown:
+            fileInfo = arrivedFiles.popleft()
+            if isinstance(fileInfo, dict) and (FILE_INFO_DICT_NAME in fileInfo):
+                if journal and not journal.received(
+                    fileInfo,
+                    (
+                        os.path.join(args.pcapBaseDir, fileInfo[FILE_INFO_DICT_NAME])
+                        if (args.pcapBaseDir and os.path.isdir(args.pcapBaseDir))
+                        else fileInfo[FILE_INFO_DICT_NAME]
+                    ),
+                ):
+                    # we've already processed this file (or it's already waiting to be processed)
+                    logging.info(f"{scriptName}:\t📋\t{fileInfo}")
+                    if workClient:
+                        workClient.ack(fileInfo)
+                    continue
+
+                # queue for the workers to process with capture. if the queue is full, this blocks (and we stop
+                #   reading from the socket) until a worker frees up a spot
+                while not shuttingDown:
+                    try:
+                        newFileQueue.put(fileInfo, timeout=1)
+                        logging.info(f"{scriptName}:\t📨\t{fileInfo}")
+                        break
+                    except queue.Full:
+                        logging.debug(f"{scriptName}:\t⏳\twork queue full ({newFileQueue.depth()})")
+                        if workClient:
+                            # keep acknowledging files and letting the broker know we're alive while we wait (so
+                            #   it doesn't hand our files to another processor), without taking any more
+                            arrivedFiles.extend(workClient.receive(0, room=0))
 
     # graceful shutdown
     logging.info(f"{scriptName}: shutting down...")
+    if workClient:
+        # anything we haven't acknowledged by now will be given to another processor
+        workClient.close()
+    newFileQueue.wake(workerThreadCount)
     time.sleep(5)
 
 
@@ -0,0 +1,669 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 Battelle Energy Alliance, LLC.  All rights reserved.
+
+###################################################################################################
+# Split a PCAP (or PCAPng) file into flow-consistent shards so that Zeek can analyze a large capture
+#   with several processes at once, then merge the resulting logs back together.
+#
+# Packets are assigned to shards by hashing a direction-independent 5-tuple (the IP addresses, the
+#   IP protocol and, for TCP/UDP/SCTP, the ports), so both directions of a connection always land in
+#   the same shard. Only the first fragment of a fragmented IP packet carries the ports, so the shard
+#   chosen for it is remembered (by the packet's addresses, protocol and IP ID) and the rest of its
+#   fragments follow it; fragments that arrive before the first one are held back until it does. Non-IP
+#   traffic (ARP, LLDP, etc.) all goes to the first shard.
+#
+# Run as a script with --benchmark to compare a single Zeek process against the sharded approach on
+#   a given capture file, or with --output to just write the shards.
+###################################################################################################
+
+import argparse
+import logging
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from malcolm_utils import eprint, run_process
+
+###################################################################################################
+PCAP_MAGIC_LE_USEC = b'\xd4\xc3\xb2\xa1'
+PCAP_MAGIC_LE_NSEC = b'\x4d\x3c\xb2\xa1'
+PCAP_MAGIC_BE_USEC = b'\xa1\xb2\xc3\xd4'
+PCAP_MAGIC_BE_NSEC = b'\xa1\xb2\x3c\x4d'
+PCAPNG_MAGIC = b'\x0a\x0d\x0d\x0a'
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+PCAPNG_BLOCK_IDB = 0x00000001
+PCAPNG_BLOCK_PB = 0x00000002
+PCAPNG_BLOCK_SPB = 0x00000003
+PCAPNG_BLOCK_EPB = 0x00000006
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW_BSD = 12
+LINKTYPE_RAW_BSD_ALT = 14
+LINKTYPE_RAW = 101
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IP_PROTOCOLS_WITH_PORTS = (6, 17, 132)
+IPV6_EXTENSION_HEADERS = (0, 43, 60)
+IPV6_FRAGMENT_HEADER = 44
+IPV6_AUTH_HEADER = 51
+
+# these logs describe the Zeek process rather than the traffic, so only one shard's copy is kept
+ZEEK_SHARD_SINGLETON_LOGS = ('loaded_scripts.log', 'packet_filter.log')
+
+SHARD_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# how many fragmented packets' shards to remember at once (the oldest are forgotten first)
+SHARD_MAX_FRAGMENTED_PACKETS = 65536
+# how many fragments to hold back waiting for their first fragment before giving up on the oldest of them
+SHARD_MAX_HELD_FRAGMENTS = 4096
+
+pcapRecordHeader = {'<': struct.Struct('<IIII'), '>': struct.Struct('>IIII')}
+ipPorts = struct.Struct('!HH')
+uint16BE = struct.Struct('!H')
+
+
+###################################################################################################
+# return the shard-hashing key of an IPv4 or IPv6 packet starting at data[offset] and, if it's a fragment,
+#   (fragmentId, fragmentOffset, moreFragments) identifying the packet it's a fragment of; or (None, None)
+def ip_flow_key(data, offset):
+    fragment = None
+    try:
+        version = data[offset] >> 4
+        if version == 4:
+            headerLen = (data[offset] & 0x0F) * 4
+            protocol = data[offset + 9]
+            src = data[offset + 12 : offset + 16]
+            dst = data[offset + 16 : offset + 20]
+            flagsAndOffset = uint16BE.unpack_from(data, offset + 6)[0]
+            if flagsAndOffset & 0x3FFF:
+                # more-fragments flag or a fragment offset
+                fragment = (
+                    src + dst + bytes((protocol,)) + data[offset + 4 : offset + 6],
+                    flagsAndOffset & 0x1FFF,
+                    (flagsAndOffset & 0x2000) != 0,
+                )
+            offset += headerLen
+
+        elif version == 6:
+            protocol = data[offset + 6]
+            src = data[offset + 8 : offset + 24]
+            dst = data[offset + 24 : offset + 40]
+            offset += 40
+            while (protocol in IPV6_EXTENSION_HEADERS) or (protocol in (IPV6_FRAGMENT_HEADER, IPV6_AUTH_HEADER)):
+                if protocol == IPV6_FRAGMENT_HEADER:
+                    flagsAndOffset = uint16BE.unpack_from(data, offset + 2)[0]
+                    fragment = (
+                        src + dst + data[offset + 4 : offset + 8],
+                        flagsAndOffset >> 3,
+                        (flagsAndOffset & 1) != 0,
+                    )
+                    protocol = data[offset]
+                    offset += 8
+                elif protocol == IPV6_AUTH_HEADER:
+                    protocol, extLen = data[offset], (data[offset + 1] + 2) * 4
+                    offset += extLen
+                else:
+                    protocol, extLen = data[offset], (data[offset + 1] + 1) * 8
+                    offset += extLen
+
+        else:
+            return None, None
+
+    except (IndexError, struct.error):
+        return None, None
+
+    # only the first fragment (or an unfragmented packet) has the ports
+    if (
+        ((fragment is None) or (fragment[1] == 0))
+        and (protocol in IP_PROTOCOLS_WITH_PORTS)
+        and (len(data) >= offset + 4)
+    ):
+        srcPort, dstPort = ipPorts.unpack_from(data, offset)
+        src = src + srcPort.to_bytes(2, 'big')
+        dst = dst + dstPort.to_bytes(2, 'big')
+
+    # order the endpoints so that both directions of a flow produce the same key
+    return (src + dst if src <= dst else dst + src) + bytes((protocol,)), fragment
+
+
+###################################################################################################
+# return the result of ip_flow_key for a captured frame of the given link type, or (None, None) if it isn't IP
+def flow_key(linkType, data):
+    if linkType == LINKTYPE_ETHERNET:
+        if len(data) < 14:
+            return None, None
+        offset = 12
+        etherType = uint16BE.unpack_from(data, offset)[0]
+        while (etherType in ETHERTYPE_VLAN) and (len(data) >= offset + 6):
+            offset += 4
+            etherType = uint16BE.unpack_from(data, offset)[0]
+        offset += 2
+        return ip_flow_key(data, offset) if etherType in (ETHERTYPE_IPV4, ETHERTYPE_IPV6) else (None, None)
+
+    elif linkType in (LINKTYPE_RAW, LINKTYPE_RAW_BSD, LINKTYPE_RAW_BSD_ALT, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        return ip_flow_key(data, 0)
+
+    elif linkType in (LINKTYPE_NULL, LINKTYPE_LOOP):
+        return ip_flow_key(data, 4)
+
+    elif linkType == LINKTYPE_LINUX_SLL:
+        if len(data) < 16:
+            return None, None
+        etherType = uint16BE.unpack_from(data, 14)[0]
+        return ip_flow_key(data, 16) if etherType in (ETHERTYPE_IPV4, ETHERTYPE_IPV6) else (None, None)
+
+    elif linkType == LINKTYPE_LINUX_SLL2:
+        if len(data) < 20:
+            return None, None
+        etherType = uint16BE.unpack_from(data, 0)[0]
+        return ip_flow_key(data, 20) if etherType in (ETHERTYPE_IPV4, ETHERTYPE_IPV6) else (None, None)
+
+    return None, None
+
+
+###################################################################################################
+# assigns the frames of a capture file to shards, remembering where the first fragment of each fragmented
+#   packet went so the rest of its fragments (which have no ports to hash) can follow it. Fragments that
+#   arrive before their first fragment are held back (up to SHARD_MAX_HELD_FRAGMENTS, after which the oldest
+#   are hashed on their addresses and protocol alone): shard() returns None for those, and once they can be
+#   written they're put in released as (shard index, record) pairs
+class FlowSharder:
+    def __init__(self, shardCount):
+        self.shardCount = shardCount
+        self.fragmentShards = OrderedDict()
+        self.heldFragments = OrderedDict()
+        self.heldCount = 0
+        self.released = []
+
+    # return the shard index for a frame (data), or None if it's being held back along with its record,
+    #   a tuple of the byte strings to be written for it
+    def shard(self, linkType, data, record):
+        key, fragment = flow_key(linkType, data)
+        if not key:
+            return 0
+        if fragment is None:
+            return zlib.crc32(key) % self.shardCount
+
+        fragmentId, fragmentOffset, moreFragments = fragment
+        if fragmentOffset == 0:
+            idx = zlib.crc32(key) % self.shardCount
+            # IP IDs get reused, so a new first fragment replaces whatever we had for this one
+            self.fragmentShards.pop(fragmentId, None)
+            self.fragmentShards[fragmentId] = idx
+            if len(self.fragmentShards) > SHARD_MAX_FRAGMENTED_PACKETS:
+                self.fragmentShards.popitem(last=False)
+            held = self.heldFragments.pop(fragmentId, None)
+            if held:
+                self.heldCount -= len(held)
+                self.released.extend((idx, heldRecord) for _, heldRecord in held)
+            return idx
+
+        idx = self.fragmentShards.get(fragmentId, None)
+        if idx is not None:
+            return idx
+
+        # we haven't seen the first fragment yet, so wait for it
+        self.heldFragments.setdefault(fragmentId, []).append((key, record))
+        self.heldCount += 1
+        while self.heldCount > SHARD_MAX_HELD_FRAGMENTS:
+            _, held = self.heldFragments.popitem(last=False)
+            self.heldCount -= len(held)
+            self._give_up(held)
+        return None
+
+    # release whatever fragments are still waiting for a first fragment (e.g., at the end of the file)
+    def flush(self):
+        for held in self.heldFragments.values():
+            self._give_up(held)
+        self.heldFragments.clear()
+        self.heldCount = 0
+
+    # all we can go on for fragments without a first fragment is their addresses and protocol
+    def _give_up(self, held):
+        self.released.extend((zlib.crc32(key) % self.shardCount, heldRecord) for key, heldRecord in held)
+
+
+###################################################################################################
+# write the records the sharder has released to their shards
+def write_released(sharder, shardFiles, shardCounts):
+    for idx, record in sharder.released:
+        for part in record:
+            shardFiles[idx].write(part)
+        shardCounts[idx] += 1
+    sharder.released.clear()
+
+
+###################################################################################################
+# split a classic libpcap file: the global header is copied to each shard, then each record follows its flow
+def split_pcap_classic(pcapFile, inFile, shardFiles, shardCounts):
+    globalHeader = inFile.read(24)
+    if len(globalHeader) < 24:
+        raise ValueError(f'{pcapFile} is truncated')
+    endian = '<' if globalHeader[:4] in (PCAP_MAGIC_LE_USEC, PCAP_MAGIC_LE_NSEC) else '>'
+    linkType = struct.unpack_from(f'{endian}I', globalHeader, 20)[0] & 0xFFFF
+    recordHeader = pcapRecordHeader[endian]
+    sharder = FlowSharder(len(shardFiles))
+
+    for shardFile in shardFiles:
+        shardFile.write(globalHeader)
+
+    read = inFile.read
+    while True:
+        header = read(16)
+        if len(header) < 16:
+            break
+        capturedLen = recordHeader.unpack(header)[2]
+        data = read(capturedLen)
+        if len(data) < capturedLen:
+            # a truncated final record is dropped, as it would be by Zeek
+            break
+        idx = sharder.shard(linkType, data, (header, data))
+        if idx is not None:
+            shardFiles[idx].write(header)
+            shardFiles[idx].write(data)
+            shardCounts[idx] += 1
+        if sharder.released:
+            write_released(sharder, shardFiles, shardCounts)
+
+    sharder.flush()
+    write_released(sharder, shardFiles, shardCounts)
+
+
+###################################################################################################
+# return (globalHeader, endian, firstPacketTime, lastPacketTime) for a classic libpcap file, or None for anything
+#   else (PCAPng files, or files too short to contain a packet). lastPacketTime is the latest timestamp of any
+#   complete packet record in the file, found by reading just the record headers.
+def pcap_file_header(pcapFile):
+    with open(pcapFile, 'rb') as inFile:
+        globalHeader = inFile.read(24)
+        if len(globalHeader) < 24:
+            return None
+        if globalHeader[:4] in (PCAP_MAGIC_LE_USEC, PCAP_MAGIC_LE_NSEC):
+            endian = '<'
+        elif globalHeader[:4] in (PCAP_MAGIC_BE_USEC, PCAP_MAGIC_BE_NSEC):
+            endian = '>'
+        else:
+            return None
+        recordHeader = pcapRecordHeader[endian]
+        fileSize = os.fstat(inFile.fileno()).st_size
+        firstPacketTime = None
+        lastPacketTime = None
+        offset = 24
+        while offset + 16 <= fileSize:
+            inFile.seek(offset)
+            seconds, fraction, capturedLen, _ = recordHeader.unpack(inFile.read(16))
+            offset += 16 + capturedLen
+            if offset > fileSize:
+                # a truncated final record isn't a packet (see copy_pcap_records)
+                break
+            packetTime = (seconds, fraction)
+            if firstPacketTime is None:
+                firstPacketTime = packetTime
+            if (lastPacketTime is None) or (packetTime > lastPacketTime):
+                lastPacketTime = packetTime
+    if firstPacketTime is None:
+        return None
+    fractionsPerSec = 1000000000 if globalHeader[:4] in (PCAP_MAGIC_LE_NSEC, PCAP_MAGIC_BE_NSEC) else 1000000
+    return (
+        globalHeader,
+        endian,
+        firstPacketTime[0] + firstPacketTime[1] / fractionsPerSec,
+        lastPacketTime[0] + lastPacketTime[1] / fractionsPerSec,
+    )
+
+
+###################################################################################################
+# copy the packet records (everything but the global header) of a classic libpcap file to outFile, stopping
+#   at a truncated final record so that a stream of several files' records remains well-formed
+def copy_pcap_records(inFile, outFile, endian):
+    recordHeader = pcapRecordHeader[endian]
+    read = inFile.read
+    write = outFile.write
+    inFile.seek(24)
+    count = 0
+    while True:
+        header = read(16)
+        if len(header) < 16:
+            break
+        capturedLen = recordHeader.unpack(header)[2]
+        data = read(capturedLen)
+        if len(data) < capturedLen:
+            break
+        write(header)
+        write(data)
+        count += 1
+    return count
+
+
+###################################################################################################
+# split a PCAPng file: section headers, interface descriptions and other metadata blocks are copied to
+#   every shard (in order, so the interface IDs in the packet blocks remain valid), packet blocks follow their flow
+def split_pcapng(pcapFile, inFile, shardFiles, shardCounts):
+    sharder = FlowSharder(len(shardFiles))
+    endian = '<'
+    linkTypes = []
+
+    read = inFile.read
+    while True:
+        blockType = read(4)
+        if len(blockType) < 4:
+            break
+        if blockType == PCAPNG_MAGIC:
+            # a new section, which determines the byte order of everything that follows
+            lengthAndMagic = read(8)
+            if len(lengthAndMagic) < 8:
+                break
+            endian = '<' if struct.unpack_from('<I', lengthAndMagic, 4)[0] == PCAPNG_BYTE_ORDER_MAGIC else '>'
+            blockLen = struct.unpack_from(f'{endian}I', lengthAndMagic, 0)[0]
+            if blockLen < 12:
+                break
+            block = blockType + lengthAndMagic + read(blockLen - 12)
+            linkTypes = []
+        else:
+            lengthBytes = read(4)
+            if len(lengthBytes) < 4:
+                break
+            blockLen = struct.unpack(f'{endian}I', lengthBytes)[0]
+            if blockLen < 12:
+                break
+            block = blockType + lengthBytes + read(blockLen - 8)
+        if len(block) < blockLen:
+            break
+
+        blockTypeVal = struct.unpack_from(f'{endian}I', block, 0)[0]
+        if blockTypeVal == PCAPNG_BLOCK_EPB:
+            interfaceId, _, _, capturedLen = struct.unpack_from(f'{endian}IIII', block, 8)
+            data = block[28 : 28 + capturedLen]
+        elif blockTypeVal == PCAPNG_BLOCK_SPB:
+            interfaceId = 0
+            data = block[12 : blockLen - 4]
+        elif blockTypeVal == PCAPNG_BLOCK_PB:
+            interfaceId = struct.unpack_from(f'{endian}H', block, 8)[0]
+            capturedLen = struct.unpack_from(f'{endian}I', block, 20)[0]
+            data = block[28 : 28 + capturedLen]
+        else:
+            # fragments held back for their first fragment can't be written after a new section or interface
+            sharder.flush()
+            write_released(sharder, shardFiles, shardCounts)
+            if blockTypeVal == PCAPNG_BLOCK_IDB:
+                linkTypes.append(struct.unpack_from(f'{endian}H', block, 8)[0])
+            for shardFile in shardFiles:
+                shardFile.write(block)
+            continue
+
+        linkType = linkTypes[interfaceId] if interfaceId < len(linkTypes) else None
+        idx = sharder.shard(linkType, data, (block,))
+        if idx is not None:
+            shardFiles[idx].write(block)
+            shardCounts[idx] += 1
+        if sharder.released:
+            write_released(sharder, shardFiles, shardCounts)
+
+    sharder.flush()
+    write_released(sharder, shardFiles, shardCounts)
+
+
+###################################################################################################
+# split pcapFile into (at most) shardCount flow-consistent files in outDir, returning the list of
+#   shard files that received at least one packet (empty shards are deleted)
+def split_pcap(pcapFile, outDir, shardCount):
+    shardCount = max(shardCount, 1)
+    baseName, ext = os.path.splitext(os.path.basename(pcapFile))
+    shardNames = [os.path.join(outDir, f'{baseName}.shard{idx:03d}{ext or ".pcap"}') for idx in range(shardCount)]
+    shardCounts = [0] * shardCount
+
+    with open(pcapFile, 'rb', buffering=SHARD_WRITE_BUFFER_SIZE) as inFile:
+        magic = inFile.read(4)
+        inFile.seek(0)
+        shardFiles = [open(shardName, 'wb', buffering=SHARD_WRITE_BUFFER_SIZE) for shardName in shardNames]
+        try:
+            if magic in (PCAP_MAGIC_LE_USEC, PCAP_MAGIC_LE_NSEC, PCAP_MAGIC_BE_USEC, PCAP_MAGIC_BE_NSEC):
+                split_pcap_classic(pcapFile, inFile, shardFiles, shardCounts)
+            elif magic == PCAPNG_MAGIC:
+                split_pcapng(pcapFile, inFile, shardFiles, shardCounts)
+            else:
+                raise ValueError(f'{pcapFile} is not a PCAP or PCAPng file')
+        finally:
+            for shardFile in shardFiles:
+                shardFile.close()
+
+    result = []
+    for shardName, count in zip(shardNames, shardCounts):
+        if count > 0:
+            result.append(shardName)
+        else:
+            os.unlink(shardName)
+    return result
+
+
+###################################################################################################
+# merge the Zeek logs from each of shardLogDirs into logDir: logs of the same name are concatenated,
+#   and for TSV-formatted logs only the first shard's header (and the last shard's #close footer) is kept
+def merge_zeek_logs(shardLogDirs, logDir):
+    logShardDirs = defaultdict(list)
+    for shardLogDir in shardLogDirs:
+        for logName in sorted(os.listdir(shardLogDir)):
+            if logName.endswith('.log') and os.path.isfile(os.path.join(shardLogDir, logName)):
+                logShardDirs[logName].append(shardLogDir)
+
+    for logName, dirs in logShardDirs.items():
+        if logName in ZEEK_SHARD_SINGLETON_LOGS:
+            dirs = dirs[:1]
+        with open(os.path.join(logDir, logName), 'wb') as outFile:
+            closeLine = None
+            for idx, shardLogDir in enumerate(dirs):
+                with open(os.path.join(shardLogDir, logName), 'rb') as inFile:
+                    if inFile.read(1) != b'#':
+                        # JSON: just concatenate the lines
+                        inFile.seek(0)
+                        shutil.copyfileobj(inFile, outFile, SHARD_WRITE_BUFFER_SIZE)
+                    else:
+                        inFile.seek(0)
+                        for line in inFile:
+                            if line.startswith(b'#close'):
+                                closeLine = line
+                            elif (idx == 0) or (not line.startswith(b'#')):
+                                outFile.write(line)
+            if closeLine:
+                outFile.write(closeLine)
+
+    return list(logShardDirs.keys())
+
+
+###################################################################################################
+# split pcapFile into shardCount shards, run "zeekBin -r <shard> zeekArgs" on each of them concurrently
+#   and merge the resulting logs into logDir, as if Zeek had been run once on pcapFile with a cwd of logDir.
+#   Returns (retcode, output) like run_process, with the first non-zero return code of the Zeek processes.
+def zeek_sharded(zeekBin, pcapFile, zeekArgs, logDir, shardCount, env=None, workDir=None, logger=None):
+    if not logger:
+        logger = logging
+
+    with tempfile.TemporaryDirectory(dir=workDir) as tmpShardDir:
+        startTime = time.monotonic()
+        shardFiles = split_pcap(pcapFile, os.path.abspath(tmpShardDir), shardCount)
+        logger.debug(
+            f"{os.path.basename(pcapFile)} split into {len(shardFiles)} shards in {time.monotonic() - startTime:.1f}s"
+        )
+
+        def _run_shard(shardFile):
+            shardLogDir = f'{shardFile}.logs'
+            os.makedirs(shardLogDir)
+            result = run_process([zeekBin, '-r', shardFile, zeekArgs], cwd=shardLogDir, env=env, logger=logger)
+            # the shard itself is no longer needed once Zeek is done with it
+            os.unlink(shardFile)
+            return shardLogDir, result
+
+        with ThreadPoolExecutor(max_workers=max(len(shardFiles), 1)) as executor:
+            results = list(executor.map(_run_shard, shardFiles))
+
+        retcode, output = 0, []
+        for _, (shardRetcode, shardOutput) in results:
+            if (retcode == 0) and (shardRetcode != 0):
+                retcode = shardRetcode
+            output.extend(shardOutput)
+
+        merge_zeek_logs([shardLogDir for shardLogDir, _ in results], logDir)
+
+    return retcode, output
+
+
+###################################################################################################
+# count the records in each Zeek log in logDir
+def zeek_log_counts(logDir):
+    counts = {}
+    for logName in sorted(os.listdir(logDir)):
+        if logName.endswith('.log'):
+            with open(os.path.join(logDir, logName), 'rb') as inFile:
+                counts[logName] = sum(1 for line in inFile if not line.startswith(b'#'))
+    return counts
+
+
+###################################################################################################
+# main
+def main():
+    scriptName = os.path.basename(__file__)
+    parser = argparse.ArgumentParser(description=scriptName, add_help=True, usage='{} <arguments>'.format(scriptName))
+    parser.add_argument('--verbose', '-v', action='count', default=1, help='Increase verbosity (e.g., -v, -vv, etc.)')
+    parser.add_argument(
+        '-r',
+        '--read',
+        dest='pcapFile',
+        help='Input PCAP or PCAPng file',
+        metavar='<filename>',
+        type=str,
+        required=True,
+    )
+    parser.add_argument(
+        '-s',
+        '--shards',
+        dest='shards',
+        help='Number of shards (default is the number of CPUs)',
+        metavar='<count>',
+        type=int,
+        default=os.cpu_count() or 1,
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        dest='outputDir',
+        help='Write the shards to this directory and exit',
+        metavar='<directory>',
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        '--benchmark',
+        dest='benchmark',
+        help='Compare a single Zeek process against sharded Zeek processes for the input file',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--zeek',
+        dest='zeekBin',
+        help='zeek executable path',
+        metavar='<STR>',
+        type=str,
+        default='/opt/zeek/bin/zeek-offline',
+    )
+    parser.add_argument(
+        '--zeek-args',
+        dest='zeekArgs',
+        help='Zeek scripts/arguments to use for the benchmark',
+        metavar='<STR>',
+        nargs='*',
+        type=str,
+        default=['local'],
+    )
+    parser.add_argument(
+        '--work-directory',
+        dest='workDir',
+        help='Directory for temporary files (default is the system temporary directory)',
+        metavar='<directory>',
+        type=str,
+        default=None,
+    )
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args()
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    args.verbose = logging.ERROR - (10 * args.verbose) if args.verbose > 0 else 0
+    logging.basicConfig(
+        level=args.verbose, format='%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    # zeek is run from the log directory, so use an absolute path to the input
+    args.pcapFile = os.path.abspath(args.pcapFile)
+    if not os.path.isfile(args.pcapFile):
+        eprint(f'{args.pcapFile} does not exist')
+        return 1
+
+    if args.outputDir:
+        os.makedirs(args.outputDir, exist_ok=True)
+        startTime = time.monotonic()
+        shardFiles = split_pcap(args.pcapFile, args.outputDir, args.shards)
+        elapsed = time.monotonic() - startTime
+        for shardFile in shardFiles:
+            print(f'{shardFile}\t{os.path.getsize(shardFile)}')
+        eprint(f'{len(shardFiles)} shards in {elapsed:.1f}s')
+
+    if args.benchmark:
+        pcapSize = os.path.getsize(args.pcapFile)
+        timings = {}
+        counts = {}
+        with tempfile.TemporaryDirectory(dir=args.workDir) as tmpDir:
+            startTime = time.monotonic()
+            split_pcap(args.pcapFile, tmpDir, args.shards)
+            timings['split only'] = time.monotonic() - startTime
+            for fileName in os.listdir(tmpDir):
+                os.unlink(os.path.join(tmpDir, fileName))
+
+            for label, shards in (('single', 1), (f'{args.shards} shards', args.shards)):
+                logDir = os.path.join(tmpDir, str(shards))
+                os.makedirs(logDir)
+                startTime = time.monotonic()
+                if shards > 1:
+                    retcode, output = zeek_sharded(
+                        args.zeekBin, args.pcapFile, args.zeekArgs, logDir, shards, workDir=args.workDir
+                    )
+                else:
+                    retcode, output = run_process([args.zeekBin, '-r', args.pcapFile, args.zeekArgs], cwd=logDir)
+                timings[label] = time.monotonic() - startTime
+                if retcode != 0:
+                    eprint(f'{label}: {args.zeekBin} returned {retcode} {output}')
+                counts[label] = zeek_log_counts(logDir)
+
+        print(f"{os.path.basename(args.pcapFile)} ({pcapSize / 1024 / 1024:.1f} MiB)")
+        for label, elapsed in timings.items():
+            print(f"{label:>16}: {elapsed:9.1f}s {pcapSize / 1024 / 1024 / elapsed if elapsed else 0:9.1f} MiB/s")
+        labels = list(counts.keys())
+        print(f"{'log':<32} " + ' '.join(f'{label:>12}' for label in labels))
+        for logName in sorted(set().union(*[counts[label].keys() for label in labels])):
+            print(f'{logName:<32} ' + ' '.join(f'{counts[label].get(logName, 0):>12}' for label in labels))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
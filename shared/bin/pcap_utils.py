@@ -3,13 +3,21 @@
 
 # Copyright (c) 2025 Battelle Energy Alliance, LLC.  All rights reserved.
 
+import hashlib
+import os
 import re
 
 ###################################################################################################
 PCAP_TOPIC_PORT = 30441
+PCAP_BROKER_PORT = 30442
+
+PCAP_DISTRIBUTION_PUBSUB = 'pubsub'
+PCAP_DISTRIBUTION_QUEUE = 'queue'
 
 PCAP_MIME_TYPES = ['application/vnd.tcpdump.pcap', 'application/x-pcapng']
 
+FILE_INFO_DICT_ID = "id"
+FILE_INFO_DICT_JOURNAL_ID = "journal"
 FILE_INFO_DICT_LIVE = "live"
 FILE_INFO_DICT_NAME = "name"
 FILE_INFO_DICT_NODE = "node"
@@ -18,6 +26,8 @@ FILE_INFO_DICT_TAGS = "tags"
 FILE_INFO_FILE_MIME = "mime"
 FILE_INFO_FILE_TYPE = "type"
 
+PCAP_FINGERPRINT_CHUNK_BYTES = 1024 * 1024
+
 
 ###################################################################################################
 # split a PCAP filename up into tags
@@ -27,3 +37,18 @@ def tags_from_filename(filespec):
     # tags to ignore explicitly
     regex = re.compile(r'^(\d+|p?cap|dmp|log|bro|zeek|suricata|m?tcpdump|m?netsniff)$', re.IGNORECASE)
     return list(filter(lambda i: not regex.search(i), map(str.strip, filter(None, re.split(tagSplitterRe, filespec)))))
+
+
+###################################################################################################
+# a quick fingerprint of a file's contents, hashing its size and (at most) the first and last
+#   PCAP_FINGERPRINT_CHUNK_BYTES bytes rather than the whole thing
+def pcap_file_fingerprint(fileName, chunkBytes=PCAP_FINGERPRINT_CHUNK_BYTES):
+    digest = hashlib.sha256()
+    with open(fileName, 'rb') as f:
+        fileSize = os.fstat(f.fileno()).st_size
+        digest.update(str(fileSize).encode())
+        digest.update(f.read(chunkBytes))
+        if fileSize > chunkBytes:
+            f.seek(max(fileSize - chunkBytes, chunkBytes))
+            digest.update(f.read(chunkBytes))
+    return digest.hexdigest()
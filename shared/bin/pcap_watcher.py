@@ -18,7 +18,9 @@ import os
 import pathlib
 import re
 import signal
+import sqlite3
 import sys
+import threading
 import time
 import zmq
 
@@ -30,10 +32,15 @@ from pcap_utils import (
     FILE_INFO_DICT_TAGS,
     FILE_INFO_FILE_MIME,
     FILE_INFO_FILE_TYPE,
+    PCAP_BROKER_PORT,
+    PCAP_DISTRIBUTION_PUBSUB,
+    PCAP_DISTRIBUTION_QUEUE,
     PCAP_MIME_TYPES,
     PCAP_TOPIC_PORT,
+    pcap_file_fingerprint,
     tags_from_filename,
 )
+from pcap_broker import PcapWorkBroker, BROKER_KINDS_DEFAULT
 import malcolm_utils
 from malcolm_utils import eprint, str2bool, ParseCurlFile, remove_prefix, touch
 import watch_common
@@ -56,7 +63,12 @@ MAXIMUM_CHECKED_FILE_SIZE_DEFAULT = 32 * 1024 * 1024 * 1024
 # for querying the Arkime's "arkime_files" OpenSearch index to avoid re-processing (duplicating sessions for)
 # files that have already been processed
 ARKIME_FILES_INDEX = "arkime_files"
+ARKIME_FILE_NAME_FIELD = "name"
 ARKIME_FILE_SIZE_FIELD = "filesize"
+ARKIME_FILES_SCROLL_SIZE = 5000
+ARKIME_FILES_SCROLL_TIMEOUT_SEC = 60
+
+DEDUP_INDEX_FILE_DEFAULT = os.path.join('.journal', 'pcap-monitor.db')
 
 ###################################################################################################
 pdbFlagged = False
@@ -76,6 +88,89 @@ DatabaseClass, DatabaseInitArgs, SearchClass, ConnectionError, ConnectionTimeout
 )
 
 
+###################################################################################################
+# A local index of the PCAP files known to have been processed, so that duplicates can be recognized without
+#   querying OpenSearch for each new file. It's seeded from Arkime's files index when the watcher starts
+#   (replacing everything it held before, so that OpenSearch remains the source of truth for what has been
+#   processed: a file published before a restart but never captured isn't a duplicate when it's republished)
+#   and updated as each file is published. As with the query it replaces, a file is a duplicate if a known
+#   file with the same size has a name ending in the file's relative path; files recorded when they were
+#   published also have a fingerprint of their contents (see pcap_file_fingerprint) which must match as well
+#   (Arkime's files index has no such thing, so those can only be matched on name and size).
+class PcapDedupIndex:
+    def __init__(self, dbFileName):
+        self.lock = threading.Lock()
+        if os.path.dirname(dbFileName):
+            os.makedirs(os.path.dirname(dbFileName), exist_ok=True)
+        self.conn = sqlite3.connect(dbFileName, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS files (
+                name TEXT NOT NULL,
+                basename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fingerprint TEXT,
+                seeded INTEGER NOT NULL DEFAULT 0,
+                added REAL
+            )""")
+        self.conn.execute('CREATE INDEX IF NOT EXISTS files_basename_size ON files (basename, size)')
+
+    # replace all of the entries with (name, size) for each of the files from fileHits, returning how many there were
+    def seed(self, fileHits):
+        nowTime = time.time()
+        count = 0
+
+        def _rows():
+            nonlocal count
+            for name, size in fileHits:
+                count += 1
+                yield (name, os.path.basename(name), size, nowTime)
+
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                self.conn.execute('DELETE FROM files')
+                self.conn.executemany(
+                    'INSERT INTO files (name, basename, size, seeded, added) VALUES (?, ?, ?, 1, ?)', _rows()
+                )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return count
+
+    # record a file that has been published for processing (relativePath being its name relative to the base directory)
+    def add(self, relativePath, fileName, fileSize):
+        try:
+            fingerprint = pcap_file_fingerprint(fileName)
+        except OSError:
+            fingerprint = None
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO files (name, basename, size, fingerprint, added) VALUES (?, ?, ?, ?, ?)',
+                (relativePath, os.path.basename(relativePath), fileSize, fingerprint, time.time()),
+            )
+
+    def is_duplicate(self, relativePath, fileName, fileSize):
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT name, fingerprint FROM files WHERE basename = ? AND size = ?',
+                (os.path.basename(relativePath), fileSize),
+            ).fetchall()
+        fingerprints = [
+            fingerprint
+            for name, fingerprint in rows
+            if (name == relativePath) or name.endswith(f"{os.path.sep}{relativePath}")
+        ]
+        if not fingerprints:
+            return False
+        elif None in fingerprints:
+            return True
+        try:
+            return pcap_file_fingerprint(fileName) in fingerprints
+        except OSError:
+            return False
+
+
 ###################################################################################################
 # watch files written to and moved to this directory
 class EventWatcher:
@@ -168,6 +263,32 @@ class EventWatcher:
 
             self.useOpenSearch = connected and healthy
 
+        # seed the local index of files already processed from Arkime's files index, falling back to querying
+        #   the files index for each new file if that fails
+        self.dedupIndex = None
+        if self.useOpenSearch and args.dedupIndexFile:
+            try:
+                self.dedupIndex = PcapDedupIndex(args.dedupIndexFile)
+                startTime = time.monotonic()
+                seededCount = self.dedupIndex.seed(
+                    (hit[ARKIME_FILE_NAME_FIELD], hit[ARKIME_FILE_SIZE_FIELD])
+                    for hit in (
+                        x.to_dict()
+                        for x in SearchClass(using=self.openSearchClient, index=ARKIME_FILES_INDEX)
+                        .filter("term", node=args.nodeName)
+                        .source([ARKIME_FILE_NAME_FIELD, ARKIME_FILE_SIZE_FIELD])
+                        .params(size=ARKIME_FILES_SCROLL_SIZE, request_timeout=ARKIME_FILES_SCROLL_TIMEOUT_SEC)
+                        .scan()
+                    )
+                    if (ARKIME_FILE_NAME_FIELD in hit) and (ARKIME_FILE_SIZE_FIELD in hit)
+                )
+                self.logger.info(
+                    f"{scriptName}:\tindexed {seededCount} files from {ARKIME_FILES_INDEX} in {time.monotonic() - startTime:.1f}s"
+                )
+            except Exception as e:
+                self.logger.error(f"{scriptName}:\terror seeding {args.dedupIndexFile} from {ARKIME_FILES_INDEX}: {e}")
+                self.dedupIndex = None
+
         # initialize ZeroMQ context and socket(s) to publish messages to
         self.context = zmq.Context()
 
@@ -180,6 +301,19 @@ class EventWatcher:
         # and if he can't then what's the point? just block
         # self.topic_socket.SNDTIMEO = 5000
 
+        # in queue mode, processors of the same kind share the files handed out by the broker (rather than each
+        #   receiving every file published on the topic)
+        self.broker = None
+        if args.distribution == PCAP_DISTRIBUTION_QUEUE:
+            self.logger.info(f"{scriptName}:\tbinding broker port {PCAP_BROKER_PORT}")
+            self.broker = PcapWorkBroker(
+                PCAP_BROKER_PORT,
+                context=self.context,
+                logger=self.logger,
+                kinds=[x.strip() for x in args.queueKinds.split(',') if x.strip()],
+            )
+            self.broker.start()
+
         self.logger.info(f"{scriptName}:\tEventWatcher initialized")
 
     ###################################################################################################
@@ -206,7 +340,9 @@ class EventWatcher:
 
                 # check with Arkime's files index in OpenSearch and make sure it's not a duplicate
                 fileIsDuplicate = False
-                if self.useOpenSearch:
+                if self.dedupIndex:
+                    fileIsDuplicate = self.dedupIndex.is_duplicate(relativePath, pathname, fileSize)
+                elif self.useOpenSearch:
                     s = (
                         SearchClass(using=self.openSearchClient, index=ARKIME_FILES_INDEX)
                         .filter("term", node=args.nodeName)
@@ -239,6 +375,10 @@ class EventWatcher:
                             FILE_INFO_DICT_TAGS: tags_from_filename(relativePath),
                         }
                         self.topic_socket.send_string(json.dumps(fileInfo))
+                        if self.broker:
+                            self.broker.publish(fileInfo)
+                        if self.dedupIndex:
+                            self.dedupIndex.add(relativePath, pathname, fileSize)
                         self.logger.info(f"{scriptName}:\t📫\t{fileInfo}")
                     except zmq.Again:
                         self.logger.debug(f"{scriptName}:\t🕑\t{pathname}")
@@ -423,6 +563,34 @@ def main():
         default=int(os.getenv('PCAP_PIPELINE_POLLING_ASSUME_CLOSED_SEC', str(watch_common.ASSUME_CLOSED_SEC_DEFAULT))),
         required=False,
     )
+    parser.add_argument(
+        '--dedup-index',
+        dest='dedupIndexFile',
+        help=f"Local index of files already processed, seeded from OpenSearch (default is {DEDUP_INDEX_FILE_DEFAULT} under --directory; \"none\" to query OpenSearch for each file instead)",
+        metavar='<filename>',
+        type=str,
+        default=os.getenv('PCAP_PIPELINE_DEDUP_INDEX', ''),
+        required=False,
+    )
+    parser.add_argument(
+        '--distribution',
+        dest='distribution',
+        help=f"Publish every PCAP file to every processor ({PCAP_DISTRIBUTION_PUBSUB}), or also queue them to be shared by processors of the same kind ({PCAP_DISTRIBUTION_QUEUE})",
+        metavar=f'{PCAP_DISTRIBUTION_PUBSUB}|{PCAP_DISTRIBUTION_QUEUE}',
+        type=str,
+        choices=[PCAP_DISTRIBUTION_PUBSUB, PCAP_DISTRIBUTION_QUEUE],
+        default=os.getenv('PCAP_PIPELINE_DISTRIBUTION', PCAP_DISTRIBUTION_PUBSUB).lower(),
+        required=False,
+    )
+    parser.add_argument(
+        '--queue-kinds',
+        dest='queueKinds',
+        help=f"With --distribution {PCAP_DISTRIBUTION_QUEUE}, comma-separated kinds of processors to queue files for before any have connected",
+        metavar='<kind>[,<kind>...]',
+        type=str,
+        default=os.getenv('PCAP_PIPELINE_QUEUE_KINDS', ','.join(BROKER_KINDS_DEFAULT)),
+        required=False,
+    )
     requiredNamed = parser.add_argument_group('required arguments')
     requiredNamed.add_argument(
         '-d', '--directory', dest='baseDir', help='Directory to monitor', metavar='<directory>', type=str, required=True
@@ -436,6 +604,10 @@ def main():
         exit(2)
 
     args.verbose = logging.ERROR - (10 * args.verbose) if args.verbose > 0 else 0
+    if args.dedupIndexFile.lower() == 'none':
+        args.dedupIndexFile = None
+    elif not args.dedupIndexFile:
+        args.dedupIndexFile = os.path.join(args.baseDir, DEDUP_INDEX_FILE_DEFAULT)
     logging.basicConfig(
         level=args.verbose, format='%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'
     )
@@ -6,7 +6,8 @@ import os
 import socket
 import time
 import malcolm_utils
-from typing import Optional, Dict, Any, Union
+from collections import deque
+from typing import Optional, Dict, Any, List, Union
 
 
 class SuricataSocketClient:
@@ -193,6 +194,27 @@ class SuricataSocketClient:
             self._debug(f"ERROR: Exception processing PCAP: {e}")
             return False
 
+    def pcap_current(
+        self,
+    ) -> Union[str, None]:
+        """Return the PCAP file Suricata is processing ("None" if it's idle), or None if it can't be determined"""
+        response = self._send_command({"command": "pcap-current"})
+        if response and (response.get("return") == "OK"):
+            return str(response.get("message"))
+        return None
+
+    def pcap_file_number(
+        self,
+    ) -> Union[int, None]:
+        """Return the number of PCAP files waiting to be processed, or None if it can't be determined"""
+        response = self._send_command({"command": "pcap-file-number"})
+        if response and (response.get("return") == "OK"):
+            try:
+                return int(response.get("message"))
+            except (TypeError, ValueError):
+                pass
+        return None
+
     def close(
         self,
     ) -> None:
@@ -201,3 +223,70 @@ class SuricataSocketClient:
             self.sock.close()
         except Exception:
             pass
+
+
+class SuricataCompletionTracker:
+    """Tracks which PCAP files submitted to Suricata over its socket have been processed
+
+    Suricata processes the PCAP files submitted in unix socket mode one at a time, in the order they were
+    submitted, but doesn't report when each is done. Instead, the number of files still outstanding is polled
+    (those waiting, plus the one being processed, if any): all files submitted before those have finished.
+    This assumes nothing else is submitting files to the same Suricata instance.
+    """
+
+    def __init__(
+        self,
+        client: SuricataSocketClient,
+    ):
+        self.client = client
+        self.outstanding = deque()
+
+    def __len__(
+        self,
+    ) -> int:
+        return len(self.outstanding)
+
+    def submitted(
+        self,
+        pcap_file: str,
+        context: Any = None,
+    ) -> None:
+        """Record that pcap_file has been submitted (context is returned with it when it finishes)"""
+        now_time = time.monotonic()
+        self.outstanding.append(
+            {
+                'pcap_file': pcap_file,
+                'context': context,
+                'submitted': now_time,
+                # if Suricata was idle it starts on this file right away
+                'started': now_time if (len(self.outstanding) == 0) else None,
+            }
+        )
+
+    def poll(
+        self,
+    ) -> List[Dict[str, Any]]:
+        """Return the files that have finished since the last poll, with their wait and processing times"""
+        finished = []
+        if not self.outstanding:
+            return finished
+
+        current = self.client.pcap_current()
+        waiting = self.client.pcap_file_number()
+        if (current is None) or (waiting is None):
+            return finished
+
+        remaining = waiting + (0 if (current == "None") else 1)
+        now_time = time.monotonic()
+        while len(self.outstanding) > remaining:
+            entry = self.outstanding.popleft()
+            started = entry['started'] if (entry['started'] is not None) else entry['submitted']
+            entry['wait_sec'] = started - entry['submitted']
+            entry['processing_sec'] = now_time - started
+            finished.append(entry)
+
+        if finished and self.outstanding and (self.outstanding[0]['started'] is None):
+            # the next file in line started when the one(s) before it finished (to within the polling interval)
+            self.outstanding[0]['started'] = now_time
+
+        return finished